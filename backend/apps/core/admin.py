@@ -1,5 +1,12 @@
+import json
+
 from django.contrib import admin
-from .models import Task
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .cache import task_fragments
+from .models import RequestProfile, Task
 
 
 @admin.register(Task)
@@ -26,3 +33,118 @@ class TaskAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Оптимизация запросов с select_related"""
         return super().get_queryset(request).select_related('user')
+
+    def save_model(self, request, obj, form, change):
+        """Сохранение из формы и из списка (list_editable) сбрасывает представление задачи в API"""
+        super().save_model(request, obj, form, change)
+        task_fragments.invalidate([obj.pk])
+
+    def delete_model(self, request, obj):
+        task_id = obj.pk
+        super().delete_model(request, obj)
+        task_fragments.invalidate([task_id])
+
+    def delete_queryset(self, request, queryset):
+        task_ids = list(queryset.values_list('pk', flat=True))
+        super().delete_queryset(request, queryset)
+        task_fragments.invalidate(task_ids)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Просмотр и скачивание отчётов профилировщика запросов (только чтение)"""
+
+    list_display = (
+        'request_id', 'created_at', 'method', 'path', 'status_code',
+        'duration_ms', 'query_count', 'db_time_ms', 'trigger', 'user',
+    )
+    list_filter = ('trigger', 'method', 'status_code', 'created_at')
+    search_fields = ('request_id', 'path', 'view_name', 'user__username')
+    date_hierarchy = 'created_at'
+    fieldsets = (
+        ('Запрос', {
+            'fields': (
+                'request_id', 'created_at', 'trigger', 'method', 'path', 'view_name', 'user',
+                'status_code', 'duration_ms', 'query_count', 'db_time_ms', 'downloads',
+            )
+        }),
+        ('SQL-запросы', {
+            'fields': ('queries_display',)
+        }),
+        ('cProfile', {
+            'fields': ('profile_display',)
+        }),
+    )
+    list_select_related = ('user',)
+
+    def get_queryset(self, request):
+        # Списку не нужны SQL, сводка и данные cProfile - самые большие поля отчёта
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            return queryset.defer('queries', 'profile', 'stats')
+        return queryset
+
+    def get_readonly_fields(self, request, obj=None):
+        return [name for _, options in self.fieldsets for name in options['fields']]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description='Скачать')
+    def downloads(self, obj):
+        links = [('json', 'отчёт JSON')]
+        if obj.stats:
+            links.append(('prof', 'данные cProfile (pstats, snakeviz)'))
+        return format_html_join(
+            ' | ', '<a href="{}">{}</a>',
+            ((reverse('admin:core_requestprofile_download', args=[obj.pk, kind]), title) for kind, title in links),
+        )
+
+    @admin.display(description='SQL-запросы')
+    def queries_display(self, obj):
+        return format_html_join(
+            '', '<p><b>{} мс</b> ({})</p><pre style="white-space: pre-wrap">{}</pre>{}',
+            (
+                (
+                    query['time_ms'], query['db'], query['sql'],
+                    format_html('<pre>{}</pre>', query['explain']) if query.get('explain') else '',
+                )
+                for query in obj.queries
+            ),
+        ) or '-'
+
+    @admin.display(description='Сводка по накопленному времени')
+    def profile_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.profile) if obj.profile else '-'
+
+    def download_view(self, request, object_id, kind):
+        obj = self.get_object(request, object_id)
+        if obj is None or not self.has_view_permission(request, obj) or kind not in ('json', 'prof'):
+            raise Http404
+        if kind == 'prof':
+            if not obj.stats:
+                raise Http404
+            response = HttpResponse(bytes(obj.stats), content_type='application/octet-stream')
+        else:
+            report = {
+                field.name: getattr(obj, field.attname)
+                for field in obj._meta.concrete_fields if field.name != 'stats'
+            }
+            response = HttpResponse(
+                json.dumps(report, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2),
+                content_type='application/json; charset=utf-8',
+            )
+        response['Content-Disposition'] = f'attachment; filename="profile-{obj.request_id}.{kind}"'
+        return response
@@ -0,0 +1,211 @@
+"""
+Асинхронные версии горячих эндпоинтов для ASGI (ASYNC_VIEWS=True, см.
+config/urls_async.py). URL, сериализаторы, ETag и ответы - те же, что у
+синхронных представлений из views.py: запрос, права, исключения и рендеринг
+выполняет экземпляр синхронного DRF-представления, а запросы к БД -
+асинхронный ORM. Методы без асинхронного обработчика (создание, изменение,
+удаление) выполняет синхронное представление в пуле потоков
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import path
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .cache import task_fragments, user_cache
+from .conditional import (
+    check_preconditions,
+    set_validators,
+    task_validators,
+    user_tasks_validators
+)
+from .filters import has_trigram_support
+from .models import Task, TaskCounters
+from .serializers import TaskSerializer
+from . import views
+
+
+class AsyncAPIView(View):
+    """
+    Асинхронная обёртка над синхронным DRF-представлением sync_view.
+    dispatch повторяет APIView.initial() (согласование формата, версия,
+    аутентификация, права, троттлинг) с асинхронной аутентификацией.
+    Обработчик метода получает экземпляр sync_view (для фильтров,
+    пагинации и сериализаторов) и DRF-запрос
+    """
+
+    sync_view = None
+    sync_callable = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault('sync_callable', sync_to_async(cls.sync_view.as_view()))
+        view = super().as_view(**initkwargs)
+        # Аутентификация по заголовку Authorization, сессия и CSRF не нужны - как у APIView
+        return csrf_exempt(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        if method not in self.async_methods():
+            return await self.sync_callable(request, *args, **kwargs)
+
+        view = self.sync_view()
+        view.args, view.kwargs = args, kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+        try:
+            view.format_kwarg = view.get_format_suffix(**kwargs)
+            request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+            request.version, request.versioning_scheme = view.determine_version(request, *args, **kwargs)
+            await self.authenticate(view, request)
+            view.check_permissions(request)
+            if view.throttle_classes:
+                # История запросов троттлинга хранится в синхронном кэше Django
+                await sync_to_async(view.check_throttles)(request)
+            response = await getattr(self, method)(view, request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        response = view.finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            # Рендерим здесь: отложенный рендеринг Django выполнил бы его в пуле потоков
+            response.render()
+            rendered = HttpResponse(
+                response.content, status=response.status_code, headers=dict(response.items())
+            )
+            # Исходные данные, как у Response (их читают тесты и middleware)
+            rendered.data = response.data
+            response = rendered
+        return response
+
+    @classmethod
+    def async_methods(cls):
+        return {
+            method for method in cls.http_method_names
+            if method != 'options' and hasattr(cls, method)
+        }
+
+    async def authenticate(self, view, request):
+        """Request.user/auth через aauthenticate аутентификаторов представления"""
+        for authenticator in request.authenticators:
+            if hasattr(authenticator, 'aauthenticate'):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+        request._authenticator = None
+        request.user, request.auth = AnonymousUser(), None
+
+
+class TaskListCreateView(AsyncAPIView):
+    """Список задач; создание - синхронным TaskListCreateView"""
+
+    sync_view = views.TaskListCreateView
+
+    async def get(self, view, request, *args, **kwargs):
+        counters = await TaskCounters.objects.afor_user(request.user)
+        etag, last_modified = user_tasks_validators(request, counters, 'tasks')
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = view.get_queryset()
+        if request.query_params.get(api_settings.SEARCH_PARAM):
+            # Результат кэшируется на процесс, дальше фильтр не обращается к БД
+            await sync_to_async(has_trigram_support)(queryset.db)
+        queryset = view.filter_queryset(queryset)
+
+        page = await view.paginator.apaginate_queryset(queryset, request, view)
+        serializer = view.get_serializer(page, many=True)
+        return set_validators(view.get_paginated_response(serializer.data), etag, last_modified)
+
+
+class TaskDetailView(AsyncAPIView):
+    """Получение задачи; изменение и удаление - синхронным TaskDetailView"""
+
+    sync_view = views.TaskDetailView
+
+    async def get(self, view, request, *args, **kwargs):
+        queryset = view.filter_queryset(view.get_queryset())
+        instance = await aget_object_or_404(queryset, **{view.lookup_field: kwargs[view.lookup_field]})
+        view.check_object_permissions(request, instance)
+
+        etag, last_modified = task_validators(instance)
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(view.get_serializer(instance).data), etag, last_modified)
+
+
+class TaskStatsView(AsyncAPIView):
+    """Статистика задач пользователя"""
+
+    sync_view = views.task_stats_view.cls
+
+    async def get(self, view, request, *args, **kwargs):
+        user = request.user
+        counters = user_cache.peek('task-stats', user.pk)
+        if counters is None:
+            # Промах: блокировки и общий бэкенд user_cache синхронные
+            counters = await sync_to_async(user_cache.get_or_set)(
+                'task-stats', user.pk, lambda: TaskCounters.objects.for_user(user),
+            )
+        etag, last_modified = user_tasks_validators(request, counters, 'stats')
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        stats = {
+            'total_tasks': counters.total,
+            'completed_tasks': counters.completed,
+            'pending_tasks': counters.pending,
+        }
+        stats['completion_rate'] = (
+            (stats['completed_tasks'] / stats['total_tasks'] * 100)
+            if stats['total_tasks'] > 0 else 0
+        )
+        return set_validators(Response(stats, status=status.HTTP_200_OK), etag, last_modified)
+
+
+class ToggleTaskStatusView(AsyncAPIView):
+    """
+    Переключение статуса задачи. UPDATE и пересчёт счётчиков идут в одной
+    транзакции, а транзакций асинхронный ORM не поддерживает, поэтому
+    запись - один вызов в пуле потоков
+    """
+
+    sync_view = views.toggle_task_status_view.cls
+
+    async def patch(self, view, request, task_id):
+        queryset = Task.objects.filter(id=task_id, user=request.user)
+        tasks = await sync_to_async(queryset.toggle_status)()
+        if not tasks:
+            return Response({
+                'error': 'Задача не найдена'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        task = tasks[0]
+        task_fragments.invalidate([task.pk])
+        return Response({
+            'task': TaskSerializer(task, context={'request': request}).data,
+            'message': f'Статус задачи изменен на "{task.get_status_display()}"'
+        }, status=status.HTTP_200_OK)
+
+
+def with_async_views(urlpatterns, async_views):
+    """Копия urlpatterns, где представления с именами из async_views заменены асинхронными"""
+    return [
+        path(str(pattern.pattern), async_views[pattern.name], name=pattern.name)
+        if pattern.name in async_views else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,6 @@
+"""
+Нагрузочное тестирование API: HTTP-клиент и генератор нагрузки (load),
+сценарии для всех эндпоинтов задач и пользователей (scenarios) и отчёт
+с перцентилями и сравнением с прошлым прогоном (report). Запускается
+командами seed_benchmark_data и benchmark_api
+"""
@@ -0,0 +1,132 @@
+"""
+Генератор нагрузки на asyncio: keep-alive соединения HTTP/1.1 к локальному
+серверу, ответы с Content-Length и chunked. Процесс uvicorn для замеров
+запускается start_uvicorn
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+
+@dataclass
+class LoadResult:
+    # Задержки успешных ответов (код < 400), секунды
+    timings: list = field(default_factory=list)
+    # Количество ответов с ошибкой по кодам статуса (0 - обрыв соединения)
+    errors: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class Connection:
+    """Одно keep-alive соединение; после Connection: close переоткрывается"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=(), body=b''):
+        """Отправляет запрос и читает ответ целиком, возвращает (код статуса, тело)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [
+            f'{method} {path} HTTP/1.1', f'Host: {self.host}', f'Content-Length: {len(body)}',
+            *(f'{name}: {value}' for name, value in headers),
+        ]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+        response_headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            content = await self._read_chunked()
+        else:
+            content = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return int(status_line.split()[1]), content
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                # Завершающие заголовки не используются
+                while await self.reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_load(host, port, requests, concurrency):
+    """
+    Выполняет запросы requests - (метод, путь, заголовки, тело) - по
+    concurrency соединениям. Каждый запрос выполняется ровно один раз,
+    поэтому одинаковые списки запросов дают сравнимые результаты
+    """
+    result = LoadResult()
+    pending = iter(requests)
+
+    async def worker():
+        connection = Connection(host, port)
+        try:
+            for method, path, headers, body in pending:
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.request(method, path, headers, body)
+                except (OSError, asyncio.IncompleteReadError):
+                    await connection.close()
+                    status = 0
+                if 0 < status < 400:
+                    result.timings.append(time.perf_counter() - started)
+                else:
+                    result.errors[status] = result.errors.get(status, 0) + 1
+        finally:
+            await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def start_uvicorn(port, env=None, timeout=30):
+    """
+    Запускает uvicorn с config.asgi:application и ждёт, пока порт начнёт
+    принимать соединения. Возвращает процесс; остановить - terminate()
+    """
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+            '--port', str(port), '--log-level', 'warning', '--no-access-log',
+        ],
+        cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.terminate()
+    server.wait()
+    raise RuntimeError(f'uvicorn не запустился за {timeout} секунд')
@@ -0,0 +1,49 @@
+"""
+Сводка результатов прогона и сравнение с сохранённым отчётом
+"""
+
+
+def percentile(sorted_values, q):
+    """Перцентиль q (0..1) по отсортированному списку, методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(result):
+    """Словарь с rps, перцентилями задержки (мс) и ошибками по кодам для LoadResult"""
+    timings = sorted(result.timings)
+    errors = sum(result.errors.values())
+    return {
+        'requests': len(timings) + errors,
+        'errors': errors,
+        'error_statuses': {str(code): count for code, count in sorted(result.errors.items())},
+        'rps': round(len(timings) / result.elapsed, 1) if result.elapsed else 0.0,
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 2) if timings else 0.0,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2) if timings else 0.0,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Регрессии current относительно baseline (отчёты benchmark_api):
+    p95 выросла или rps упал больше чем на threshold (доля), либо доля
+    ошибок выросла больше чем на threshold. Возвращает список строк с описанием
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        if before['p95_ms'] and now['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(f'{name}: p95 {before["p95_ms"]} -> {now["p95_ms"]} мс')
+        if before['rps'] and now['rps'] < before['rps'] * (1 - threshold):
+            regressions.append(f'{name}: rps {before["rps"]} -> {now["rps"]}')
+        before_rate = before['errors'] / before['requests'] if before['requests'] else 0
+        now_rate = now['errors'] / now['requests'] if now['requests'] else 0
+        if now_rate > before_rate + threshold:
+            regressions.append(f'{name}: доля ошибок {before_rate:.0%} -> {now_rate:.0%}')
+    return regressions
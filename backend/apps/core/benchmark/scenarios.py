@@ -0,0 +1,207 @@
+"""
+Сценарии нагрузки для всех эндпоинтов apps/core/urls.py и
+apps/users/urls.py. Сценарий строит заранее известный список запросов,
+поэтому прогоны с одинаковыми параметрами сравнимы. Данные для сценариев
+(токены, ID задач, задачи на удаление) готовит BenchmarkData; всё, что
+прогон создал, cleanup() удаляет
+"""
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.models import Task, TaskTombstone
+
+# Задач в одном групповом запросе и в одном файле импорта
+BULK_SIZE = 10
+MULTIPART_BOUNDARY = 'benchmark-boundary'
+
+
+@dataclass
+class Scenario:
+    # Ключ отчёта: имя маршрута, метод и вариант
+    name: str
+    build: Callable
+    # Сколько задач из пула на удаление нужно на один запрос
+    deletes: int = 0
+    # Сколько refresh-токенов нужно на один запрос
+    refresh_tokens: int = 0
+
+
+class BenchmarkData:
+    """
+    Пользователи с тестовыми данными (seed_benchmark_data) и всё, что нужно
+    сценариям: access-токены, ID задач, задачи на удаление и refresh-токены
+    """
+
+    def __init__(self, users, password, task_ids):
+        self.users = users
+        self.password = password
+        self.task_ids = task_ids
+        self.access = [str(RefreshToken.for_user(user).access_token) for user in users]
+        self.run_id = uuid.uuid4().hex[:8]
+        self.started_at = timezone.now()
+        self.max_task_id = Task.objects.aggregate(value=Max('id'))['value'] or 0
+        self._delete_ids = iter(())
+        self._refresh = iter(())
+
+    @classmethod
+    def load(cls, prefix, password, tasks_per_user=100):
+        users = list(User.objects.filter(username__startswith=f'{prefix}_').order_by('id'))
+        task_ids = [
+            list(Task.objects.filter(user=user).order_by('id').values_list('id', flat=True)[:tasks_per_user])
+            for user in users
+        ]
+        return cls(users, password, task_ids) if users and all(task_ids) else None
+
+    def reserve(self, deletes, refresh_tokens):
+        """
+        Задачи на удаление и refresh-токены первого пользователя для
+        разрушающих сценариев; сценарии берут их по очереди take_*
+        """
+        owner = self.users[0]
+        self._delete_ids = iter([task.id for task in Task.objects.bulk_create([
+            Task(user=owner, title=f'Удаляемая {i}') for i in range(deletes)
+        ])])
+        self._refresh = iter([str(RefreshToken.for_user(owner)) for _ in range(refresh_tokens)])
+
+    def take_deletes(self, count):
+        return [next(self._delete_ids) for _ in range(count)]
+
+    def take_refresh(self):
+        return next(self._refresh)
+
+    def cleanup(self):
+        """Удаляет созданные прогоном задачи, надгробия, токены и пользователей"""
+        User.objects.filter(username__startswith=f'bench_reg_{self.run_id}_').delete()
+        Task.objects.filter(user__in=self.users, id__gt=self.max_task_id).delete()
+        TaskTombstone.objects.filter(user__in=self.users, deleted_at__gte=self.started_at).delete()
+        OutstandingToken.objects.filter(user__in=self.users, created_at__gte=self.started_at).delete()
+
+    def auth(self, i, content_type='application/json'):
+        """Заголовки i-го запроса: токен пользователя i % N"""
+        headers = [('Authorization', f'Bearer {self.access[i % len(self.users)]}')]
+        if content_type:
+            headers.append(('Content-Type', content_type))
+        return headers
+
+    def task_id(self, i):
+        ids = self.task_ids[i % len(self.users)]
+        return ids[(i // len(self.users)) % len(ids)]
+
+
+def _json(payload):
+    return json.dumps(payload, ensure_ascii=False).encode()
+
+
+def _get(url_name, params=None, task=False):
+    """GET-сценарий маршрута url_name; task=True - с ID задачи пользователя"""
+    def build(data, i):
+        url = reverse(url_name, args=[data.task_id(i)] if task else None)
+        return 'GET', f'{url}?{urlencode(params)}' if params else url, data.auth(i, None), b''
+    return build
+
+
+def _import_body(i):
+    rows = b''.join(_json({'title': f'Импорт {i}.{n}'}) + b'\n' for n in range(BULK_SIZE))
+    return (
+        f'--{MULTIPART_BOUNDARY}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="tasks.ndjson"\r\n'
+        f'Content-Type: application/x-ndjson\r\n\r\n'
+    ).encode() + rows + f'\r\n--{MULTIPART_BOUNDARY}--\r\n'.encode()
+
+
+SCENARIOS = [
+    # Чтение
+    Scenario('core:task-list-create GET', _get('core:task-list-create')),
+    Scenario('core:task-list-create GET cursor',
+             _get('core:task-list-create', {'pagination': 'cursor'})),
+    Scenario('core:task-list-create GET search',
+             _get('core:task-list-create', {'search': 'отчёт'})),
+    Scenario('core:task-list-create GET status',
+             _get('core:task-list-create', {'status': 'completed', 'ordering': 'title'})),
+    Scenario('core:task-list-create GET preview',
+             _get('core:task-list-create', {'fields': 'id,title,status,description', 'preview': '1'})),
+    Scenario('core:task-detail GET',
+             _get('core:task-detail', task=True)),
+    Scenario('core:task-stats GET', _get('core:task-stats')),
+    Scenario('core:task-sync GET', _get('core:task-sync')),
+    Scenario('core:task-export GET', _get('core:task-export')),
+    Scenario('users:user-profile GET', _get('users:user-profile')),
+
+    # Аутентификация
+    Scenario('users:user-login POST', lambda data, i: (
+        'POST', reverse('users:user-login'), [('Content-Type', 'application/json')],
+        _json({'username': data.users[i % len(data.users)].username, 'password': data.password}),
+    )),
+    Scenario('users:token_refresh POST', lambda data, i: (
+        'POST', reverse('users:token_refresh'), [('Content-Type', 'application/json')],
+        _json({'refresh': data.take_refresh()}),
+    ), refresh_tokens=1),
+    Scenario('users:user-register POST', lambda data, i: (
+        'POST', reverse('users:user-register'), [('Content-Type', 'application/json')],
+        _json({
+            'username': f'bench_reg_{data.run_id}_{i}', 'email': f'bench_reg_{data.run_id}_{i}@bench.local',
+            'password': data.password, 'password_confirm': data.password,
+        }),
+    )),
+
+    # Запись
+    Scenario('core:task-list-create POST', lambda data, i: (
+        'POST', reverse('core:task-list-create'), data.auth(i),
+        _json({'title': f'Нагрузка {i}', 'description': 'Создано benchmark_api'}),
+    )),
+    Scenario('core:task-detail PATCH', lambda data, i: (
+        'PATCH', reverse('core:task-detail', args=[data.task_id(i)]), data.auth(i),
+        _json({'description': f'Изменено {i}'}),
+    )),
+    Scenario('core:toggle-task-status PATCH', lambda data, i: (
+        'PATCH', reverse('core:toggle-task-status', args=[data.task_id(i)]), data.auth(i, None), b'',
+    )),
+    Scenario('core:toggle-tasks-status PATCH', lambda data, i: (
+        'PATCH', reverse('core:toggle-tasks-status'), data.auth(i),
+        _json({'ids': [data.task_id(i + n * len(data.users)) for n in range(BULK_SIZE)]}),
+    )),
+    Scenario('core:task-bulk POST', lambda data, i: (
+        'POST', reverse('core:task-bulk'), data.auth(i),
+        _json({'tasks': [{'title': f'Пакет {i}.{n}'} for n in range(BULK_SIZE)]}),
+    )),
+    Scenario('core:task-bulk PATCH', lambda data, i: (
+        'PATCH', reverse('core:task-bulk'), data.auth(i),
+        _json({'tasks': [
+            {'id': data.task_id(i + n * len(data.users)), 'description': f'Пакет {i}'}
+            for n in range(BULK_SIZE)
+        ]}),
+    )),
+    Scenario('core:task-bulk-status PATCH', lambda data, i: (
+        'PATCH', reverse('core:task-bulk-status'), data.auth(i),
+        _json({
+            'status': 'completed' if i % 2 else 'pending',
+            'ids': [data.task_id(i + n * len(data.users)) for n in range(BULK_SIZE)],
+        }),
+    )),
+    Scenario('core:task-import POST', lambda data, i: (
+        'POST', reverse('core:task-import'),
+        data.auth(i, f'multipart/form-data; boundary={MULTIPART_BOUNDARY}'), _import_body(i),
+    )),
+
+    # Удаление: задачи и токены первого пользователя из резерва
+    Scenario('core:task-detail DELETE', lambda data, i: (
+        'DELETE', reverse('core:task-detail', args=data.take_deletes(1)), data.auth(0, None), b'',
+    ), deletes=1),
+    Scenario('core:task-bulk DELETE', lambda data, i: (
+        'DELETE', reverse('core:task-bulk'), data.auth(0),
+        _json({'ids': data.take_deletes(BULK_SIZE)}),
+    ), deletes=BULK_SIZE),
+    Scenario('users:user-logout POST', lambda data, i: (
+        'POST', reverse('users:user-logout'), data.auth(0), _json({'refresh': data.take_refresh()}),
+    ), refresh_tokens=1),
+]
@@ -0,0 +1,229 @@
+"""
+Кэш данных пользователя для повторяющихся ответов (статистика задач,
+профиль): LRU в памяти процесса перед общим бэкендом CACHES['default'].
+Ключ записи включает версию данных пользователя. Любое изменение его задач
+(TaskCounters.objects.apply_delta/rebuild) или профиля заменяет версию, и
+старые записи больше не читаются, а со временем вытесняются.
+Версия хранится в общем бэкенде, в памяти процесса - не дольше
+API_CACHE_LOCAL_TTL секунд: столько другой процесс может отдавать данные до
+изменения. QuerySet.update() пользователей сигналов не шлёт - после него
+нужны user_cache.invalidate() и user_states.invalidate(). Одновременные промахи по одному ключу вычисляют значение один раз:
+в процессе - под блокировкой ключа, между процессами - под блокировкой в
+общем бэкенде (cache.add), остальные ждут её результата. Промах
+вычисляется по основной БД, даже если запрос читает с реплик.
+
+task_fragments - готовые представления задач для списков в памяти процесса
+"""
+import threading
+import time
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.authentication import TTLCache
+
+from .metrics import CACHE_REQUESTS
+from .routers import pin_primary
+
+# Блокировки вычисления в процессе: ключ попадает в одну из LOCK_STRIPES
+LOCK_STRIPES = 64
+# Пауза между проверками общего бэкенда в ожидании чужого вычисления, секунды
+POLL_INTERVAL = 0.01
+
+
+def new_version():
+    """
+    Случайная версия вместо счётчика: замена не требует атомарного incr
+    (его нет у файлового кэша), а после потери ключа версии в бэкенде
+    новая версия не совпадёт ни с одной из старых записей
+    """
+    return uuid.uuid4().hex[:16]
+
+
+class UserCache:
+    """
+    Двухуровневый кэш с версией данных на пользователя и объединением
+    промахов. Версии хранятся под ключами '<prefix>:<user_id>'
+    """
+
+    def __init__(self, alias='default', prefix='user-version'):
+        self.alias = alias
+        self.prefix = prefix
+        self.entries = TTLCache(settings.API_CACHE_LOCAL_SIZE, settings.API_CACHE_TIMEOUT)
+        self.versions = TTLCache(settings.API_CACHE_LOCAL_SIZE, settings.API_CACHE_LOCAL_TTL)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def version(self, user_id):
+        """
+        Версия данных пользователя или None, если общий бэкенд ничего не
+        хранит (CACHE_BACKEND=dummy): тогда кэш не используется вовсе, иначе
+        записи в памяти процесса никогда не сбрасывались бы
+        """
+        key = f'{self.prefix}:{user_id}'
+        version = self.versions.get(key)
+        if version is None:
+            version = self.shared.get(key)
+            if version is None:
+                self.shared.add(key, new_version(), timeout=None)
+                version = self.shared.get(key)
+            if version is not None:
+                self.versions.set(key, version)
+        return version
+
+    def key(self, name, user_id):
+        """Ключ записи или None без версии (см. version)"""
+        version = self.version(user_id)
+        return f'{name}:{user_id}:{version}' if version is not None else None
+
+    def peek(self, name, user_id):
+        """Значение из памяти процесса или None - без обращения к общему бэкенду"""
+        key = self.key(name, user_id)
+        value = self.entries.get(key) if key is not None else None
+        if value is not None:
+            CACHE_REQUESTS.inc(name, 'local_hit')
+        return value
+
+    def get_or_set(self, name, user_id, compute):
+        """
+        Значение name для пользователя: из памяти процесса, из общего бэкенда
+        или compute() (не должна возвращать None). Для асинхронных
+        представлений - через sync_to_async после неудачного peek
+        """
+        key = self.key(name, user_id)
+        if key is None:
+            CACHE_REQUESTS.inc(name, 'miss')
+            return compute()
+        value = self.entries.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(name, 'local_hit')
+            return value
+
+        with self._locks[hash(key) % LOCK_STRIPES]:
+            # Пока ждали блокировку, значение мог получить другой поток
+            value = self.entries.get(key)
+            if value is not None:
+                CACHE_REQUESTS.inc(name, 'coalesced')
+                return value
+            value = self.shared.get(key)
+            if value is not None:
+                CACHE_REQUESTS.inc(name, 'shared_hit')
+            else:
+                value = self._compute(name, key, compute)
+            self.entries.set(key, value)
+            return value
+
+    def _compute(self, name, key, compute):
+        wait = settings.API_CACHE_COALESCE_TIMEOUT
+        lock_key = f'lock:{key}'
+        if not self.shared.add(lock_key, 1, timeout=wait):
+            # Значение вычисляет другой процесс: ждём его, но не дольше wait
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = self.shared.get(key)
+                if value is not None:
+                    CACHE_REQUESTS.inc(name, 'coalesced')
+                    return value
+            lock_key = None
+
+        CACHE_REQUESTS.inc(name, 'miss')
+        # Значение сохраняется под новой версией для всех процессов, а реплика
+        # может ещё не видеть изменение, из-за которого версия сменилась:
+        # вычисляем по основной БД (и дальше в этом запросе читаем с неё)
+        pin_primary()
+        try:
+            value = compute()
+            self.shared.set(key, value, timeout=settings.API_CACHE_TIMEOUT)
+        finally:
+            if lock_key is not None:
+                self.shared.delete(lock_key)
+        return value
+
+    def invalidate(self, user_ids, using=DEFAULT_DB_ALIAS):
+        """
+        Заменяет версии пользователей сразу (изменения видны следующим
+        чтениям в этой же транзакции) и ещё раз после фиксации: иначе
+        параллельный запрос мог прочитать данные до фиксации и сохранить их
+        под уже новой версией
+        """
+        user_ids = list(user_ids)
+        self._bump(user_ids)
+        transaction.on_commit(partial(self._bump, user_ids), using=using)
+
+    def _bump(self, user_ids):
+        self.shared.set_many(
+            {f'{self.prefix}:{user_id}': new_version() for user_id in user_ids}, timeout=None,
+        )
+        for user_id in user_ids:
+            self.versions.pop(f'{self.prefix}:{user_id}')
+
+    def clear(self):
+        """Очищает память процесса (общий бэкенд не трогает)"""
+        self.entries.clear()
+        self.versions.clear()
+
+
+user_cache = UserCache()
+# Версия самого пользователя (username, is_active) для StatelessJWTAuthentication:
+# в отличие от user_cache не меняется при изменении его задач
+user_states = UserCache(prefix='user-state')
+
+
+class TaskFragmentCache:
+    """
+    Представления задач (TaskSerializer.to_representation) по id задачи.
+    Запись действительна, пока у задачи тот же updated_at: любое изменение
+    через ORM или UPDATE ... RETURNING выставляет новый updated_at, поэтому
+    устаревшая запись не отдаётся и в других процессах. invalidate сразу
+    освобождает записи изменённых задач. Объём ограничен LRU на
+    TASK_FRAGMENT_CACHE_SIZE задач
+    """
+
+    name = 'task-fragment'
+
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize, ttl)
+
+    def get(self, task):
+        entry = self.entries.get(task.pk)
+        if entry is None or entry[0] != task.updated_at:
+            return None
+        return entry[1]
+
+    def set(self, task, fragment):
+        self.entries.set(task.pk, (task.updated_at, fragment))
+
+    def count(self, hits, misses):
+        """Попадания и промахи одного списка - в метрику api_cache_requests_total"""
+        if hits:
+            CACHE_REQUESTS.inc(self.name, 'local_hit', amount=hits)
+        if misses:
+            CACHE_REQUESTS.inc(self.name, 'miss', amount=misses)
+
+    def invalidate(self, task_ids):
+        for task_id in task_ids:
+            self.entries.pop(task_id)
+
+    def clear(self):
+        self.entries.clear()
+
+
+task_fragments = TaskFragmentCache(settings.TASK_FRAGMENT_CACHE_SIZE, settings.TASK_FRAGMENT_CACHE_TTL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, using, **kwargs):
+    """Изменение пользователя сбрасывает кэшированный профиль и состояние для аутентификации"""
+    user_cache.invalidate([instance.pk], using=using)
+    user_states.invalidate([instance.pk], using=using)
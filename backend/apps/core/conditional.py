@@ -0,0 +1,72 @@
+"""
+Условные запросы: ETag/Last-Modified в ответах, 304 на If-None-Match и
+If-Modified-Since, 412 на If-Match и If-Unmodified-Since.
+Валидаторы строятся из дешёвых данных (версия данных пользователя,
+updated_at задачи), поэтому 304 отдаётся без основного запроса и сериализации.
+Last-Modified точен до секунды, поэтому он отдаётся и сравнивается с
+If-Modified-Since, только когда секунда изменения уже прошла: иначе запись
+в ту же секунду после ответа дала бы ложный 304. ETag точен всегда
+"""
+import hashlib
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Сильный ETag из значений, от которых зависит представление ресурса"""
+    raw = '|'.join(str(part) for part in parts).encode()
+    return quote_etag(hashlib.md5(raw, usedforsecurity=False).hexdigest())
+
+
+def task_validators(task):
+    """ETag и Last-Modified конкретной задачи"""
+    return make_etag('task', task.pk, task.updated_at.isoformat()), task.updated_at
+
+
+def user_tasks_validators(request, counters, resource):
+    """
+    ETag и Last-Modified ресурса, зависящего от всех задач пользователя
+    (список, статистика). URL входит в ETag, потому что от параметров
+    запроса зависит содержимое ответа
+    """
+    etag = make_etag(resource, request.user.pk, counters.version, request.build_absolute_uri())
+    return etag, counters.changed_at
+
+
+def settled(last_modified):
+    """
+    last_modified, если его секунда уже прошла, иначе None. После этого
+    любое новое изменение получит время в более поздней секунде
+    """
+    if last_modified is None or int(last_modified.timestamp()) >= int(timezone.now().timestamp()):
+        return None
+    return last_modified
+
+
+def check_preconditions(request, etag=None, last_modified=None):
+    """
+    Проверяет условные заголовки запроса. Возвращает готовый ответ 304/412
+    или None, если запрос нужно выполнить
+    """
+    last_modified = settled(last_modified)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Добавляет валидаторы в ответ. no-cache заставляет браузер каждый раз
+    перепроверять ответ через If-None-Match вместо эвристического кэширования
+    """
+    if etag:
+        response.headers.setdefault('ETag', etag)
+    last_modified = settled(last_modified)
+    if last_modified:
+        response.headers.setdefault('Last-Modified', http_date(last_modified.timestamp()))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
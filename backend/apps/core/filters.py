@@ -0,0 +1,69 @@
+import re
+from functools import cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import SEARCH_CONFIG
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+@cache
+def has_trigram_support(alias):
+    """Установлено ли расширение pg_trgm (проверяется один раз на процесс)"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    Поиск задач по ?search= через tsvector вместо ILIKE '%term%'.
+    Каждое слово ищется как префикс (поиск по мере ввода), все слова
+    обязательны. Если установлен pg_trgm, заголовки дополнительно
+    сравниваются по триграммам, что находит опечатки.
+    Без явного ?ordering= результаты сортируются по релевантности,
+    поэтому фильтр должен стоять после OrderingFilter.
+    """
+
+    vector_field = 'search_vector'
+    trigram_field = 'title'
+
+    def get_search_query(self, terms):
+        """Строит tsquery вида 'слово':* & 'другое':* из поисковых термов"""
+        words = [word for term in terms for word in WORD_RE.findall(term.lower())]
+        if not words:
+            return None
+        raw = ' & '.join(f"'{word}':*" for word in words)
+        return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        query = self.get_search_query(terms)
+        if query is None:
+            # Термы из одних знаков препинания: обычный поиск по подстроке
+            return super().filter_queryset(request, queryset, view)
+
+        condition = Q(**{self.vector_field: query})
+        if has_trigram_support(queryset.db):
+            fuzzy = Q()
+            for term in terms:
+                fuzzy &= Q(**{f'{self.trigram_field}__trigram_word_similar': term})
+            condition |= fuzzy
+
+        # ts_rank возвращает real; приведение к double precision сохраняет
+        # точное значение, по которому keyset-пагинация сравнивает строки
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Cast(SearchRank(F(self.vector_field), query), FloatField())
+        )
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
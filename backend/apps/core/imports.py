@@ -0,0 +1,177 @@
+"""
+Потоковый импорт задач из NDJSON и CSV. Файл читается построчно, строки
+проверяются правилами TaskCreateSerializer и вставляются пакетами: каждый
+пакет - отдельная транзакция, после которой известна контрольная точка
+(номер последней обработанной строки). Повторный импорт с start=checkpoint
+пропускает уже обработанные строки
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Task, TaskCounters
+from .serializers import TaskCreateSerializer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+FORMATS = ('ndjson', 'csv')
+# С какого размера файла задачи вставляются через COPY, а не INSERT
+COPY_MIN_SIZE = 10 * 1024 * 1024
+# Расширения файлов, по которым определяется формат
+FORMAT_EXTENSIONS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+
+
+class ImportFormatError(Exception):
+    """
+    Файл дальше невозможно прочитать (кодировка, битый CSV). row - номер
+    строки с ошибкой, result - итог импорта до неё
+    """
+
+    def __init__(self, row, message):
+        super().__init__(message)
+        self.row = row
+        self.result = None
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    failed: int = 0
+    # Номер последней строки, результат которой сохранён в БД
+    checkpoint: int = 0
+
+
+def detect_format(filename, content_type=''):
+    """Формат по расширению файла или Content-Type, None - если не распознан"""
+    for extension, file_format in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    return None
+
+
+def iter_ndjson(stream):
+    """
+    (номер строки, словарь или текст ошибки) для каждой непустой строки
+    бинарного потока. Читается по одной строке
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = loads(line)
+        except ValueError as exc:
+            yield number, f'Некорректный JSON: {exc}'
+            continue
+        if not isinstance(row, dict):
+            yield number, 'Строка должна быть JSON-объектом'
+            continue
+        yield number, row
+
+
+def iter_csv(stream):
+    """
+    (номер записи без заголовка, словарь) для каждой записи CSV с
+    заголовком. Бинарный поток декодируется как UTF-8 (BOM допускается)
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    number = 0
+    try:
+        for number, row in enumerate(reader, 1):
+            # Лишние значения без заголовка DictReader складывает под ключом None
+            row.pop(None, None)
+            yield number, row
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ImportFormatError(number + 1, f'Файл не читается как CSV в UTF-8: {exc}')
+    finally:
+        # Поток принадлежит вызывающему коду
+        text.detach()
+
+
+def iter_rows(stream, file_format):
+    return iter_ndjson(stream) if file_format == 'ndjson' else iter_csv(stream)
+
+
+def import_tasks(user, rows, *, batch_size=1000, use_copy=False, start=0,
+                 on_error=None, on_batch=None):
+    """
+    Импортирует задачи пользователя из (номер, словарь) строк rows.
+    Строки с номером не больше start пропускаются. Ошибки строки передаются
+    в on_error(номер, ошибки) и в памяти не копятся; после каждого
+    сохранённого пакета вызывается on_batch(result). use_copy - вставка через
+    COPY (PostgreSQL), быстрее INSERT на больших файлах
+    """
+    result = ImportResult(checkpoint=start)
+    batch = []
+    last = start
+
+    def flush():
+        if batch:
+            _insert_batch(user, batch, use_copy)
+            result.created += len(batch)
+            batch.clear()
+        result.checkpoint = last
+        if on_batch is not None:
+            on_batch(result)
+
+    try:
+        for number, row in rows:
+            if number <= start:
+                continue
+            last = number
+            if isinstance(row, str):
+                errors = {'non_field_errors': [row]}
+            else:
+                serializer = TaskCreateSerializer(data=row)
+                errors = None if serializer.is_valid() else serializer.errors
+            if errors:
+                result.failed += 1
+                if on_error is not None:
+                    on_error(number, errors)
+            else:
+                batch.append(Task(user=user, **serializer.validated_data))
+            if len(batch) >= batch_size:
+                flush()
+    except ImportFormatError as exc:
+        # Прочитанное до ошибки сохраняется, импорт можно продолжить после исправления файла
+        flush()
+        exc.result = result
+        raise
+    flush()
+    return result
+
+
+def _insert_batch(user, tasks, use_copy):
+    """Вставка пакета задач со счётчиками в одной транзакции"""
+    alias = router.db_for_write(Task)
+    connection = connections[alias]
+    if not use_copy or connection.vendor != 'postgresql':
+        Task.objects.using(alias).bulk_create(tasks)
+        return
+
+    qn = connection.ops.quote_name
+    columns = ('title', 'description', 'status', 'user_id', 'created_at', 'updated_at')
+    sql = (
+        f'COPY {qn(Task._meta.db_table)} ({", ".join(qn(column) for column in columns)}) '
+        f'FROM STDIN'
+    )
+    now = timezone.now()
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        with cursor.copy(sql) as copy:
+            for task in tasks:
+                copy.write_row((task.title, task.description, task.status, user.pk, now, now))
+        TaskCounters.objects.apply_delta(
+            user.pk, total=len(tasks), completed=sum(task.is_completed for task in tasks)
+        )
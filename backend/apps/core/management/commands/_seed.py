@@ -0,0 +1,77 @@
+"""
+Общие утилиты для команд, которым нужен большой набор тестовых данных.
+Модуль начинается с подчёркивания, поэтому Django не считает его командой.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from apps.core.models import Task
+
+WORDS = (
+    'отчёт', 'встреча', 'релиз', 'бюджет', 'клиент', 'договор', 'дизайн',
+    'тест', 'ревью', 'деплой', 'база', 'сервер', 'план', 'звонок', 'письмо',
+    'report', 'meeting', 'release', 'invoice', 'backup', 'migration', 'bug',
+)
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_users(prefix, count, password='benchpass123'):
+    """Создаёт (или переиспользует) пользователей prefix_0 ... prefix_N-1"""
+    usernames = [f'{prefix}_{i}' for i in range(count)]
+    existing = set(
+        User.objects.filter(username__in=usernames).values_list('username', flat=True)
+    )
+    # Пароль хешируется один раз: PBKDF2 на каждого пользователя слишком дорог
+    password_hash = make_password(password)
+    User.objects.bulk_create([
+        User(username=name, email=f'{name}@bench.local', password=password_hash)
+        for name in usernames if name not in existing
+    ])
+    return list(User.objects.filter(username__in=usernames).order_by('id'))
+
+
+def seed_tasks(users, tasks_per_user, batch_size=5000, completed_ratio=0.4,
+               seed=None, stdout=None):
+    """
+    Массово создаёт задачи через bulk_create и разносит created_at
+    по последнему году, чтобы сортировка по дате была реалистичной
+    """
+    rng = random.Random(seed)
+    for user in users:
+        with transaction.atomic():
+            created = 0
+            while created < tasks_per_user:
+                size = min(batch_size, tasks_per_user - created)
+                Task.objects.bulk_create([
+                    Task(
+                        user=user,
+                        title=_sentence(rng, rng.randint(2, 5)),
+                        description=_sentence(rng, rng.randint(0, 30)) or None,
+                        status='completed' if rng.random() < completed_ratio else 'pending',
+                    )
+                    for _ in range(size)
+                ], batch_size=size)
+                created += size
+        if stdout is not None:
+            stdout.write(f'  {user.username}: создано {tasks_per_user} задач')
+
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name(Task._meta.db_table)
+        with connection.cursor() as cursor:
+            if seed is not None:
+                # Даты тоже воспроизводимы при одинаковом seed
+                cursor.execute('SELECT setseed(%s)', [(seed % 1000) / 1000])
+            cursor.execute(
+                f"UPDATE {table} AS t SET created_at = s.ts, updated_at = s.ts "
+                f"FROM (SELECT id, now() - random() * interval '365 days' AS ts "
+                f"      FROM {table} WHERE user_id = ANY(%s)) AS s "
+                f"WHERE t.id = s.id",
+                [[user.pk for user in users]],
+            )
+            cursor.execute(f'ANALYZE {table}')
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import platform
+import subprocess
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.benchmark.load import run_load, start_uvicorn
+from apps.core.benchmark.report import compare, summarize
+from apps.core.benchmark.scenarios import SCENARIOS, BenchmarkData
+from apps.core.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный прогон всех эндпоинтов задач и пользователей на данных
+    seed_benchmark_data. Сервер uvicorn запускается отдельным процессом
+    (или задаётся --url), каждый сценарий выполняет ровно --warmup + --requests
+    запросов по --concurrency соединениям. Отчёт JSON с rps и p50/p95/p99
+    по сценариям пишется в --output; --compare сравнивает его с прошлым
+    отчётом и завершается ошибкой при регрессии больше --threshold
+    """
+
+    help = 'Нагрузочный прогон API с отчётом JSON и сравнением с прошлым прогоном'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Запросов на сценарий')
+        parser.add_argument('--warmup', type=int, default=50,
+                            help='Запросов на сценарий до замера (в отчёт не входят)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Одновременных соединений')
+        parser.add_argument('--only', nargs='+', default=[],
+                            help='Только сценарии, в имени которых есть одна из подстрок')
+        parser.add_argument('--prefix', default='bench_api', help='Префикс пользователей seed_benchmark_data')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--url', help='Адрес уже запущенного сервера, например http://127.0.0.1:8000')
+        parser.add_argument('--port', type=int, default=8766, help='Порт запускаемого uvicorn')
+        parser.add_argument('--async-views', action='store_true',
+                            help='Запустить uvicorn с ASYNC_VIEWS=True')
+        parser.add_argument('--debug', action='store_true', help='Не отключать DEBUG в процессе uvicorn')
+        parser.add_argument('--output', help='Файл отчёта JSON (по умолчанию - stdout)')
+        parser.add_argument('--compare', help='Отчёт прошлого прогона для поиска регрессий')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимое ухудшение p95 и rps (доля)')
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['only'] or any(part in scenario.name for part in options['only'])
+        ]
+        if not scenarios:
+            raise CommandError('Ни один сценарий не подходит под --only')
+
+        data = BenchmarkData.load(options['prefix'], options['password'])
+        if data is None:
+            raise CommandError(
+                f'Нет пользователей {options["prefix"]}_N с задачами, сначала запустите seed_benchmark_data'
+            )
+
+        # До reserve(): задачи для удаления добавляются по числу запросов и
+        # сделали бы отчёты с разным --requests несравнимыми
+        meta = self.get_meta(data, options)
+        count = options['warmup'] + options['requests']
+        data.reserve(
+            deletes=count * sum(scenario.deletes for scenario in scenarios),
+            refresh_tokens=count * sum(scenario.refresh_tokens for scenario in scenarios),
+        )
+        # Запросы строятся заранее: генерация не влияет на замер
+        requests = {
+            scenario.name: [scenario.build(data, i) for i in range(count)] for scenario in scenarios
+        }
+
+        server = None
+        if options['url']:
+            address = urlsplit(options['url'])
+            host, port = address.hostname, address.port or 80
+        else:
+            host, port = '127.0.0.1', options['port']
+            env = {'ASYNC_VIEWS': str(options['async_views'])}
+            if not options['debug']:
+                env['DEBUG'] = 'False'
+            try:
+                server = start_uvicorn(port, env)
+            except RuntimeError as exc:
+                raise CommandError(f'{exc}; для бенчмарка нужен uvicorn: pip install uvicorn')
+
+        report = {'meta': meta, 'results': {}}
+        try:
+            for scenario in scenarios:
+                warmup, measured = (
+                    requests[scenario.name][:options['warmup']],
+                    requests[scenario.name][options['warmup']:],
+                )
+                asyncio.run(run_load(host, port, warmup, options['concurrency']))
+                result = asyncio.run(run_load(host, port, measured, options['concurrency']))
+                report['results'][scenario.name] = summary = summarize(result)
+                self.stderr.write(
+                    f'{scenario.name:<40}{summary["rps"]:>9.1f} rps  p50 {summary["p50_ms"]:>8.2f}  '
+                    f'p95 {summary["p95_ms"]:>8.2f}  p99 {summary["p99_ms"]:>8.2f} мс  '
+                    f'ошибок {summary["errors"]}'
+                )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            data.cleanup()
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline_file:
+                regressions = compare(json.load(baseline_file), report, options['threshold'])
+            if regressions:
+                raise CommandError('Регрессии производительности:\n' + '\n'.join(regressions))
+            self.stderr.write(self.style.SUCCESS('Регрессий нет'))
+
+    @staticmethod
+    def get_meta(data, options):
+        """Условия прогона: без них отчёты разных прогонов нельзя сравнивать"""
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'started_at': timezone.now().isoformat(),
+            'commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'server': options['url'] or ('uvicorn, ASYNC_VIEWS=True' if options['async_views'] else 'uvicorn'),
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'concurrency': options['concurrency'],
+            'users': len(data.users),
+            'tasks': Task.objects.filter(user__in=data.users).count(),
+            'db_pool': settings.DB_POOL,
+            'password_hasher': settings.PASSWORD_HASHER,
+        }
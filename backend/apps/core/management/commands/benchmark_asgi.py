@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core.benchmark.load import run_load, start_uvicorn
+from apps.core.benchmark.report import summarize
+from apps.core.models import Task
+
+from ._seed import seed_tasks, seed_users
+
+MODES = ('sync', 'async')
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность синхронных и асинхронных
+    представлений под uvicorn. Для каждого режима запускается отдельный
+    процесс uvicorn (ASYNC_VIEWS=False/True), и каждый эндпоинт нагружается
+    --concurrency соединениями keep-alive в течение --duration секунд.
+    Под ASGI постоянные соединения Django не переиспользуются между
+    запросами, поэтому для честного сравнения стоит запускать с DB_POOL=True
+    """
+
+    help = 'Пропускная способность sync и async представлений под uvicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='Одновременных соединений')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Секунд нагрузки на каждый эндпоинт')
+        parser.add_argument('--tasks', type=int, default=500,
+                            help='Задач у пользователя с тестовыми данными')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--prefix', default='bench_asgi',
+                            help='Префикс имени пользователя с тестовыми данными')
+        parser.add_argument('--debug', action='store_true',
+                            help='Не отключать DEBUG в процессе uvicorn')
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('Для бенчмарка нужен uvicorn: pip install uvicorn')
+
+        user = seed_users(options['prefix'], 1)[0]
+        existing = Task.objects.filter(user=user).count()
+        if existing < options['tasks']:
+            seed_tasks([user], options['tasks'] - existing, stdout=self.stdout)
+        task_id = Task.objects.filter(user=user).values_list('id', flat=True).first()
+        token = str(RefreshToken.for_user(user).access_token)
+
+        endpoints = [
+            ('GET', '/api/v1/tasks/'),
+            ('GET', '/api/v1/tasks/?pagination=cursor'),
+            ('GET', f'/api/v1/tasks/{task_id}/'),
+            ('GET', '/api/v1/tasks/stats/'),
+            ('PATCH', f'/api/v1/tasks/{task_id}/toggle/'),
+            ('GET', '/api/v1/auth/profile/'),
+        ]
+
+        results = {}
+        for mode in options['modes']:
+            server = self._start_server(mode, options)
+            try:
+                for method, url in endpoints:
+                    requests = self._requests(method, url, token, options['duration'])
+                    results[mode, method, url] = summarize(asyncio.run(
+                        run_load('127.0.0.1', options['port'], requests, options['concurrency'])
+                    ))
+            finally:
+                server.terminate()
+                server.wait()
+
+        self.stdout.write(
+            f"{'эндпоинт':<45}{'режим':<7}{'rps':>9}{'p50, мс':>10}{'p95, мс':>10}"
+            f"{'p99, мс':>10}{'ошибок':>8}"
+        )
+        for method, url in endpoints:
+            for mode in options['modes']:
+                summary = results[mode, method, url]
+                self.stdout.write(
+                    f'{method + " " + url:<45}{mode:<7}{summary["rps"]:>9.1f}'
+                    f'{summary["p50_ms"]:>10.2f}{summary["p95_ms"]:>10.2f}{summary["p99_ms"]:>10.2f}'
+                    f'{summary["errors"]:>8}'
+                )
+
+    def _start_server(self, mode, options):
+        env = {'ASYNC_VIEWS': str(mode == 'async')}
+        if not options['debug']:
+            env['DEBUG'] = 'False'
+        try:
+            return start_uvicorn(options['port'], env)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+    @staticmethod
+    def _requests(method, url, token, duration):
+        """Запросы для run_load: один и тот же запрос, пока не истекут duration секунд"""
+        request = (method, url, [('Authorization', f'Bearer {token}')], b'')
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            yield request
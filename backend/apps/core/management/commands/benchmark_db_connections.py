@@ -0,0 +1,98 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.benchmark.load import LoadResult
+from apps.core.benchmark.report import summarize
+from apps.core.models import Task
+from apps.core.views import toggle_task_status_view
+
+from ._seed import seed_users
+
+MODES = ('no-persistent', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает задержку запроса toggle_task_status_view при новом
+    соединении на каждый запрос (CONN_MAX_AGE=0), постоянных соединениях
+    и пуле psycopg 3. Жизненный цикл запроса воспроизводится как в
+    обработчике WSGI: close_old_connections() до и после каждого вызова
+    """
+
+    help = 'Задержка запросов с постоянными соединениями, пулом и без них'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Количество запросов в каждом режиме')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='Запросов для прогрева перед замером')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES),
+                            help='Какие режимы сравнивать')
+        parser.add_argument('--prefix', default='bench_conn',
+                            help='Префикс имени пользователя с тестовыми данными')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Пул соединений поддерживается только для PostgreSQL')
+
+        user = seed_users(options['prefix'], 1)[0]
+        task = Task.objects.filter(user=user).first() or Task.objects.create(
+            title='Benchmark', user=user
+        )
+        factory = APIRequestFactory()
+
+        def request():
+            close_old_connections()
+            started = time.perf_counter()
+            http_request = factory.patch(f'/api/v1/tasks/{task.pk}/toggle/')
+            force_authenticate(http_request, user=user)
+            toggle_task_status_view(http_request, task_id=task.pk)
+            close_old_connections()
+            return time.perf_counter() - started
+
+        original = {
+            'CONN_MAX_AGE': connection.settings_dict['CONN_MAX_AGE'],
+            'OPTIONS': connection.settings_dict['OPTIONS'],
+        }
+        self.stdout.write(f"{'режим':<15}{'среднее, мс':>12}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+        try:
+            for mode in options['modes']:
+                if not self._configure(mode, original['OPTIONS']):
+                    continue
+                for _ in range(options['warmup']):
+                    request()
+                started = time.perf_counter()
+                timings = [request() for _ in range(options['requests'])]
+                self._report(mode, LoadResult(timings=timings, elapsed=time.perf_counter() - started))
+        finally:
+            self._reset()
+            connection.settings_dict.update(original)
+
+    def _reset(self):
+        connection.close()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+
+    def _configure(self, mode, options):
+        self._reset()
+        options = {key: value for key, value in options.items() if key != 'pool'}
+        if mode == 'pool':
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                self.stderr.write('Режим pool пропущен: не установлен psycopg_pool')
+                return False
+            options['pool'] = connection.settings_dict['OPTIONS'].get('pool') or True
+        connection.settings_dict['CONN_MAX_AGE'] = None if mode == 'persistent' else 0
+        connection.settings_dict['OPTIONS'] = options
+        return True
+
+    def _report(self, mode, result):
+        summary = summarize(result)
+        self.stdout.write(
+            f'{mode:<15}{summary["mean_ms"]:>12.2f}{summary["p50_ms"]:>10.2f}'
+            f'{summary["p95_ms"]:>10.2f}{summary["p99_ms"]:>10.2f}'
+        )
@@ -0,0 +1,90 @@
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework import parsers, renderers
+
+from apps.core import parsers as fast_parsers
+from apps.core import renderers as fast_renderers
+from apps.core.models import Task
+from apps.core.serializers import TaskSerializer
+
+from ._seed import _sentence
+
+
+class Command(BaseCommand):
+    """
+    Микробенчмарк JSON: страницы TaskSerializer кодируются стандартным
+    JSONRenderer DRF и apps.core.renderers.JSONRenderer, а полученные байты
+    разбираются обоими парсерами. Задачи создаются в памяти, БД не нужна.
+    Перед замером проверяется, что оба рендерера дают одинаковые данные
+    """
+
+    help = 'Скорость рендеринга и разбора JSON для страниц задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 1000],
+                            help='Задач на странице')
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Повторов каждого замера (берётся лучшее время)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if fast_renderers.orjson is None:
+            raise CommandError('orjson не установлен: pip install orjson')
+
+        rng = random.Random(options['seed'])
+        user = User(id=1, username='bench')
+        now = timezone.now()
+
+        self.stdout.write(
+            f"{'задач':>7}{'байт':>10}{'сериализатор, мс':>18}"
+            f"{'render json, мс':>17}{'render orjson, мс':>19}"
+            f"{'parse json, мс':>16}{'parse orjson, мс':>18}"
+        )
+        for size in options['sizes']:
+            tasks = [
+                Task(
+                    id=i + 1, user=user,
+                    title=_sentence(rng, rng.randint(2, 5)),
+                    description=_sentence(rng, rng.randint(0, 30)) or None,
+                    status=rng.choice(('pending', 'completed')),
+                    created_at=now - timedelta(seconds=rng.randint(0, 10 ** 7), microseconds=rng.randint(0, 999999)),
+                    updated_at=now,
+                )
+                for i in range(size)
+            ]
+            data = {
+                'count': size, 'next': None, 'previous': None,
+                'results': TaskSerializer(tasks, many=True).data,
+            }
+
+            stock = renderers.JSONRenderer().render(data)
+            fast = fast_renderers.JSONRenderer().render(data)
+            if parsers.JSONParser().parse(io.BytesIO(fast)) != parsers.JSONParser().parse(io.BytesIO(stock)):
+                raise CommandError('Рендереры дали разные данные')
+
+            timings = [
+                self._best(options['repeat'], lambda: TaskSerializer(tasks, many=True).data),
+                self._best(options['repeat'], lambda: renderers.JSONRenderer().render(data)),
+                self._best(options['repeat'], lambda: fast_renderers.JSONRenderer().render(data)),
+                self._best(options['repeat'], lambda: parsers.JSONParser().parse(io.BytesIO(stock))),
+                self._best(options['repeat'], lambda: fast_parsers.JSONParser().parse(io.BytesIO(stock))),
+            ]
+            self.stdout.write(
+                f'{size:>7}{len(stock):>10}{timings[0]:>18.3f}{timings[1]:>17.3f}'
+                f'{timings[2]:>19.3f}{timings[3]:>16.3f}{timings[4]:>18.3f}'
+            )
+
+    @staticmethod
+    def _best(repeat, func):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best * 1000
@@ -0,0 +1,101 @@
+from itertools import product
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.models import Task
+from apps.core.views import TaskListCreateView
+
+from ._seed import seed_tasks, seed_users
+
+
+class Command(BaseCommand):
+    """
+    Заполняет базу большим набором задач и печатает EXPLAIN ANALYZE
+    для каждой комбинации сортировки и фильтра списка задач
+    """
+
+    help = 'Печатает планы запросов TaskListCreateView на большом наборе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1,
+                            help='Количество пользователей для заполнения')
+        parser.add_argument('--tasks', type=int, default=50000,
+                            help='Количество задач на пользователя')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Размер пачки bulk_create')
+        parser.add_argument('--prefix', default='explain',
+                            help='Префикс имён пользователей с тестовыми данными')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Не создавать данные, использовать существующих пользователей')
+        parser.add_argument('--search', default=None,
+                            help='Дополнительно проверить каждую комбинацию с ?search=')
+        parser.add_argument('--flush', action='store_true',
+                            help='Удалить пользователей с тестовыми данными после запуска')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('EXPLAIN ANALYZE поддерживается только для PostgreSQL')
+
+        if options['no_seed']:
+            users = list(User.objects.filter(username__startswith=f"{options['prefix']}_"))
+            if not users:
+                raise CommandError('Нет пользователей с тестовыми данными, запустите без --no-seed')
+        else:
+            self.stdout.write('Заполнение базы...')
+            users = seed_users(options['prefix'], options['users'])
+            seed_tasks(users, options['tasks'], options['batch_size'], stdout=self.stdout)
+
+        user = users[0]
+        self.stdout.write(
+            f'Пользователь {user.username}: {Task.objects.filter(user=user).count()} задач\n'
+        )
+
+        try:
+            for params in self._combinations(options['search']):
+                self._explain(user, params)
+        finally:
+            if options['flush']:
+                User.objects.filter(pk__in=[u.pk for u in users]).delete()
+
+    def _combinations(self, search):
+        """Все значения ordering_fields (по возрастанию и убыванию) × filterset_fields"""
+        view = TaskListCreateView
+        orderings = [None] + [
+            prefix + field for field in view.ordering_fields for prefix in ('', '-')
+        ]
+        filters = [{}]
+        for field in view.filterset_fields:
+            choices = Task._meta.get_field(field).choices or []
+            filters += [{field: value} for value, _ in choices]
+        searches = [None, search] if search else [None]
+
+        for ordering, filter_params, term in product(orderings, filters, searches):
+            params = dict(filter_params)
+            if ordering:
+                params['ordering'] = ordering
+            if term:
+                params['search'] = term
+            yield params
+
+    def _explain(self, user, params):
+        """Строит queryset так же, как это делает view, и печатает его план"""
+        request = APIRequestFactory().get('/api/v1/tasks/', params)
+        force_authenticate(request, user=user)
+
+        view = TaskListCreateView()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+
+        queryset = view.filter_queryset(view.get_queryset())
+        page_size = view.paginator.get_page_size(view.request) if view.paginator else None
+        if page_size:
+            queryset = queryset[:page_size]
+
+        query = '&'.join(f'{key}={value}' for key, value in params.items()) or '(без параметров)'
+        self.stdout.write(self.style.MIGRATE_HEADING(f'GET /api/v1/tasks/?{query}'))
+        self.stdout.write(queryset.explain(analyze=True, buffers=True))
+        self.stdout.write('')
@@ -0,0 +1,108 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.imports import (
+    COPY_MIN_SIZE,
+    FORMATS,
+    ImportFormatError,
+    detect_format,
+    import_tasks,
+    iter_rows
+)
+
+
+class Command(BaseCommand):
+    """
+    Импорт задач пользователя из NDJSON или CSV - то же, что
+    POST /api/v1/tasks/import/, но без ограничений HTTP-запроса. После
+    каждого пакета номер последней сохранённой строки записывается в файл
+    контрольной точки; повторный запуск продолжает с неё. Ошибки строк
+    пишутся в --errors (NDJSON) или в stderr
+    """
+
+    help = 'Импортирует задачи пользователя из файла NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Файл .ndjson/.jsonl/.csv')
+        parser.add_argument('--user', required=True, help='Имя пользователя-владельца задач')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Формат файла (по умолчанию - по расширению)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Сколько задач сохранять в одной транзакции')
+        parser.add_argument('--method', choices=('auto', 'insert', 'copy'), default='auto',
+                            help='Вставка через INSERT (bulk_create) или COPY; auto - COPY для больших файлов')
+        parser.add_argument('--checkpoint',
+                            help='Файл контрольной точки (по умолчанию <file>.checkpoint)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать сначала, не читая контрольную точку')
+        parser.add_argument('--errors', help='Куда дописывать ошибки строк (NDJSON)')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        file_format = options['format'] or detect_format(path)
+        if file_format is None:
+            raise CommandError(f'Не удалось определить формат {path}, укажите --format')
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["user"]} не найден')
+
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        start = 0
+        if not options['restart'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as checkpoint:
+                start = json.load(checkpoint)['row']
+            self.stdout.write(f'Продолжение после строки {start}')
+
+        if options['method'] == 'auto':
+            use_copy = os.path.getsize(path) >= COPY_MIN_SIZE
+        else:
+            use_copy = options['method'] == 'copy'
+
+        errors_file = open(options['errors'], 'a', encoding='utf-8') if options['errors'] else None
+
+        def on_error(row, errors):
+            line = json.dumps({'row': row, 'errors': errors}, ensure_ascii=False)
+            if errors_file is not None:
+                errors_file.write(line + '\n')
+            else:
+                self.stderr.write(line)
+
+        def on_batch(result):
+            self._save_checkpoint(checkpoint_path, result.checkpoint)
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'  строка {result.checkpoint}: создано {result.created}, ошибок {result.failed}'
+                )
+
+        try:
+            with open(path, 'rb') as stream:
+                result = import_tasks(
+                    user, iter_rows(stream, file_format),
+                    batch_size=options['batch_size'], use_copy=use_copy, start=start,
+                    on_error=on_error, on_batch=on_batch,
+                )
+        except ImportFormatError as exc:
+            raise CommandError(
+                f'Строка {exc.row}: {exc}. Сохранено до строки {exc.result.checkpoint}, '
+                f'после исправления файла импорт продолжится с неё'
+            )
+        finally:
+            if errors_file is not None:
+                errors_file.close()
+
+        os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано задач: {result.created}, строк с ошибками: {result.failed}'
+        ))
+
+    @staticmethod
+    def _save_checkpoint(path, row):
+        """Запись через временный файл: прерывание не оставит битую контрольную точку"""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as checkpoint:
+            json.dump({'row': row}, checkpoint)
+        os.replace(tmp_path, path)
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    """
+    Удаляет надгробия старше срока хранения короткими пакетами, чтобы
+    не держать долгие блокировки. Клиенты с курсором старше этого срока
+    получают 410 и выполняют полную синхронизацию
+    """
+
+    help = 'Удаляет устаревшие надгробия удалённых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.TASK_TOMBSTONE_RETENTION.days,
+                            help='Срок хранения надгробий в днях')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Сколько надгробий удалять за один запрос')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Пауза между пакетами в секундах')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stale = TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+
+        deleted = 0
+        while True:
+            ids = list(stale.order_by('deleted_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += TaskTombstone.objects.filter(id__in=ids).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено надгробий: {deleted}'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Task, TaskCounters
+
+
+class Command(BaseCommand):
+    """
+    Сверяет TaskCounters с таблицей задач и исправляет расхождения.
+    Снимок считается одним GROUP BY без блокировок; пользователи с
+    расхождением пересчитываются повторно под блокировкой строки
+    счётчиков, чтобы не затереть параллельные изменения
+    """
+
+    help = 'Пересчитывает счётчики задач пользователей и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать расхождения, ничего не исправлять')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько пользователей пересчитывать в одной транзакции')
+
+    def handle(self, *args, **options):
+        actual = {
+            row['user_id']: (row['total'], row['completed'])
+            for row in Task.objects.all().counts_by_user().iterator()
+        }
+        stored = {
+            user_id: (total, completed)
+            for user_id, total, completed in
+            TaskCounters.objects.values_list('user_id', 'total', 'completed').iterator()
+        }
+
+        drifted = sorted(
+            user_id for user_id in actual.keys() | stored.keys()
+            if actual.get(user_id, (0, 0)) != stored.get(user_id)
+            # Пустые счётчики без задач - не расхождение
+            and not (user_id not in actual and stored.get(user_id) == (0, 0))
+        )
+
+        for user_id in drifted:
+            self.stdout.write(
+                f'Пользователь {user_id}: сохранено {stored.get(user_id)}, '
+                f'фактически {actual.get(user_id, (0, 0))} (всего, выполнено)'
+            )
+
+        if not options['dry_run']:
+            batch_size = options['batch_size']
+            for start in range(0, len(drifted), batch_size):
+                TaskCounters.objects.rebuild(drifted[start:start + batch_size])
+
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} расхождений: {len(drifted)} из {len(actual.keys() | stored.keys())}'
+        ))
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from apps.core.models import Task
+
+from ._seed import seed_tasks, seed_users
+
+
+class Command(BaseCommand):
+    """
+    Готовит данные для benchmark_api: --users пользователей <prefix>_N с
+    паролем --password и по --tasks задач у каждого (bulk_create). Повторный
+    запуск только добавляет недостающее; --flush пересоздаёт данные с нуля,
+    и при одинаковом --seed набор задач получается тем же
+    """
+
+    help = 'Создаёт пользователей и задачи для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tasks', type=int, default=1000, help='Задач у каждого пользователя')
+        parser.add_argument('--prefix', default='bench_api', help='Префикс имён пользователей')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--seed', type=int, default=0, help='Зерно генератора текстов и дат')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true',
+                            help='Удалить пользователей с этим префиксом и создать заново')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['flush']:
+            deleted = User.objects.filter(username__startswith=f'{prefix}_').delete()[1].get('auth.User', 0)
+            self.stdout.write(f'Удалено пользователей: {deleted}')
+
+        users = seed_users(prefix, options['users'], password=options['password'])
+        counts = dict(
+            Task.objects.filter(user__in=users).order_by().values('user_id')
+            .annotate(total=Count('id')).values_list('user_id', 'total')
+        )
+        missing = {}
+        for user in users:
+            missing.setdefault(options['tasks'] - counts.get(user.pk, 0), []).append(user)
+
+        for count, group in sorted(missing.items()):
+            if count > 0:
+                seed_tasks(group, count, options['batch_size'], seed=options['seed'], stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {len(users)}, задач: {Task.objects.filter(user__in=users).count()}'
+        ))
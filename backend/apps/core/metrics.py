@@ -0,0 +1,234 @@
+"""
+Метрики запросов: время запроса, время и число SQL-запросов, время
+сериализации и размер ответа по имени маршрута. Значения копятся в
+гистограммах процесса и отдаются в текстовом формате Prometheus
+(MetricsMiddleware, metrics_view). Каждый процесс сервера считает свои
+метрики, поэтому Prometheus должен опрашивать процессы по отдельности
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+# Границы корзин: секунды, число запросов к БД, байты
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Показатели текущего запроса; None вне MetricsMiddleware
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    """Накопленные за запрос время БД, число запросов и время сериализации"""
+
+    __slots__ = ('db_time', 'queries', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.serializer_time = 0.0
+        # Вложенный serializer.data уже учтён во внешнем
+        self.serializing = False
+
+
+@contextmanager
+def collect():
+    """Показатели запросов к БД и сериализации внутри блока копятся в RequestStats"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками; observe потокобезопасен"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in sorted(values):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                bucket_labels = ','.join([*pairs, f'le="{bound}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{",".join(pairs)}}}' if pairs else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Счётчик Prometheus с метками; inc потокобезопасен"""
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} counter',
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, count in values:
+            pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            lines.append(f'{self.name}{{{pairs}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса',
+    ('view', 'method', 'status'), DURATION_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Время SQL-запросов за запрос',
+    ('view',), DURATION_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Число SQL-запросов за запрос',
+    ('view',), QUERY_BUCKETS,
+)
+SERIALIZER_DURATION = Histogram(
+    'http_request_serializer_duration_seconds', 'Время получения serializer.data за запрос',
+    ('view',), DURATION_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Размер ответа (кроме потоковых)',
+    ('view',), SIZE_BUCKETS,
+)
+# Обращения к кэшу ответов (apps/core/cache.py) по результату: local_hit,
+# shared_hit, coalesced (дождались чужого вычисления) и miss. Считаются и при
+# выключенном METRICS_ENABLED
+CACHE_REQUESTS = Counter(
+    'api_cache_requests_total', 'Обращения к кэшам ответов API',
+    ('cache', 'result'),
+)
+REGISTRY = (
+    REQUEST_DURATION, DB_DURATION, DB_QUERIES, SERIALIZER_DURATION, RESPONSE_SIZE, CACHE_REQUESTS,
+)
+
+
+def observe(view, method, status_code, duration, stats, size):
+    REQUEST_DURATION.observe(duration, view, method, f'{status_code // 100}xx')
+    DB_DURATION.observe(stats.db_time, view)
+    DB_QUERIES.observe(stats.queries, view)
+    SERIALIZER_DURATION.observe(stats.serializer_time, view)
+    if size is not None:
+        RESPONSE_SIZE.observe(size, view)
+
+
+def expose():
+    """Все метрики в текстовом формате Prometheus"""
+    return '\n'.join(line for histogram in REGISTRY for line in histogram.expose()) + '\n'
+
+
+def _record_query(execute, sql, params, many, context):
+    """execute_wrapper соединений: время и число запросов текущего запроса"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+
+
+def _add_query_wrapper(connection, **kwargs):
+    # В начало списка: connection.execute_wrapper() снимает последнюю обёртку,
+    # а соединение может открыться внутри такого блока
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+_original_data = serializers.BaseSerializer.data
+
+
+def _timed_data(self):
+    stats = _current.get()
+    if stats is None or stats.serializing:
+        return _original_data.fget(self)
+    stats.serializing = True
+    started = time.perf_counter()
+    try:
+        return _original_data.fget(self)
+    finally:
+        stats.serializer_time += time.perf_counter() - started
+        stats.serializing = False
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """
+    Подключает сбор показателей: обёртку execute всех соединений с БД
+    (включая открытые позже и в других потоках) и замер serializer.data.
+    Вне запроса обёртки только проверяют contextvar
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_add_query_wrapper, dispatch_uid='apps.core.metrics')
+        for connection in connections.all(initialized_only=True):
+            _add_query_wrapper(connection)
+        # Serializer.data и ListSerializer.data вызывают BaseSerializer.data
+        serializers.BaseSerializer.data = property(_timed_data)
+        _installed = True
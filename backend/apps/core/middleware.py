@@ -0,0 +1,245 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.exceptions import APIException
+
+from apps.users.authentication import StatelessJWTAuthentication
+
+from . import metrics, profiling
+from .routers import replica_reads
+
+# Cookie, закрепляющая клиента за основной БД после записи
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Методы, которые попадают в метку method; остальные считаются как OTHER
+METRICS_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Безопасные запросы читают с реплик, если клиент не записывал данные
+    последние DATABASE_REPLICA_LAG секунд: пользователь видит собственные
+    изменения, пока реплики их догоняют. Успешный небезопасный запрос
+    закрепляет за основной БД пользователя из access-токена (ключ pin:<id>
+    в общем кэше - SPA на другом домене cookie не хранит), а запасным
+    вариантом для входа по сессии (админка) - cookie PIN_COOKIE
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.pin_key(request)
+        if self.may_use_replica(request) and (key is None or cache.get(key) is None):
+            with replica_reads():
+                return self.get_response(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            if key is not None:
+                cache.set(key, 1, self.lag())
+            self.set_pin_cookie(response)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = self.pin_key(request)
+        if self.may_use_replica(request) and (key is None or await cache.aget(key) is None):
+            with replica_reads():
+                return await self.get_response(request)
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            if key is not None:
+                await cache.aset(key, 1, self.lag())
+            self.set_pin_cookie(response)
+        return response
+
+    def pin_key(self, request):
+        """
+        Ключ закрепления пользователя из access-токена (без обращения к БД:
+        проверенные токены кэшируются) или None для запросов без токена
+        """
+        authentication = StatelessJWTAuthentication()
+        header = authentication.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            user_id = authentication.get_user_id(authentication.get_validated_token(raw_token))
+        except APIException:
+            return None
+        return f'pin:{user_id}'
+
+    def lag(self):
+        return int(settings.DATABASE_REPLICA_LAG.total_seconds())
+
+    def may_use_replica(self, request):
+        return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+    def is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def set_pin_cookie(self, response):
+        response.set_cookie(PIN_COOKIE, '1', max_age=self.lag(), httponly=True, samesite='Lax')
+
+
+class MetricsMiddleware:
+    """
+    Метрики запроса по имени маршрута (apps/core/metrics.py): время, время
+    и число SQL-запросов, время сериализации, размер ответа. Те же значения
+    отдаются клиенту в заголовке Server-Timing (METRICS_SERVER_TIMING).
+    Включается METRICS_ENABLED; стоит первым, чтобы учитывать остальные
+    middleware. У потоковых ответов время - до начала передачи
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        metrics.install()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with metrics.collect() as stats:
+            response = self.get_response(request)
+        return self.process_response(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.collect() as stats:
+            response = await self.get_response(request)
+        return self.process_response(request, response, stats, time.perf_counter() - started)
+
+    def process_response(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        method = request.method if request.method in METRICS_METHODS else 'OTHER'
+        size = None if response.streaming else len(response.content)
+        metrics.observe(view, method, response.status_code, duration, stats, size)
+
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'app;dur={duration * 1000:.1f}, '
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                f'serializer;dur={stats.serializer_time * 1000:.1f}'
+            )
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Профилирование запросов (apps/core/profiling.py): cProfile и все
+    SQL-запросы с EXPLAIN медленных сохраняются в RequestProfile, ID отчёта
+    отдаётся в заголовке X-Profile-Id. Профилируются запросы сотрудников
+    (is_staff) с заголовком PROFILER_HEADER и доля PROFILER_SAMPLE_RATE
+    остальных. Запросы дольше PROFILER_SLOW_REQUEST_MS сохраняются без
+    cProfile: их SQL записывается всегда, пока порог задан.
+    Включается PROFILER_ENABLED; стоит после AuthenticationMiddleware.
+    Под ASGI cProfile видит весь поток event loop, поэтому в профиль
+    попадают и параллельные запросы
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        profiling.install()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        trigger = 'header' if self.requested(request) and self.is_staff(request) else self.sample()
+        if trigger is None and not settings.PROFILER_SLOW_REQUEST_MS:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with profiling.capture() as current, profiling.profile(trigger is not None) as profiler:
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        trigger = self.get_trigger(trigger, duration)
+        if trigger is None:
+            return response
+        request_id = profiling.new_request_id()
+        profiling.save_report(request_id, trigger, request, response, duration, current, profiler)
+        return self.process_response(response, request_id)
+
+    async def __acall__(self, request):
+        staff = self.requested(request) and await sync_to_async(self.is_staff)(request)
+        trigger = 'header' if staff else self.sample()
+        if trigger is None and not settings.PROFILER_SLOW_REQUEST_MS:
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        with profiling.capture() as current, profiling.profile(trigger is not None) as profiler:
+            response = await self.get_response(request)
+        duration = time.perf_counter() - started
+
+        trigger = self.get_trigger(trigger, duration)
+        if trigger is None:
+            return response
+        request_id = profiling.new_request_id()
+        await sync_to_async(profiling.save_report)(
+            request_id, trigger, request, response, duration, current, profiler,
+        )
+        return self.process_response(response, request_id)
+
+    def requested(self, request):
+        return settings.PROFILER_HEADER in request.headers
+
+    def is_staff(self, request):
+        """Сотрудник по сессии (админка) или по access-токену API"""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            result = StatelessJWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return result is not None and User.objects.filter(pk=result[0].pk, is_staff=True).exists()
+
+    def sample(self):
+        rate = settings.PROFILER_SAMPLE_RATE
+        return 'sample' if rate and random.random() < rate else None
+
+    def get_trigger(self, trigger, duration):
+        if trigger is None and duration * 1000 >= settings.PROFILER_SLOW_REQUEST_MS:
+            return 'slow'
+        return trigger
+
+    def process_response(self, response, request_id):
+        response['X-Profile-Id'] = request_id
+        return response
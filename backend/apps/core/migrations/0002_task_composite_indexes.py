@@ -0,0 +1,38 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Составные индексы для списка задач пользователя.
+    CREATE INDEX CONCURRENTLY не блокирует запись в таблицу, но не может
+    выполняться внутри транзакции, поэтому миграция неатомарная.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "-created_at"], name="core_task_user_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "status", "-created_at"],
+                name="core_task_user_status_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "title"], name="core_task_user_title_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Триграммный индекс для поиска с опечатками создаётся, только если
+    расширение pg_trgm доступно на сервере; без него поиск работает
+    только по tsvector (см. TaskSearchFilter)
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS core_task_title_trgm_idx "
+            "ON core_task USING gin (title gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS core_task_title_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    """
+    Полнотекстовый поиск: сгенерированный столбец tsvector (заголовок с
+    весом A, описание с весом B) и GIN-индекс по нему.
+    Индексы создаются CONCURRENTLY, поэтому миграция неатомарная.
+
+    Добавление хранимого сгенерированного столбца (AddField) переписывает
+    всю таблицу core_task под блокировкой ACCESS EXCLUSIVE: пока оно идёт,
+    чтение и запись задач ждут, время растёт с размером таблицы. На большой
+    таблице миграцию применяют отдельно от выкладки кода, в окно
+    обслуживания, с ограничением ожидания блокировки, чтобы не встать в
+    очередь за долгой транзакцией и не заблокировать запросы за собой:
+
+        PGOPTIONS="-c lock_timeout=5s" python manage.py migrate core 0003
+
+    и повторяют при ошибке lock timeout. Оценить время переписывания можно
+    по pg_total_relation_size('core_task') на копии базы. Индексы затем
+    строятся CONCURRENTLY без блокировки записи.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("core", "0002_task_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "title", config="simple", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="simple", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("simple"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+                verbose_name="Поисковый вектор",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="core_task_search_idx"
+            ),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    """Начальные значения счётчиков одним GROUP BY по таблице задач"""
+    Task = apps.get_model("core", "Task")
+    TaskCounters = apps.get_model("core", "TaskCounters")
+    rows = (
+        Task.objects.order_by()
+        .values("user_id")
+        .annotate(total=Count("id"), completed=Count("id", filter=Q(status="completed")))
+    )
+    TaskCounters.objects.bulk_create(
+        [
+            TaskCounters(
+                user_id=row["user_id"], total=row["total"], completed=row["completed"]
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0003_task_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskCounters",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="task_counters",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(default=0, verbose_name="Всего задач"),
+                ),
+                (
+                    "completed",
+                    models.PositiveIntegerField(default=0, verbose_name="Выполнено"),
+                ),
+            ],
+            options={
+                "verbose_name": "Счётчики задач",
+                "verbose_name_plural": "Счётчики задач",
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_task_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taskcounters",
+            name="changed_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Дата изменения задач"
+            ),
+        ),
+        migrations.AddField(
+            model_name="taskcounters",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0, verbose_name="Версия данных"),
+        ),
+    ]
@@ -0,0 +1,71 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Дельта-синхронизация: надгробия удалённых задач и индекс по
+    (user, updated_at, id). Индекс по задачам создаётся CONCURRENTLY,
+    поэтому миграция неатомарная.
+    """
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0005_task_counters_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField(verbose_name="ID задачи")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Дата удаления",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_tombstones",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удалённая задача",
+                "verbose_name_plural": "Удалённые задачи",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "deleted_at", "id"],
+                        name="core_tombstone_user_idx",
+                    )
+                ],
+            },
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="core_task_user_updated_idx"
+            ),
+        ),
+    ]
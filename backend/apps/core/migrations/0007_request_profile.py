@@ -0,0 +1,40 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_task_sync"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("request_id", models.CharField(max_length=32, unique=True, verbose_name="ID запроса")),
+                ("created_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name="Дата")),
+                ("trigger", models.CharField(choices=[("header", "Заголовок"), ("sample", "Выборка"), ("slow", "Медленный запрос")], max_length=10, verbose_name="Причина")),
+                ("method", models.CharField(max_length=10, verbose_name="Метод")),
+                ("path", models.TextField(verbose_name="Путь")),
+                ("view_name", models.CharField(blank=True, max_length=200, verbose_name="Маршрут")),
+                ("status_code", models.PositiveSmallIntegerField(verbose_name="Код ответа")),
+                ("duration_ms", models.FloatField(verbose_name="Время, мс")),
+                ("query_count", models.PositiveIntegerField(default=0, verbose_name="SQL-запросов")),
+                ("db_time_ms", models.FloatField(default=0, verbose_name="Время БД, мс")),
+                ("queries", models.JSONField(default=list, verbose_name="SQL-запросы")),
+                ("profile", models.TextField(blank=True, verbose_name="Профиль")),
+                ("stats", models.BinaryField(blank=True, null=True, verbose_name="Данные cProfile")),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="request_profiles", to=settings.AUTH_USER_MODEL, verbose_name="Пользователь")),
+            ],
+            options={
+                "verbose_name": "Профиль запроса",
+                "verbose_name_plural": "Профили запросов",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
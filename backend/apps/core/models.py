@@ -1,5 +1,232 @@
-from django.db import models
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import connections, models, router, transaction
+from django.db.models import Count, F, Q
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.utils import timezone
+
+from .cache import user_cache
+
+# Конфигурация полнотекстового поиска: задачи пишут и на русском, и на
+# английском, поэтому используется словарь без стемминга
+SEARCH_CONFIG = 'simple'
+
+# Внутри TaskQuerySet.bulk_update: Django вызывает update() по частям, а
+# счётчики и версию bulk_update обновляет сам
+_in_bulk_update = ContextVar('task_bulk_update', default=False)
+
+
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet задач, который при массовых изменениях поддерживает счётчики
+    пользователей и записывает надгробия удалённых задач
+    """
+
+    def counts_by_user(self):
+        """Количество задач и выполненных задач по пользователям одним GROUP BY"""
+        return self.order_by().values('user_id').annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+        )
+
+    def delete(self):
+        """
+        Удаление одним DELETE ... RETURNING: по возвращённым строкам в той же
+        транзакции обновляются счётчики и записываются надгробия для синхронизации.
+        На задачи не ссылаются другие модели, поэтому каскад Django не нужен
+        """
+        if self.query.is_sliced:
+            raise TypeError("Cannot use 'limit' or 'offset' with delete().")
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        meta = self.model._meta
+        subquery, params = self.order_by().values('pk').query.sql_with_params()
+        sql = (
+            f'DELETE FROM {qn(meta.db_table)} '
+            f'WHERE {qn(meta.pk.column)} IN ({subquery}) '
+            f'RETURNING {qn(meta.pk.column)}, {qn("user_id")}, {qn("status")}'
+        )
+        with transaction.atomic(using=self.db), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+            deltas = {}
+            for _, user_id, task_status in rows:
+                total, completed = deltas.get(user_id, (0, 0))
+                deltas[user_id] = (total - 1, completed - int(task_status == 'completed'))
+            for user_id, (total, completed) in deltas.items():
+                TaskCounters.objects.apply_delta(user_id, total=total, completed=completed)
+
+            now = timezone.now()
+            TaskTombstone.objects.using(self.db).bulk_create([
+                TaskTombstone(task_id=task_id, user_id=user_id, deleted_at=now)
+                for task_id, user_id, _ in rows
+            ])
+        return len(rows), {meta.label: len(rows)} if rows else {}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def update(self, **kwargs):
+        """
+        update() с updated_at и обновлением данных пользователей в той же
+        транзакции: смена статуса или владельца пересчитывает счётчики
+        затронутых пользователей, любое другое изменение увеличивает версию
+        их данных (ETag списков и статистики, кэш)
+        """
+        if _in_bulk_update.get():
+            return super().update(**kwargs)
+        kwargs.setdefault('updated_at', timezone.now())
+        owner_changed = bool({'user', 'user_id'} & kwargs.keys())
+        with transaction.atomic(using=self.db):
+            if owner_changed:
+                # Новых владельцев узнаём после UPDATE по первичным ключам
+                pks = list(self.order_by().values_list('pk', flat=True))
+            user_ids = set(self.order_by().values_list('user_id', flat=True).distinct())
+            updated = super().update(**kwargs)
+            if updated:
+                if owner_changed:
+                    user_ids |= set(
+                        Task.objects.using(self.db).filter(pk__in=pks)
+                        .order_by().values_list('user_id', flat=True).distinct()
+                    )
+                if owner_changed or 'status' in kwargs:
+                    TaskCounters.objects.rebuild(user_ids)
+                else:
+                    for user_id in user_ids:
+                        TaskCounters.objects.apply_delta(user_id)
+        return updated
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create с обновлением счётчиков пользователей в той же транзакции"""
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Неизвестно, какие строки вставлены на самом деле
+                TaskCounters.objects.rebuild({obj.user_id for obj in created})
+            else:
+                deltas = {}
+                for obj in created:
+                    total, completed = deltas.get(obj.user_id, (0, 0))
+                    deltas[obj.user_id] = (total + 1, completed + int(obj.is_completed))
+                for user_id, (total, completed) in deltas.items():
+                    TaskCounters.objects.apply_delta(user_id, total=total, completed=completed)
+        for obj in created:
+            obj._loaded_counters_state = obj._counters_state()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """bulk_update с обновлением версии и счётчиков, если меняется статус или владелец"""
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            token = _in_bulk_update.set(True)
+            try:
+                updated = super().bulk_update(objs, fields, *args, **kwargs)
+            finally:
+                _in_bulk_update.reset(token)
+            deltas = dict.fromkeys({obj.user_id for obj in objs}, 0)
+            rebuild = set()
+            if {'status', 'user', 'user_id'} & set(fields):
+                for obj in objs:
+                    previous = getattr(obj, '_loaded_counters_state', None)
+                    current = obj._counters_state()
+                    if previous == current:
+                        continue
+                    if previous is None or previous[0] != current[0]:
+                        rebuild |= {obj.user_id} | ({previous[0]} if previous else set())
+                    else:
+                        deltas[obj.user_id] = deltas.get(obj.user_id, 0) + (1 if obj.is_completed else -1)
+            for user_id, completed in deltas.items():
+                if user_id not in rebuild:
+                    TaskCounters.objects.apply_delta(user_id, completed=completed)
+            if rebuild:
+                TaskCounters.objects.rebuild(rebuild)
+        for obj in objs:
+            obj._loaded_counters_state = obj._counters_state()
+        return updated
+
+    def _update_returning_sql(self, assignments, params, returning, condition='', condition_params=()):
+        """
+        UPDATE строк текущей выборки одним запросом с RETURNING.
+        assignments - SQL после SET, updated_at выставляется всегда;
+        condition - дополнительное условие WHERE самого UPDATE
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        meta = self.model._meta
+        subquery, subquery_params = self.order_by().values('pk').query.sql_with_params()
+        sql = (
+            f'UPDATE {qn(meta.db_table)} '
+            f'SET {assignments}, {qn("updated_at")} = %s '
+            f'WHERE {qn(meta.pk.column)} IN ({subquery}){condition} '
+            f'RETURNING {returning}'
+        )
+        return sql, (*params, timezone.now(), *subquery_params, *condition_params)
+
+    def _apply_status_deltas(self, rows):
+        """Обновляет счётчики и версию по парам (user_id, новый статус) изменённых задач"""
+        deltas = {}
+        for user_id, new_status in rows:
+            deltas[user_id] = deltas.get(user_id, 0) + (1 if new_status == 'completed' else -1)
+        for user_id, completed in deltas.items():
+            TaskCounters.objects.apply_delta(user_id, completed=completed)
+
+    def toggle_status(self):
+        """
+        Переключает статус выбранных задач одним UPDATE ... RETURNING:
+        без предварительного SELECT и без перезаписи остальных столбцов.
+        Параллельные переключения одной задачи выполняются по очереди
+        под блокировкой строки, и каждое видит результат предыдущего.
+        Возвращает список обновлённых задач
+        """
+        qn = connections[self.db].ops.quote_name
+        columns = ', '.join(
+            qn(field.column) for field in self.model._meta.concrete_fields if not field.generated
+        )
+        sql, params = self._update_returning_sql(
+            f'{qn("status")} = CASE WHEN {qn("status")} = %s THEN %s ELSE %s END',
+            ('completed', 'pending', 'completed'),
+            columns,
+        )
+        with transaction.atomic(using=self.db):
+            tasks = list(self.model._default_manager.db_manager(self.db).raw(sql, params))
+            self._apply_status_deltas((task.user_id, task.status) for task in tasks)
+        return tasks
+
+    toggle_status.alters_data = True
+    toggle_status.queryset_only = True
+
+    def set_status(self, new_status):
+        """
+        Устанавливает статус выбранным задачам одним UPDATE; строки, у
+        которых статус уже такой, не трогаются. Возвращает число изменённых задач
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        sql, params = self._update_returning_sql(
+            f'{qn("status")} = %s', (new_status,), qn('user_id'),
+            condition=f' AND {qn("status")} <> %s', condition_params=(new_status,),
+        )
+        with transaction.atomic(using=self.db), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            self._apply_status_deltas((user_id, new_status) for user_id, in rows)
+        return len(rows)
+
+    set_status.alters_data = True
+    set_status.queryset_only = True
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """Менеджер задач: поисковый вектор нужен только в WHERE и по умолчанию не загружается"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
 
 
 class Task(models.Model):
@@ -34,6 +261,15 @@ class Task(models.Model):
         auto_now=True, 
         verbose_name="Дата обновления"
     )
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор"
+    )
     user = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -41,15 +277,333 @@ class Task(models.Model):
         verbose_name="Пользователь"
     )
 
+    objects = TaskManager()
+
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
         ordering = ['-created_at']
+        indexes = [
+            # Дельта-синхронизация: изменения после курсора (updated_at, id)
+            models.Index(fields=['user', 'updated_at', 'id'], name='core_task_user_updated_idx'),
+            # Список задач пользователя в порядке по умолчанию
+            models.Index(fields=['user', '-created_at'], name='core_task_user_created_idx'),
+            # Фильтр по статусу (и статистика) с тем же порядком
+            models.Index(fields=['user', 'status', '-created_at'], name='core_task_user_status_idx'),
+            # Сортировка по заголовку
+            models.Index(fields=['user', 'title'], name='core_task_user_title_idx'),
+            # Полнотекстовый поиск по заголовку и описанию
+            GinIndex(fields=['search_vector'], name='core_task_search_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_counters_state = instance._counters_state()
+        return instance
+
+    def _counters_state(self):
+        """(пользователь, статус) в том виде, в каком они загружены; None если отложены"""
+        if 'status' not in self.__dict__ or 'user_id' not in self.__dict__:
+            return None
+        return self.user_id, self.status
+
+    def save(self, *args, **kwargs):
+        """Сохранение задачи с обновлением счётчиков пользователя в той же транзакции"""
+        adding = self._state.adding
+        previous = getattr(self, '_loaded_counters_state', None)
+        update_fields = kwargs.get('update_fields')
+        status_saved = update_fields is None or {'status', 'user', 'user_id'} & set(update_fields)
+
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            current = self._counters_state()
+            if adding:
+                TaskCounters.objects.apply_delta(
+                    self.user_id, total=1, completed=int(self.is_completed)
+                )
+            elif not status_saved or current is None or previous == current:
+                # Счётчики не меняются, но версия данных пользователя - да
+                TaskCounters.objects.apply_delta(self.user_id)
+            elif previous is None or previous[0] != current[0]:
+                # Прежнее состояние неизвестно или задача сменила владельца
+                user_ids = {self.user_id} | ({previous[0]} if previous else set())
+                TaskCounters.objects.rebuild(user_ids)
+            else:
+                TaskCounters.objects.apply_delta(
+                    self.user_id, completed=1 if self.is_completed else -1
+                )
+        self._loaded_counters_state = self._counters_state()
+
+    def delete(self, using=None, keep_parents=False):
+        """Удаление задачи через TaskQuerySet.delete: счётчики и надгробие в той же транзакции"""
+        if self.pk is None:
+            raise ValueError(
+                f"{self._meta.object_name} object can't be deleted because its "
+                f"{self._meta.pk.attname} attribute is set to None."
+            )
+        using = using or router.db_for_write(Task, instance=self)
+        result = Task.objects.db_manager(using).filter(pk=self.pk).delete()
+        self.pk = None
+        return result
+
     @property
     def is_completed(self):
         """Проверка, выполнена ли задача"""
         return self.status == 'completed'
+
+
+class TaskCountersManager(models.Manager):
+    """Инкрементальное обновление и пересчёт счётчиков задач"""
+
+    def apply_delta(self, user_id, total=0, completed=0):
+        """
+        Атомарно прибавляет разницу к счётчикам пользователя и увеличивает
+        версию его данных одним UPDATE. Вызывается при любом изменении задач,
+        даже если разница нулевая, и заодно сбрасывает кэш пользователя
+        (apps/core/cache.py). Если строки счётчиков ещё нет, она
+        пересчитывается из таблицы задач
+        """
+        updated = self.filter(user_id=user_id).update(
+            total=F('total') + total,
+            completed=F('completed') + completed,
+            version=F('version') + 1,
+            changed_at=timezone.now(),
+        )
+        if not updated:
+            self.rebuild([user_id])
+        else:
+            user_cache.invalidate([user_id], using=router.db_for_write(self.model))
+
+    def rebuild(self, user_ids):
+        """
+        Пересчитывает счётчики пользователей одним GROUP BY.
+        Строки счётчиков блокируются до подсчёта, поэтому параллельные
+        изменения задач дождутся записи и применят свою разницу поверх.
+        Строки ещё нет при первом изменении задач пользователя, поэтому
+        сначала блокируется строка auth_user (FOR NO KEY UPDATE не мешает
+        вставке задач): параллельный пересчёт ждёт фиксации этой транзакции и
+        считает уже вместе с её задачами, а не перезаписывает её результат.
+        Всё выполняется на БД для записи, даже если пересчёт начался с
+        чтения (for_user внутри replica_reads()): реплика доступна только
+        для чтения и может отставать
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        alias = router.db_for_write(self.model)
+        manager = self.db_manager(alias)
+        with transaction.atomic(using=alias):
+            list(
+                User.objects.using(alias).select_for_update(no_key=True)
+                .filter(pk__in=user_ids).order_by('pk').values_list('pk')
+            )
+            list(manager.select_for_update().filter(user_id__in=user_ids).values_list('pk'))
+            counts = {
+                row['user_id']: row
+                for row in Task.objects.using(alias).filter(user_id__in=user_ids).counts_by_user()
+            }
+            manager.bulk_create(
+                [
+                    TaskCounters(
+                        user_id=user_id,
+                        total=counts.get(user_id, {}).get('total', 0),
+                        completed=counts.get(user_id, {}).get('completed', 0),
+                    )
+                    for user_id in user_ids
+                ],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['total', 'completed'],
+            )
+            manager.filter(user_id__in=user_ids).update(
+                version=F('version') + 1,
+                changed_at=timezone.now(),
+            )
+            user_cache.invalidate(user_ids, using=alias)
+
+    def for_user(self, user):
+        """
+        Счётчики пользователя одним запросом по первичному ключу. Только что
+        пересчитанная строка читается с БД для записи: на реплике её ещё нет
+        """
+        counters = self.filter(user=user).first()
+        if counters is None:
+            self.rebuild([user.pk])
+            counters = self.db_manager(router.db_for_write(self.model)).get(user=user)
+        return counters
+
+    async def afor_user(self, user):
+        """for_user для асинхронных представлений"""
+        counters = await self.filter(user=user).afirst()
+        if counters is None:
+            # rebuild блокирует строки в транзакции, асинхронный ORM так не умеет
+            await sync_to_async(self.rebuild)([user.pk])
+            counters = await self.db_manager(router.db_for_write(self.model)).aget(user=user)
+        return counters
+
+
+class TaskCounters(models.Model):
+    """
+    Счётчики задач пользователя, которые поддерживаются при каждом
+    создании, удалении и смене статуса задачи. Статистика читается
+    одной строкой вместо нескольких COUNT по таблице задач.
+    version и changed_at меняются при любом изменении задач пользователя
+    и служат валидаторами для условных запросов (ETag/Last-Modified)
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counters',
+        verbose_name="Пользователь"
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Всего задач"
+    )
+    completed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Выполнено"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Версия данных"
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Дата изменения задач"
+    )
+
+    objects = TaskCountersManager()
+
+    class Meta:
+        verbose_name = "Счётчики задач"
+        verbose_name_plural = "Счётчики задач"
+
+    def __str__(self):
+        return f"{self.user}: {self.completed}/{self.total}"
+
+    @property
+    def pending(self):
+        """Количество невыполненных задач"""
+        return self.total - self.completed
+
+
+class TaskTombstone(models.Model):
+    """
+    Надгробие удалённой задачи: по нему клиенты дельта-синхронизации
+    узнают об удалении. Старые записи удаляет команда prune_task_tombstones
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_tombstones',
+        verbose_name="Пользователь"
+    )
+    task_id = models.BigIntegerField(
+        verbose_name="ID задачи"
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name="Дата удаления"
+    )
+
+    class Meta:
+        verbose_name = "Удалённая задача"
+        verbose_name_plural = "Удалённые задачи"
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='core_tombstone_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"Задача {self.task_id} удалена {self.deleted_at}"
+
+
+class RequestProfile(models.Model):
+    """
+    Отчёт профилировщика запроса (ProfilerMiddleware): SQL-запросы с
+    EXPLAIN медленных, сводка cProfile и сами данные cProfile для
+    скачивания. Хранятся последние PROFILER_MAX_REPORTS отчётов
+    """
+    TRIGGER_CHOICES = [
+        ('header', 'Заголовок'),
+        ('sample', 'Выборка'),
+        ('slow', 'Медленный запрос'),
+    ]
+
+    request_id = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name="ID запроса"
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name="Дата"
+    )
+    trigger = models.CharField(
+        max_length=10,
+        choices=TRIGGER_CHOICES,
+        verbose_name="Причина"
+    )
+    method = models.CharField(
+        max_length=10,
+        verbose_name="Метод"
+    )
+    path = models.TextField(
+        verbose_name="Путь"
+    )
+    view_name = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Маршрут"
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='request_profiles',
+        verbose_name="Пользователь"
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name="Код ответа"
+    )
+    duration_ms = models.FloatField(
+        verbose_name="Время, мс"
+    )
+    query_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="SQL-запросов"
+    )
+    db_time_ms = models.FloatField(
+        default=0,
+        verbose_name="Время БД, мс"
+    )
+    queries = models.JSONField(
+        default=list,
+        verbose_name="SQL-запросы"
+    )
+    profile = models.TextField(
+        blank=True,
+        verbose_name="Профиль"
+    )
+    stats = models.BinaryField(
+        null=True,
+        blank=True,
+        verbose_name="Данные cProfile"
+    )
+
+    class Meta:
+        verbose_name = "Профиль запроса"
+        verbose_name_plural = "Профили запросов"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.request_id})"
@@ -0,0 +1,243 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_filter(keys, position):
+    """
+    Условие «строго после позиции» для сортировки keys:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... с учётом направления
+    каждого ключа; отдельное условие k1 >= v1 даёт планировщику
+    границу диапазона для индекса
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, position):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    first = keys[0].lstrip('-')
+    bound = 'lte' if keys[0].startswith('-') else 'gte'
+    return Q(**{f'{first}__{bound}': position[0]}) & condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация: следующая страница выбирается условием
+    «после последней строки предыдущей», а не OFFSET, и без COUNT(*).
+    Ключ - поля текущей сортировки queryset, дополненные (created_at, id),
+    поэтому порядок строк однозначен для любого значения ?ordering=.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._paginate(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset для асинхронных представлений"""
+        return self._paginate([row async for row in self._page_queryset(queryset, request)])
+
+    def _page_queryset(self, queryset, request):
+        self.model = queryset.model
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = [self._invert(key) for key in self.keys] if self.reverse else self.keys
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, self.position))
+
+        # Одна лишняя строка показывает, есть ли следующая страница
+        return queryset[:self.page_size + 1]
+
+    def _paginate(self, results):
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def get_keys(self, queryset):
+        """Поля сортировки queryset плюс (created_at, id) для однозначности"""
+        keys = [
+            key for key in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(key, str)
+        ]
+        names = [key.lstrip('-') for key in keys]
+        if 'created_at' not in names:
+            keys.append('-created_at')
+        if 'id' not in names:
+            created = next(key for key in keys if key.lstrip('-') == 'created_at')
+            keys.append('-id' if created.startswith('-') else 'id')
+        return keys
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'k': self.keys,
+            'p': [self._dump(getattr(instance, key.lstrip('-'))) for key in self.keys],
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        """Возвращает (позиция, reverse); позиция None - первая страница"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            payload = json.loads(raw)
+            if payload['k'] != self.keys or len(payload['p']) != len(self.keys):
+                raise ValueError
+            position = [
+                self._load(key.lstrip('-'), value)
+                for key, value in zip(self.keys, payload['p'])
+            ]
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def _load(self, name, value):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Аннотация (например, search_rank) - значение из JSON как есть
+            return value
+        return field.to_python(value)
+
+    @staticmethod
+    def _invert(key):
+        return key[1:] if key.startswith('-') else f'-{key}'
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Постраничная пагинация списка задач. По умолчанию - номера страниц
+    (как ожидает текущий клиент), ?pagination=cursor или ?cursor=...
+    включают keyset-режим, время ответа которого не зависит от номера страницы
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+
+    def use_keyset(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset для асинхронных представлений: COUNT и выборка
+        страницы через асинхронный ORM, остальное - как у PageNumberPagination
+        """
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        self.keyset = None
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,34 @@
+"""
+Быстрый JSON-парсер на orjson (если установлен)
+"""
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import JSONRenderer, orjson
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    JSONParser, разбирающий UTF-8 через orjson. Результат тот же, что у
+    стандартного парсера DRF, кроме целых больше 64 бит: orjson читает их
+    как float (ни одно поле моделей таких значений не хранит). Ошибки
+    разбора и тела в других кодировках обрабатывает стандартный json,
+    поэтому сообщения об ошибках не меняются
+    """
+
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(raw), media_type, parser_context)
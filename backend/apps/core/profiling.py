@@ -0,0 +1,209 @@
+"""
+Профилирование отдельных запросов (ProfilerMiddleware): cProfile вокруг
+представления и все SQL-запросы с временем, а для запросов дольше
+PROFILER_EXPLAIN_THRESHOLD_MS - их план EXPLAIN. Отчёт сохраняется в
+RequestProfile под случайным ID запроса и просматривается в админке.
+Значения параметров SQL (пароли, токены, текст задач) в отчёт по умолчанию
+не попадают: текст запроса сохраняется с плейсхолдерами, а план строится
+без значений. PROFILER_SQL_PARAMS=True подставляет их для отладки
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+
+from .models import RequestProfile
+
+# Строк сводки cProfile в отчёте (по накопленному времени)
+PROFILE_TOP_FUNCTIONS = 60
+# Запросы, для которых строится EXPLAIN: без побочных эффектов
+EXPLAIN_PREFIXES = ('SELECT', 'WITH')
+
+# SQL-запросы текущего профилируемого запроса; None вне профилирования
+_current = ContextVar('request_profile', default=None)
+
+
+class Capture:
+    """SQL-запросы запроса: (alias БД, sql, params, many, секунды)"""
+
+    __slots__ = ('queries',)
+
+    def __init__(self):
+        self.queries = []
+
+
+@contextmanager
+def capture():
+    """SQL-запросы внутри блока записываются в Capture"""
+    current = Capture()
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def profile(enabled=True):
+    """
+    cProfile внутри блока; возвращает профилировщик или None, если профиль
+    не нужен или в потоке уже работает другой профилировщик
+    """
+    profiler = cProfile.Profile() if enabled else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None
+    try:
+        yield profiler
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+
+def _record_query(execute, sql, params, many, context):
+    """execute_wrapper соединений: текст и время запросов профилируемого запроса"""
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.queries.append(
+            (context['connection'].alias, sql, params, many, time.perf_counter() - started)
+        )
+
+
+def _add_query_wrapper(connection, **kwargs):
+    # Как в metrics: в начало списка, чтобы connection.execute_wrapper() не снял обёртку
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """Подключает запись SQL-запросов ко всем соединениям с БД, включая открытые позже"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_add_query_wrapper, dispatch_uid='apps.core.profiling')
+        for connection in connections.all(initialized_only=True):
+            _add_query_wrapper(connection)
+        _installed = True
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def generic_sql(sql):
+    """Плейсхолдеры psycopg (%s) -> $1, $2, ... для EXPLAIN (GENERIC_PLAN)"""
+    numbers = itertools.count(1)
+    return re.sub(r'%[s%]', lambda match: '%' if match.group() == '%%' else f'${next(numbers)}', sql)
+
+
+def explain(alias, sql, params):
+    """
+    План запроса (EXPLAIN без ANALYZE: запрос не выполняется повторно) или None.
+    Без PROFILER_SQL_PARAMS - общий план без значений параметров (GENERIC_PLAN,
+    PostgreSQL 16+), иначе значения видны в условиях плана; на более старом
+    сервере плана нет
+    """
+    connection = connections[alias]
+    query = f'EXPLAIN {sql}'
+    if params and not settings.PROFILER_SQL_PARAMS:
+        if connection.pg_version < 160000:
+            return None
+        query, params = f'EXPLAIN (GENERIC_PLAN) {generic_sql(sql)}', None
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError:
+        return None
+
+
+def _compose(alias, sql, params):
+    """Текст запроса с подставленными параметрами для отчёта"""
+    if params is None:
+        return sql
+    try:
+        return connections[alias].ops.compose_sql(sql, params)
+    except Exception:
+        return f'{sql} -- {params!r}'
+
+
+def build_queries(current):
+    """
+    Список запросов для отчёта: текст (с параметрами только при
+    PROFILER_SQL_PARAMS), время, БД и EXPLAIN медленных SELECT
+    """
+    threshold = settings.PROFILER_EXPLAIN_THRESHOLD_MS / 1000
+    with_params = settings.PROFILER_SQL_PARAMS
+    queries = []
+    for alias, sql, params, many, duration in current.queries:
+        entry = {
+            'sql': _compose(alias, sql, params) if with_params and not many else sql,
+            'time_ms': round(duration * 1000, 3),
+            'db': alias,
+        }
+        if duration >= threshold and not many and sql.lstrip().upper().startswith(EXPLAIN_PREFIXES):
+            entry['explain'] = explain(alias, sql, params)
+        queries.append(entry)
+    return queries
+
+
+def profile_summary(profiler):
+    """Сводка cProfile по накопленному времени и данные для pstats/snakeviz"""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_FUNCTIONS)
+    # Формат pstats.Stats.dump_stats
+    return stream.getvalue(), marshal.dumps(stats.stats)
+
+
+def save_report(request_id, trigger, request, response, duration, current, profiler):
+    """Сохраняет отчёт RequestProfile и удаляет старые сверх PROFILER_MAX_REPORTS"""
+    match = request.resolver_match
+    user = getattr(request, 'user', None)
+    summary, stats = profile_summary(profiler) if profiler is not None else ('', None)
+    report = RequestProfile.objects.create(
+        request_id=request_id,
+        trigger=trigger,
+        method=request.method,
+        path=request.get_full_path(),
+        view_name=match.view_name if match is not None else '',
+        user_id=user.pk if user is not None and user.is_authenticated else None,
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=len(current.queries),
+        db_time_ms=round(sum(query[-1] for query in current.queries) * 1000, 3),
+        queries=build_queries(current),
+        profile=summary,
+        stats=stats,
+    )
+    keep = max(settings.PROFILER_MAX_REPORTS, 1)
+    oldest_kept = (
+        RequestProfile.objects.order_by('-created_at')
+        .values_list('created_at', flat=True)[keep - 1:keep].first()
+    )
+    if oldest_kept is not None:
+        RequestProfile.objects.filter(created_at__lt=oldest_kept).delete()
+    return report
@@ -0,0 +1,124 @@
+"""
+Быстрый JSON-рендерер на orjson (если установлен) и потоковые рендереры
+выгрузки задач
+"""
+import csv
+import io
+import math
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Даты, время и Decimal orjson передаёт в default - их кодирует JSONEncoder
+# DRF, как и раньше: миллисекунды, 'Z' для UTC, Decimal числом
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+)
+
+_encode_default = JSONEncoder().default
+
+
+def has_non_finite(data):
+    """Есть ли в данных NaN или бесконечность (orjson записал бы их как null)"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+    return False
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer, кодирующий через orjson. Ответ тот же, что у стандартного
+    рендерера DRF: компактные разделители, UTF-8 без \\u-экранирования,
+    экранированные \\u2028 и \\u2029 (числа с плавающей точкой могут
+    отличаться записью экспоненты: 1e16 вместо 1e+16). Отступы, ensure_ascii
+    и данные, которые orjson не кодирует (целые больше 64 бит, нестроковые
+    ключи), рендерятся стандартным json. NaN и бесконечности orjson пишет
+    как null, поэтому при null в ответе данные проверяются и с ними тоже
+    рендерятся стандартным json: ValueError при STRICT_JSON, как у DRF
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class RowStreamRenderer(renderers.BaseRenderer):
+    """
+    Потоковый рендерер строк выгрузки: render_rows(rows, fields) отдаёт
+    байты частями по rows_per_chunk строк, не собирая ответ в памяти
+    """
+
+    charset = 'utf-8'
+    rows_per_chunk = 500
+
+    def render_rows(self, rows, fields):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = [tuple(row.values()) for row in data]
+        fields = tuple(data[0]) if data else ()
+        return b''.join(self.render_rows(rows, fields))
+
+
+class NDJSONRenderer(RowStreamRenderer):
+    """Строки выгрузки в NDJSON: по JSON-объекту на строку"""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_rows(self, rows, fields):
+        renderer = JSONRenderer()
+        chunk = []
+        for row in rows:
+            chunk.append(renderer.render(dict(zip(fields, row))))
+            if len(chunk) == self.rows_per_chunk:
+                yield b'\n'.join(chunk) + b'\n'
+                chunk = []
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+
+
+class CSVRenderer(RowStreamRenderer):
+    """Строки выгрузки в CSV с заголовком из имён полей"""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_rows(self, rows, fields):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % self.rows_per_chunk == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
@@ -0,0 +1,51 @@
+"""
+Маршрутизация чтения на реплики. Чтение идёт на реплику только внутри
+replica_reads() (его включает ReplicaRoutingMiddleware для GET-запросов);
+первая запись возвращает все последующие чтения контекста на основную БД
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Чтения внутри блока (до первой записи) идут на реплику"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_primary():
+    """Все дальнейшие чтения текущего контекста - с основной БД"""
+    _replica_reads.set(False)
+
+
+class ReplicaRouter:
+    """Чтение - со случайной реплики из DATABASE_REPLICAS, запись - в default"""
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем то, что в ней записано
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
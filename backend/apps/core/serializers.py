@@ -1,13 +1,79 @@
+from django.db import models
 from rest_framework import serializers
+
+from .cache import task_fragments
 from .models import Task
 
 
+class OwnerField(serializers.StringRelatedField):
+    """
+    Владелец задачи строкой. Задачи в ответах API принадлежат текущему
+    пользователю, поэтому он берётся из request.user без запроса к auth_user
+    """
+
+    def get_attribute(self, instance):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is not None and user.pk == instance.user_id:
+            return user
+        return super().get_attribute(instance)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """
+    Список задач: представления задач текущего пользователя, не изменённых
+    с прошлого ответа, берутся из task_fragments, сериализуются только
+    новые и изменённые. Кэшируются полные представления; при ?fields= и
+    ?omit= из них берутся нужные поля. Каждый элемент - копия записи кэша
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        child = self.child
+        names = list(child.fields)
+        # Другие подклассы TaskSerializer выводят другие поля, а сокращённое
+        # описание в кэше не хранится
+        if (
+            type(child) is not TaskSerializer or user is None or not user.is_authenticated
+            or (child.preview and 'description' in names)
+        ):
+            return [child.to_representation(item) for item in iterable]
+
+        complete = names == list(TaskSerializer.Meta.fields)
+        # Владелец входит в представление; после переименования записи не подходят
+        owner = str(user)
+        result = []
+        hits = misses = 0
+        for item in iterable:
+            fragment = task_fragments.get(item) if item.user_id == user.pk else None
+            if fragment is not None and fragment['user'] == owner:
+                hits += 1
+                result.append(dict(fragment) if complete else {name: fragment[name] for name in names})
+                continue
+            misses += 1
+            representation = child.to_representation(item)
+            if complete and item.user_id == user.pk:
+                task_fragments.set(item, representation)
+                representation = dict(representation)
+            result.append(representation)
+        task_fragments.count(hits, misses)
+        return result
+
+
 class TaskSerializer(serializers.ModelSerializer):
-    """Сериализатор для задач"""
+    """
+    Сериализатор для задач. fields - выводимые поля (по умолчанию все);
+    preview=True заменяет описание сокращённым из аннотации description_preview
+    """
     
-    user = serializers.StringRelatedField(read_only=True)
+    user = OwnerField(read_only=True)
     is_completed = serializers.ReadOnlyField()
 
+    # Поля, которые строятся не из одноимённого столбца: для only() в списке
+    field_columns = {'is_completed': ('status',)}
+
     class Meta:
         model = Task
         fields = (
@@ -21,6 +87,18 @@ class TaskSerializer(serializers.ModelSerializer):
             'is_completed'
         )
         read_only_fields = ('id', 'created_at', 'updated_at', 'user')
+        list_serializer_class = TaskListSerializer
+
+    def __init__(self, *args, fields=None, preview=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preview = preview
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if preview and 'description' in self.fields:
+            self.fields['description'] = serializers.CharField(
+                source='description_preview', read_only=True, allow_null=True,
+            )
 
     def validate_title(self, value):
         """Валидация заголовка"""
@@ -58,4 +136,26 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         """Валидация заголовка"""
         if len(value.strip()) < 1:
             raise serializers.ValidationError("Заголовок не может быть пустым")
-        return value.strip() 
\ No newline at end of file
+        return value.strip() 
+
+
+class TaskIdsSerializer(serializers.Serializer):
+    """Сериализатор списка идентификаторов задач для групповых операций"""
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class TaskBulkStatusSerializer(serializers.Serializer):
+    """Сериализатор массовой смены статуса: по списку ids или по фильтрам запроса"""
+    
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+        required=False
+    )
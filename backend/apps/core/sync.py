@@ -0,0 +1,115 @@
+"""
+Дельта-синхронизация: задачи, созданные или изменённые после курсора
+(updated_at, id), и удалённые задачи по надгробиям (deleted_at, id).
+Курсор непрозрачен для клиента и содержит обе позиции
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task, TaskTombstone
+from .pagination import keyset_filter
+
+TASK_KEYS = ['updated_at', 'id']
+TOMBSTONE_KEYS = ['deleted_at', 'id']
+
+
+class InvalidCursor(Exception):
+    """Курсор не удалось разобрать"""
+
+
+class ExpiredCursor(Exception):
+    """Курсор старше срока хранения надгробий: нужна полная синхронизация"""
+
+
+def encode_cursor(tasks_position, deleted_position):
+    payload = {
+        't': [tasks_position[0].isoformat(), tasks_position[1]] if tasks_position else None,
+        'd': [deleted_position[0].isoformat(), deleted_position[1]],
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (позиция задач, позиция надгробий)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        tasks_position = (
+            (datetime.fromisoformat(payload['t'][0]), int(payload['t'][1]))
+            if payload['t'] else None
+        )
+        deleted_position = (datetime.fromisoformat(payload['d'][0]), int(payload['d'][1]))
+    except (binascii.Error, ValueError, KeyError, TypeError, IndexError):
+        raise InvalidCursor
+    return tasks_position, deleted_position
+
+
+def _fetch(queryset, keys, position, limit):
+    queryset = queryset.order_by(*keys)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(keys, position))
+    rows = list(queryset[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _advance(position, last, has_more, horizon):
+    """
+    Новая позиция курсора. Если страница последняя, позиция не заходит
+    за горизонт (now - окно безопасности): изменения внутри окна будут
+    отданы ещё раз, зато не потеряются записи поздно зафиксированных транзакций
+    """
+    if last is not None:
+        position = last
+    if has_more:
+        return position
+    floor = (horizon, 0)
+    if position is None or position > floor:
+        return floor
+    return position
+
+
+def get_changes(user, token=None, limit=500):
+    """Изменения задач пользователя после курсора (None - первая синхронизация)"""
+    now = timezone.now()
+    horizon = now - settings.TASK_SYNC_SAFETY_WINDOW
+    if settings.DATABASE_REPLICAS:
+        # Чтение может идти с реплики, которая отстаёт на DATABASE_REPLICA_LAG
+        horizon -= settings.DATABASE_REPLICA_LAG
+
+    if token:
+        tasks_position, deleted_position = decode_cursor(token)
+        if deleted_position[0] < now - settings.TASK_TOMBSTONE_RETENTION:
+            raise ExpiredCursor
+    else:
+        # Первая синхронизация: клиенту нужны все задачи и не нужны старые удаления
+        tasks_position, deleted_position = None, (horizon, 0)
+
+    tasks, more_tasks = _fetch(
+        Task.objects.filter(user=user), TASK_KEYS, tasks_position, limit
+    )
+    tombstones, more_deleted = _fetch(
+        TaskTombstone.objects.filter(user=user).only('id', 'task_id', 'deleted_at'),
+        TOMBSTONE_KEYS, deleted_position, limit
+    )
+
+    tasks_position = _advance(
+        tasks_position,
+        (tasks[-1].updated_at, tasks[-1].id) if tasks else None,
+        more_tasks, horizon,
+    )
+    deleted_position = _advance(
+        deleted_position,
+        (tombstones[-1].deleted_at, tombstones[-1].id) if tombstones else None,
+        more_deleted, horizon,
+    )
+    return {
+        'tasks': tasks,
+        'deleted': [tombstone.task_id for tombstone in tombstones],
+        'cursor': encode_cursor(tasks_position, deleted_position),
+        'has_more': more_tasks or more_deleted,
+    }
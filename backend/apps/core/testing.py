@@ -0,0 +1,197 @@
+"""
+Бюджеты запросов к БД и времени ответа для тестов API. ENDPOINT_BUDGETS
+задаёт для каждого маршрута и метода допустимое число SQL-запросов и время
+ответа; EndpointBudgetMixin выполняет запрос на малом и большом наборе данных
+и падает, если число запросов растёт с объёмом данных или выходит за бюджет.
+В сообщении об ошибке - все запросы с местом вызова в коде проекта
+"""
+import re
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection
+
+
+@dataclass(frozen=True)
+class Budget:
+    # Число SQL-запросов на запрос к API, не считая аутентификацию из кэша
+    queries: int
+    # Время ответа на большом наборе данных, мс (умножается на RESPONSE_TIME_BUDGET_FACTOR)
+    time_ms: float
+
+
+# Бюджеты по имени маршрута и методу. Число запросов - ровно текущее:
+# новый запрос в представлении должен сопровождаться правкой бюджета
+ENDPOINT_BUDGETS = {
+    # Версия для ETag, COUNT и выборка; поиск в первый раз проверяет pg_trgm
+    'core:task-list-create': {
+        'GET': Budget(4, 200),
+        'POST': Budget(2, 200),
+    },
+    'core:task-detail': {
+        'GET': Budget(1, 100),
+        'PATCH': Budget(3, 200),
+        'DELETE': Budget(4, 200),
+    },
+    'core:task-stats': {'GET': Budget(1, 100)},
+    'core:task-sync': {'GET': Budget(2, 200)},
+    'core:task-export': {'GET': Budget(1, 200)},
+    'core:task-import': {'POST': Budget(2, 300)},
+    'core:toggle-task-status': {'PATCH': Budget(2, 100)},
+    'core:toggle-tasks-status': {'PATCH': Budget(2, 200)},
+    'core:task-bulk': {
+        'POST': Budget(2, 300),
+        'PATCH': Budget(3, 300),
+        'DELETE': Budget(3, 300),
+    },
+    'core:task-bulk-status': {'PATCH': Budget(2, 200)},
+    # Время регистрации и входа - в основном хеширование пароля
+    'users:user-register': {'POST': Budget(4, 1500)},
+    'users:user-login': {'POST': Budget(2, 1500)},
+    'users:user-logout': {'POST': Budget(5, 200)},
+    # Первый вызов загружает список отозванных токенов
+    'users:token_refresh': {'POST': Budget(9, 200)},
+    'users:user-profile': {'GET': Budget(1, 100)},
+}
+
+# Кадры, которые не показываются как место вызова: сам модуль, тесты,
+# исполнение SQL в Django и обвязка тестового клиента
+_SKIPPED_FRAMES = (
+    __file__, 'tests.py', 'manage.py', '/django/db/backends/', '/django/db/models/sql/',
+    '/django/db/models/query.py', '/django/utils/functional.py', '/django/test/', '/django/core/handlers/', '/django/utils/deprecation.py', '/rest_framework/test.py',
+)
+# Сколько внутренних кадров стека показывать у каждого запроса
+STACK_DEPTH = 5
+# Точки сохранения не считаются: в тестах каждый atomic() выполняется внутри
+# транзакции теста и превращается в SAVEPOINT, которого нет в работе сервера
+_SAVEPOINT_RE = re.compile(r'(?:RELEASE |ROLLBACK TO )?SAVEPOINT ')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    duration: float
+    # Кадры кода проекта от внешнего к месту выполнения: 'apps/core/views.py:96 in list'
+    origin: list = field(default_factory=list)
+
+
+class QueryLog:
+    """
+    Записывает SQL-запросы соединения по умолчанию внутри блока with
+    вместе с местом вызова в коде проекта
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._wrapper = None
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        if _SAVEPOINT_RE.match(sql):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(CapturedQuery(sql, time.perf_counter() - started, _project_origin()))
+
+    def format(self):
+        """Нумерованный список запросов с местами вызова и повторами одного шаблона"""
+        lines = []
+        for number, query in enumerate(self.queries, 1):
+            lines.append(f'{number}. {query.sql} ({query.duration * 1000:.2f} мс)')
+            lines.extend(f'       {frame}' for frame in query.origin)
+        repeated = [
+            (count, template) for template, count in
+            Counter(_LITERAL_RE.sub('?', query.sql) for query in self.queries).most_common()
+            if count > 1
+        ]
+        if repeated:
+            lines.append('Повторяющиеся запросы:')
+            lines.extend(f'  {count} x {template}' for count, template in repeated)
+        return '\n'.join(lines)
+
+
+def _project_origin():
+    """Внутренние кадры кода проекта и библиотек, из которых выполнен запрос"""
+    base = str(settings.BASE_DIR) + '/'
+    origin = []
+    for frame in traceback.extract_stack()[:-2]:
+        if any(part in frame.filename for part in _SKIPPED_FRAMES):
+            continue
+        if frame.filename.startswith(base):
+            path = frame.filename.removeprefix(base)
+        elif '/site-packages/' in frame.filename:
+            path = frame.filename.partition('/site-packages/')[2]
+        else:
+            continue
+        origin.append(f'{path}:{frame.lineno} in {frame.name}')
+    return origin[-STACK_DEPTH:]
+
+
+class EndpointBudgetMixin:
+    """
+    Примесь к APITestCase: assertEndpointBudget(url_name, method, small, large)
+    выполняет вызовы small и large (запрос к API на малом и большом наборе
+    данных) и сравнивает число SQL-запросов между собой и с ENDPOINT_BUDGETS,
+    а время ответа на большом наборе - с бюджетом времени
+    """
+
+    budgets = ENDPOINT_BUDGETS
+
+    def measure(self, request):
+        """
+        Выполняет request(); возвращает (ответ, QueryLog, время в мс).
+        Потоковый ответ читается целиком: его запросы выполняются при чтении
+        """
+        with QueryLog() as log:
+            started = time.perf_counter()
+            response = request()
+            if response.streaming:
+                response.getvalue()
+            elapsed = (time.perf_counter() - started) * 1000
+        return response, log, elapsed
+
+    def assertEndpointBudget(self, url_name, method, small, large):
+        budget = self.budgets.get(url_name, {}).get(method)
+        if budget is None:
+            self.fail(f'Нет бюджета для {url_name} {method} в ENDPOINT_BUDGETS')
+
+        small_response, small_log, _ = self.measure(small)
+        large_response, large_log, elapsed = self.measure(large)
+        for response in (small_response, large_response):
+            self.assertLess(response.status_code, 400, f'{url_name} {method}: {getattr(response, "data", "")}')
+
+        if len(large_log) > len(small_log):
+            self.fail(
+                f'{url_name} {method}: число запросов растёт с объёмом данных - '
+                f'{len(small_log)} на малом наборе, {len(large_log)} на большом\n'
+                f'Малый набор:\n{small_log.format()}\nБольшой набор:\n{large_log.format()}'
+            )
+        for log in (small_log, large_log):
+            if len(log) > budget.queries:
+                self.fail(
+                    f'{url_name} {method}: {len(log)} запросов при бюджете {budget.queries}\n'
+                    f'{log.format()}'
+                )
+        limit = budget.time_ms * settings.RESPONSE_TIME_BUDGET_FACTOR
+        if elapsed > limit:
+            self.fail(
+                f'{url_name} {method}: ответ за {elapsed:.0f} мс при бюджете {limit:.0f} мс\n'
+                f'{large_log.format()}'
+            )
+        return large_response
@@ -1,10 +1,54 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import pstats
+import re
+import runpy
+import tempfile
+import threading
+import time as time_module
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Task
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.test import (
+    APIClient, APIRequestFactory, APITestCase, APITransactionTestCase, force_authenticate
+)
+from rest_framework.throttling import BaseThrottle
+from rest_framework.versioning import QueryParameterVersioning
+from rest_framework import parsers, renderers, status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from apps.users import urls as users_urls
+from . import metrics, urls as core_urls
+from .benchmark.load import LoadResult
+from .benchmark.report import compare, summarize
+from .cache import TaskFragmentCache, task_fragments, user_cache
+from .filters import has_trigram_support
+from .middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from .models import RequestProfile, Task, TaskCounters, TaskTombstone
+from .parsers import JSONParser
+from .renderers import JSONRenderer, NDJSONRenderer
+from .serializers import TaskSerializer
+from .views import DESCRIPTION_PREVIEW_LENGTH, TaskListCreateView
+from .testing import ENDPOINT_BUDGETS, EndpointBudgetMixin
+from .routers import ReplicaRouter, replica_reads
 
 
 class TaskModelTest(TestCase):
@@ -94,7 +138,7 @@ class TaskAPITest(APITestCase):
     
     def test_get_tasks_list(self):
         """Тест получения списка задач"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -102,7 +146,7 @@ class TaskAPITest(APITestCase):
     
     def test_create_task(self):
         """Тест создания задачи"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         data = {
             'title': 'New Task',
             'description': 'New Description'
@@ -115,7 +159,7 @@ class TaskAPITest(APITestCase):
     
     def test_get_task_detail(self):
         """Тест получения детальной информации о задаче"""
-        url = reverse('task-detail', kwargs={'pk': self.task1.pk})
+        url = reverse('core:task-detail', kwargs={'pk': self.task1.pk})
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -123,7 +167,7 @@ class TaskAPITest(APITestCase):
     
     def test_update_task(self):
         """Тест обновления задачи"""
-        url = reverse('task-detail', kwargs={'pk': self.task1.pk})
+        url = reverse('core:task-detail', kwargs={'pk': self.task1.pk})
         data = {
             'title': 'Updated Task',
             'status': 'completed'
@@ -136,7 +180,7 @@ class TaskAPITest(APITestCase):
     
     def test_delete_task(self):
         """Тест удаления задачи"""
-        url = reverse('task-detail', kwargs={'pk': self.task1.pk})
+        url = reverse('core:task-detail', kwargs={'pk': self.task1.pk})
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -144,7 +188,7 @@ class TaskAPITest(APITestCase):
     
     def test_toggle_task_status(self):
         """Тест переключения статуса задачи"""
-        url = reverse('toggle-task-status', kwargs={'task_id': self.task1.pk})
+        url = reverse('core:toggle-task-status', kwargs={'task_id': self.task1.pk})
         response = self.client.patch(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -158,7 +202,7 @@ class TaskAPITest(APITestCase):
     
     def test_get_task_stats(self):
         """Тест получения статистики задач"""
-        url = reverse('task-stats')
+        url = reverse('core:task-stats')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -169,14 +213,14 @@ class TaskAPITest(APITestCase):
     
     def test_access_other_user_task(self):
         """Тест доступа к задаче другого пользователя"""
-        url = reverse('task-detail', kwargs={'pk': self.other_task.pk})
+        url = reverse('core:task-detail', kwargs={'pk': self.other_task.pk})
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
     
     def test_filter_tasks_by_status(self):
         """Тест фильтрации задач по статусу"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         response = self.client.get(url, {'status': 'completed'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -185,7 +229,7 @@ class TaskAPITest(APITestCase):
     
     def test_search_tasks(self):
         """Тест поиска задач"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         response = self.client.get(url, {'search': 'Task 1'})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -196,7 +240,7 @@ class TaskAPITest(APITestCase):
         """Тест неавторизованного доступа"""
         self.client.credentials()  # Убираем токен
         
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -220,7 +264,7 @@ class TaskValidationTest(APITestCase):
     
     def test_create_task_without_title(self):
         """Тест создания задачи без заголовка"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         data = {
             'description': 'Description without title'
         }
@@ -231,7 +275,7 @@ class TaskValidationTest(APITestCase):
     
     def test_create_task_with_long_title(self):
         """Тест создания задачи с слишком длинным заголовком"""
-        url = reverse('task-list-create')
+        url = reverse('core:task-list-create')
         data = {
             'title': 'x' * 300,  # Превышает максимальную длину
             'description': 'Test description'
@@ -247,10 +291,2130 @@ class TaskValidationTest(APITestCase):
             user=self.user
         )
         
-        url = reverse('task-detail', kwargs={'pk': task.pk})
+        url = reverse('core:task-detail', kwargs={'pk': task.pk})
         data = {
             'status': 'invalid_status'
         }
         response = self.client.patch(url, data)
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskKeysetPaginationTest(APITestCase):
+    """Тесты keyset-пагинации списка задач"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i % 7}',
+                status='completed' if i % 3 == 0 else 'pending',
+                user=self.user
+            )
+            for i in range(25)
+        ])
+        # Одинаковые created_at у части задач проверяют однозначность ключа
+        same_time = Task.objects.filter(user=self.user).first().created_at
+        Task.objects.filter(user=self.user, status='completed').update(created_at=same_time)
+        self.url = reverse('core:task-list-create')
+    
+    def collect(self, params):
+        """Проходит все страницы по ссылкам next"""
+        ids = []
+        response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 4, **params})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [task['id'] for task in response.data['results']]
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+    
+    def test_cursor_pages_match_ordering(self):
+        """Тест: страницы курсора совпадают с полной сортировкой для каждого ordering"""
+        for ordering in ['created_at', '-created_at', 'status', '-status', 'title', '-title']:
+            with self.subTest(ordering=ordering):
+                ids, _ = self.collect({'ordering': ordering})
+                if ordering.lstrip('-') == 'created_at':
+                    keys = [ordering, ordering.replace('created_at', 'id')]
+                else:
+                    keys = [ordering, '-created_at', '-id']
+                expected = list(
+                    Task.objects.filter(user=self.user)
+                    .order_by(*keys)
+                    .values_list('id', flat=True)
+                )
+                self.assertEqual(ids, expected)
+    
+    def test_cursor_with_status_filter(self):
+        """Тест: курсор работает вместе с фильтром по статусу"""
+        ids, _ = self.collect({'status': 'completed'})
+        self.assertEqual(len(ids), Task.objects.filter(user=self.user, status='completed').count())
+        self.assertEqual(len(ids), len(set(ids)))
+    
+    def test_cursor_previous_link(self):
+        """Тест: ссылка previous возвращает предыдущую страницу"""
+        first = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 4})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        
+        self.assertEqual(
+            [task['id'] for task in back.data['results']],
+            [task['id'] for task in first.data['results']]
+        )
+    
+    def test_invalid_cursor(self):
+        """Тест: неверный курсор"""
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_page_number_mode_by_default(self):
+        """Тест: без параметров остаётся пагинация по номерам страниц"""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+
+
+class TaskSearchTest(APITestCase):
+    """Тесты полнотекстового поиска задач"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        self.title_match = Task.objects.create(
+            title='Подготовить отчёт',
+            description='Квартальный',
+            user=self.user
+        )
+        self.description_match = Task.objects.create(
+            title='Встреча',
+            description='Обсудить отчёт с клиентом',
+            user=self.user
+        )
+        Task.objects.create(title='Релиз', description='Выкатить сервер', user=self.user)
+        self.url = reverse('core:task-list-create')
+    
+    def search(self, term, **params):
+        response = self.client.get(self.url, {'search': term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+    
+    def test_search_ranks_title_above_description(self):
+        """Тест: совпадение в заголовке выше совпадения в описании"""
+        ids = self.search('отчёт')
+        
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+    
+    def test_search_by_prefix(self):
+        """Тест: слово ищется по префиксу (поиск по мере ввода)"""
+        self.assertEqual(self.search('Кварт'), [self.title_match.id])
+    
+    def test_search_requires_all_words(self):
+        """Тест: все слова запроса обязательны"""
+        self.assertEqual(self.search('отчёт клиент'), [self.description_match.id])
+    
+    def test_search_with_explicit_ordering(self):
+        """Тест: явный ?ordering= важнее релевантности"""
+        ids = self.search('отчёт', ordering='created_at')
+        
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+        ids = self.search('отчёт', ordering='-created_at')
+        self.assertEqual(ids, [self.description_match.id, self.title_match.id])
+    
+    def test_search_with_cursor_pagination(self):
+        """Тест: поиск совместим с keyset-пагинацией"""
+        response = self.client.get(self.url, {'search': 'отчёт', 'pagination': 'cursor', 'page_size': 1})
+        ids = [task['id'] for task in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [task['id'] for task in response.data['results']]
+        
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+        self.assertIsNone(response.data['next'])
+    
+    def test_search_other_user_tasks_hidden(self):
+        """Тест: поиск не находит задачи других пользователей"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        Task.objects.create(title='Чужой отчёт', user=other)
+        
+        self.assertEqual(len(self.search('отчёт')), 2)
+    
+    def test_search_with_typo(self):
+        """Тест: опечатка в заголовке находится по триграммам"""
+        if not has_trigram_support(DEFAULT_DB_ALIAS):
+            self.skipTest('pg_trgm не установлен')
+        self.assertIn(self.title_match.id, self.search('Подготвить'))
+
+
+class TaskCountersTest(APITestCase):
+    """Тесты счётчиков задач пользователя"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    
+    def assertCounters(self, total, completed):
+        counters = TaskCounters.objects.get(user=self.user)
+        self.assertEqual((counters.total, counters.completed), (total, completed))
+    
+    def test_counters_follow_api_changes(self):
+        """Тест: счётчики меняются при создании, обновлении, переключении и удалении"""
+        response = self.client.post(reverse('core:task-list-create'), {'title': 'A'})
+        task_id = response.data['task']['id']
+        self.client.post(reverse('core:task-list-create'), {'title': 'B', 'status': 'completed'})
+        self.assertCounters(2, 1)
+        
+        self.client.patch(reverse('core:task-detail', kwargs={'pk': task_id}), {'status': 'completed'})
+        self.assertCounters(2, 2)
+        
+        self.client.patch(reverse('core:task-detail', kwargs={'pk': task_id}), {'title': 'A2'})
+        self.assertCounters(2, 2)
+        
+        self.client.patch(reverse('core:toggle-task-status', kwargs={'task_id': task_id}))
+        self.assertCounters(2, 1)
+        
+        self.client.delete(reverse('core:task-detail', kwargs={'pk': task_id}))
+        self.assertCounters(1, 1)
+    
+    def test_queryset_delete_updates_counters(self):
+        """Тест: массовое удаление через QuerySet обновляет счётчики"""
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', status='completed' if i else 'pending', user=self.user)
+        
+        Task.objects.filter(user=self.user, status='completed').delete()
+        
+        self.assertCounters(1, 0)
+    
+    def test_queryset_update_updates_counters(self):
+        """Тест: QuerySet.update статуса и владельца пересчитывает счётчики"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', user=self.user)
+        
+        Task.objects.filter(user=self.user, title__in=['Task 0', 'Task 1']).update(status='completed')
+        self.assertCounters(3, 2)
+        
+        Task.objects.filter(title='Task 0').update(user=other)
+        self.assertCounters(2, 1)
+        other_counters = TaskCounters.objects.get(user=other)
+        self.assertEqual((other_counters.total, other_counters.completed), (1, 1))
+    
+    def test_queryset_update_bumps_version(self):
+        """Тест: QuerySet.update других полей меняет версию данных и updated_at"""
+        task = Task.objects.create(title='Task', user=self.user)
+        version = TaskCounters.objects.get(user=self.user).version
+        
+        Task.objects.filter(pk=task.pk).update(title='Renamed')
+        
+        self.assertGreater(TaskCounters.objects.get(user=self.user).version, version)
+        self.assertCounters(1, 0)
+        self.assertGreater(Task.objects.get(pk=task.pk).updated_at, task.updated_at)
+    
+    def test_stats_single_counters_lookup(self):
+        """Тест: статистика - один запрос к счётчикам (плюс пользователь из JWT)"""
+        Task.objects.create(title='Task', user=self.user)
+        
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:task-stats'))
+        self.assertEqual(response.data['total_tasks'], 1)
+        self.assertEqual(response.data['pending_tasks'], 1)
+    
+    def test_stats_rebuilds_missing_counters(self):
+        """Тест: отсутствующие счётчики пересчитываются из таблицы задач"""
+        Task.objects.create(title='Task', status='completed', user=self.user)
+        TaskCounters.objects.filter(user=self.user).delete()
+        
+        response = self.client.get(reverse('core:task-stats'))
+        
+        self.assertEqual(response.data['completed_tasks'], 1)
+        self.assertCounters(1, 1)
+    
+    def test_reconcile_command_repairs_drift(self):
+        """Тест: команда сверки исправляет расхождения"""
+        Task.objects.create(title='Task', user=self.user)
+        TaskCounters.objects.filter(user=self.user).update(total=10, completed=7)
+        
+        out = StringIO()
+        call_command('reconcile_task_counters', stdout=out)
+        
+        self.assertIn('Исправлено расхождений: 1', out.getvalue())
+        self.assertCounters(1, 0)
+
+
+class TaskCountersConcurrencyTest(TransactionTestCase):
+    """Счётчики при параллельных транзакциях"""
+
+    def test_concurrent_first_writes(self):
+        """Тест: первые задачи пользователя из двух транзакций - счётчики учитывают обе"""
+        user = User.objects.create_user(username='raceuser', password='testpass123')
+        self.assertFalse(TaskCounters.objects.filter(user=user).exists())
+        first_written = threading.Event()
+
+        def first():
+            try:
+                with transaction.atomic():
+                    Task.objects.create(title='A', user=user)
+                    first_written.set()
+                    # Вторая транзакция успевает дойти до пересчёта
+                    time_module.sleep(0.3)
+            finally:
+                connection.close()
+
+        def second():
+            first_written.wait()
+            try:
+                Task.objects.create(title='B', user=user, status='completed')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counters = TaskCounters.objects.get(user=user)
+        self.assertEqual((counters.total, counters.completed), (2, 1))
+
+
+class TaskQueryCountTest(APITestCase):
+    """Тесты: количество запросов не зависит от числа задач на странице"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', user=self.user) for i in range(60)
+        ])
+        self.task = Task.objects.filter(user=self.user).first()
+        # Прогрев кэша аутентификации: дальше пользователь берётся из токена без запросов
+        self.client.get(reverse('core:task-stats'))
+    
+    def test_list_query_count_constant(self):
+        """Тест: версия для ETag, COUNT и одна выборка для любого размера страницы"""
+        for page_size in (1, 20, 60):
+            with self.subTest(page_size=page_size), self.assertNumQueries(3):
+                response = self.client.get(reverse('core:task-list-create'), {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            self.assertEqual(response.data['results'][0]['user'], 'testuser')
+    
+    def test_cursor_list_query_count_constant(self):
+        """Тест: keyset-режим - без COUNT: версия для ETag и выборка"""
+        for page_size in (1, 20, 60):
+            with self.subTest(page_size=page_size), self.assertNumQueries(2):
+                self.client.get(reverse('core:task-list-create'), {'pagination': 'cursor', 'page_size': page_size})
+    
+    def test_detail_query_count(self):
+        """Тест: деталь задачи без запроса владельца"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('core:task-detail', kwargs={'pk': self.task.pk}))
+        self.assertEqual(response.data['user'], 'testuser')
+    
+    def test_update_response_without_owner_query(self):
+        """Тест: ответ на обновление не загружает владельца"""
+        url = reverse('core:task-detail', kwargs={'pk': self.task.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'title': 'Updated'})
+        
+        self.assertEqual(response.data['task']['user'], 'testuser')
+        user_queries = [q['sql'] for q in queries if 'FROM "auth_user"' in q['sql']]
+        self.assertEqual(user_queries, [])
+
+
+class EndpointBudgetTest(EndpointBudgetMixin, APITestCase):
+    """
+    Тесты бюджетов: каждый маршрут выполняется на малом и большом наборе
+    задач, число запросов к БД не должно расти и выходить за ENDPOINT_BUDGETS
+    """
+
+    SMALL_TASKS = 3
+    LARGE_TASKS = 120
+    # Элементов в групповых запросах на большом наборе
+    LARGE_BATCH = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        cls.task_ids = {}
+        for size, count in (('small', cls.SMALL_TASKS), ('large', cls.LARGE_TASKS)):
+            user = User.objects.create_user(username=f'{size}user', password='testpass123')
+            Task.objects.bulk_create([
+                Task(title=f'Задача {i}', description='отчёт', user=user,
+                     status='completed' if i % 2 else 'pending')
+                for i in range(count)
+            ])
+            cls.users[size] = user
+            cls.task_ids[size] = list(Task.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.access = {size: str(RefreshToken.for_user(user).access_token) for size, user in self.users.items()}
+        # Прогрев кэша аутентификации: в бюджет не входит
+        for size in self.users:
+            self.request(size, 'GET', 'core:task-stats')()
+
+    def request(self, size, method, url_name, args=(), data=None, format='json', auth=True):
+        """Вызов для measure: запрос к url_name от пользователя набора size"""
+        client = APIClient()
+        if auth:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access[size]}')
+        url = reverse(url_name, args=args)
+        if method == 'GET':
+            return lambda: client.get(url, data)
+        return lambda: getattr(client, method.lower())(url, data, format=format)
+
+    def check(self, url_name, method, build=lambda test, size: {}):
+        """Бюджет маршрута; build(test, size) - аргументы request для набора size"""
+        with self.subTest(route=f'{url_name} {method}'):
+            self.assertEndpointBudget(
+                url_name, method,
+                small=self.request('small', method, url_name, **build(self, 'small')),
+                large=self.request('large', method, url_name, **build(self, 'large')),
+            )
+
+    def batch(self, size):
+        return self.task_ids[size][:self.SMALL_TASKS if size == 'small' else self.LARGE_BATCH]
+
+    def fresh_tasks(self, size):
+        """Новые задачи для удаления в количестве batch(size)"""
+        return [
+            task.id for task in Task.objects.bulk_create([
+                Task(title=f'Удаляемая {i}', user=self.users[size]) for i in range(len(self.batch(size)))
+            ])
+        ]
+
+    def test_every_route_has_budget(self):
+        """Тест: у каждого маршрута API есть бюджет"""
+        routes = {f'core:{route.name}' for route in core_urls.urlpatterns}
+        routes |= {f'users:{route.name}' for route in users_urls.urlpatterns}
+        self.assertEqual(routes, set(ENDPOINT_BUDGETS))
+
+    def test_read_endpoints(self):
+        """Тест бюджетов чтения: списки, деталь, статистика, синхронизация, экспорт"""
+        for params in ({}, {'pagination': 'cursor'}, {'status': 'completed', 'ordering': 'title'},
+                       {'search': 'отчёт'}, {'page_size': 100},
+                       {'fields': 'id,title', 'ordering': 'status', 'pagination': 'cursor'},
+                       {'omit': 'user', 'preview': 1, 'page_size': 100}):
+            self.check('core:task-list-create', 'GET', lambda test, size: {'data': params})
+        self.check('core:task-detail', 'GET', lambda test, size: {'args': [test.task_ids[size][0]]})
+        self.check('core:task-stats', 'GET')
+        self.check('core:task-sync', 'GET')
+        self.check('core:task-export', 'GET')
+        self.check('users:user-profile', 'GET')
+
+    def test_write_endpoints(self):
+        """Тест бюджетов изменения задач, в том числе групповых"""
+        self.check('core:task-list-create', 'POST', lambda test, size: {'data': {'title': 'Новая'}})
+        self.check('core:task-detail', 'PATCH', lambda test, size: {
+            'args': [test.task_ids[size][1]], 'data': {'description': 'Изменено'},
+        })
+        self.check('core:toggle-task-status', 'PATCH', lambda test, size: {'args': [test.task_ids[size][2]]})
+        self.check('core:toggle-tasks-status', 'PATCH', lambda test, size: {'data': {'ids': test.batch(size)}})
+        self.check('core:task-bulk', 'POST', lambda test, size: {
+            'data': {'tasks': [{'title': f'Пакет {i}'} for i in range(len(test.batch(size)))]},
+        })
+        self.check('core:task-bulk', 'PATCH', lambda test, size: {
+            'data': {'tasks': [{'id': pk, 'description': 'Пакет'} for pk in test.batch(size)]},
+        })
+        self.check('core:task-bulk-status', 'PATCH', lambda test, size: {
+            'data': {'status': 'completed', 'ids': test.batch(size)},
+        })
+        self.check('core:task-import', 'POST', lambda test, size: {
+            'format': 'multipart',
+            'data': {'file': SimpleUploadedFile('tasks.ndjson', ''.join(
+                f'{{"title": "Импорт {i}"}}\n' for i in range(len(test.batch(size)))
+            ).encode())},
+        })
+        self.check('core:task-detail', 'DELETE', lambda test, size: {'args': test.fresh_tasks(size)[:1]})
+        self.check('core:task-bulk', 'DELETE', lambda test, size: {'data': {'ids': test.fresh_tasks(size)}})
+
+    def test_auth_endpoints(self):
+        """Тест бюджетов регистрации, входа и токенов"""
+        self.check('users:user-register', 'POST', lambda test, size: {'auth': False, 'data': {
+            'username': f'new{size}', 'email': f'new{size}@test.com',
+            'password': 'testpass123', 'password_confirm': 'testpass123',
+        }})
+        self.check('users:user-login', 'POST', lambda test, size: {'auth': False, 'data': {
+            'username': f'{size}user', 'password': 'testpass123',
+        }})
+        self.check('users:token_refresh', 'POST', lambda test, size: {'auth': False, 'data': {
+            'refresh': str(RefreshToken.for_user(test.users[size])),
+        }})
+        self.check('users:user-logout', 'POST', lambda test, size: {'data': {
+            'refresh': str(RefreshToken.for_user(test.users[size])),
+        }})
+
+
+class TaskToggleTest(APITestCase):
+    """Тесты атомарного переключения статуса"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        self.pending = Task.objects.create(title='Pending', user=self.user)
+        self.completed = Task.objects.create(title='Completed', status='completed', user=self.user)
+        self.other_task = Task.objects.create(title='Other', user=self.other_user)
+    
+    def test_toggle_single_statement(self):
+        """Тест: переключение - один UPDATE без предварительного SELECT задачи"""
+        url = reverse('core:toggle-task-status', kwargs={'task_id': self.pending.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task']['status'], 'completed')
+        task_queries = [q['sql'] for q in queries if '"core_task"' in q['sql']]
+        self.assertEqual(len(task_queries), 1)
+        self.assertTrue(task_queries[0].startswith('UPDATE'))
+        self.assertIn('RETURNING', task_queries[0])
+    
+    def test_toggle_updates_only_status_and_timestamp(self):
+        """Тест: остальные поля не перезаписываются"""
+        before = self.pending.updated_at
+        self.client.patch(reverse('core:toggle-task-status', kwargs={'task_id': self.pending.pk}))
+        
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, 'completed')
+        self.assertEqual(self.pending.title, 'Pending')
+        self.assertGreater(self.pending.updated_at, before)
+    
+    def test_toggle_other_user_task(self):
+        """Тест: чужую задачу переключить нельзя"""
+        url = reverse('core:toggle-task-status', kwargs={'task_id': self.other_task.pk})
+        response = self.client.patch(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.other_task.refresh_from_db()
+        self.assertEqual(self.other_task.status, 'pending')
+    
+    def test_toggle_many(self):
+        """Тест: переключение нескольких задач одним запросом"""
+        ids = [self.completed.pk, self.pending.pk, self.other_task.pk, 999999]
+        response = self.client.patch(reverse('core:toggle-tasks-status'), {'ids': ids}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(task['id'], task['status']) for task in response.data['tasks']],
+            [(self.completed.pk, 'pending'), (self.pending.pk, 'completed')]
+        )
+        self.assertEqual(response.data['not_found'], [self.other_task.pk, 999999])
+        
+        counters = TaskCounters.objects.get(user=self.user)
+        self.assertEqual((counters.total, counters.completed), (2, 1))
+    
+    def test_toggle_many_invalid_payload(self):
+        """Тест: пустой или неверный список идентификаторов"""
+        url = reverse('core:toggle-tasks-status')
+        
+        for payload in ({}, {'ids': []}, {'ids': ['x']}):
+            with self.subTest(payload=payload):
+                response = self.client.patch(url, payload, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskBulkTest(APITestCase):
+    """Тесты групповых операций с задачами"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('core:task-bulk')
+        self.status_url = reverse('core:task-bulk-status')
+    
+    def assertCounters(self, total, completed):
+        counters = TaskCounters.objects.get(user=self.user)
+        self.assertEqual((counters.total, counters.completed), (total, completed))
+    
+    def create_tasks(self, *titles, status='pending'):
+        return [Task.objects.create(title=title, status=status, user=self.user) for title in titles]
+    
+    def test_bulk_create(self):
+        """Тест: создание нескольких задач одним запросом"""
+        data = {'tasks': [
+            {'title': ' Купить молоко '},
+            {'title': 'Позвонить', 'description': 'Маме', 'status': 'completed'},
+        ]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([task['title'] for task in response.data['tasks']], ['Купить молоко', 'Позвонить'])
+        self.assertTrue(all(task['id'] for task in response.data['tasks']))
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "core_task"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertCounters(2, 1)
+    
+    def test_bulk_create_reports_errors_per_item(self):
+        """Тест: ошибки по каждому элементу, ничего не создаётся"""
+        data = {'tasks': [{'title': 'OK'}, {'description': 'без заголовка'}, {'title': 'x' * 300}]}
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0], {})
+        self.assertIn('title', response.data['errors'][1])
+        self.assertIn('title', response.data['errors'][2])
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+    
+    def test_bulk_update(self):
+        """Тест: обновление нескольких задач одним bulk_update"""
+        first, second = self.create_tasks('A', 'B')
+        data = {'tasks': [
+            {'id': first.pk, 'title': 'A2'},
+            {'id': second.pk, 'status': 'completed'},
+        ]}
+        response = self.client.patch(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, first.status), ('A2', 'pending'))
+        self.assertEqual((second.title, second.status), ('B', 'completed'))
+        self.assertGreater(second.updated_at, second.created_at)
+        self.assertCounters(2, 1)
+    
+    def test_bulk_update_errors(self):
+        """Тест: чужая задача, повтор id и неверный статус - ошибки по элементам"""
+        task, = self.create_tasks('A')
+        other = Task.objects.create(title='Other', user=self.other_user)
+        data = {'tasks': [
+            {'id': task.pk, 'title': 'A2'},
+            {'id': other.pk, 'title': 'hack'},
+            {'id': task.pk, 'title': 'again'},
+            {'id': task.pk, 'status': 'invalid'},
+        ]}
+        response = self.client.patch(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('id', errors[1])
+        self.assertIn('id', errors[2])
+        self.assertIn('id', errors[3])
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'A')
+    
+    def test_bulk_delete_by_ids(self):
+        """Тест: удаление по списку ids не затрагивает чужие задачи"""
+        first, second, third = self.create_tasks('A', 'B', 'C')
+        other = Task.objects.create(title='Other', user=self.other_user)
+        
+        response = self.client.delete(self.url, {'ids': [first.pk, second.pk, other.pk]}, format='json')
+        
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertTrue(Task.objects.filter(pk__in=[third.pk, other.pk]).count() == 2)
+        self.assertCounters(1, 0)
+    
+    def test_bulk_delete_completed_by_filter(self):
+        """Тест: очистка выполненных задач по фильтру одним DELETE"""
+        self.create_tasks('A', 'B', status='completed')
+        self.create_tasks('C')
+        
+        response = self.client.delete(f'{self.url}?status=completed')
+        
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertCounters(1, 0)
+    
+    def test_bulk_delete_by_search(self):
+        """Тест: удаление найденных по ?search= задач"""
+        self.create_tasks('Отчёт', 'Отчёт 2', status='completed')
+        self.create_tasks('Встреча')
+        
+        response = self.client.delete(f'{self.url}?search=отчёт')
+        
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertCounters(1, 0)
+    
+    def test_bulk_delete_requires_target(self):
+        """Тест: без ids и фильтров ничего не удаляется"""
+        self.create_tasks('A')
+        
+        response = self.client.delete(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 1)
+    
+    def test_blank_filters_are_not_a_target(self):
+        """Тест: пустой или пробельный ?search= и пустой ?status= не считаются фильтром"""
+        self.create_tasks('A', 'B')
+        
+        for query in ('?search=', '?search=%20', '?search=%20,%20', '?status=', '?status=&search=%20'):
+            response = self.client.delete(f'{self.url}{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+            response = self.client.patch(f'{self.status_url}{query}', {'status': 'completed'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+        
+        self.assertEqual(Task.objects.filter(user=self.user, status='pending').count(), 2)
+    
+    def test_bulk_update_boolean_id(self):
+        """Тест: true в качестве id не находит задачу с id=1"""
+        task = Task.objects.create(id=1, title='A', user=self.user)
+        
+        response = self.client.patch(self.url, {'tasks': [{'id': True, 'title': 'hack'}]}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0], {'id': ['Задача не найдена']})
+        task.refresh_from_db()
+        self.assertEqual(task.title, 'A')
+    
+    def test_bulk_status_by_search_filter(self):
+        """Тест: «отметить выполненными все найденные» - один UPDATE"""
+        report, _ = self.create_tasks('Отчёт за май', 'Встреча')
+        self.create_tasks('Отчёт за апрель', status='completed')
+        
+        url = f'{self.status_url}?status=pending&search=отчёт'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(url, {'status': 'completed'}, format='json')
+        
+        self.assertEqual(response.data['updated'], 1)
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "core_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertCounters(3, 2)
+    
+    def test_bulk_status_by_ids(self):
+        """Тест: смена статуса по списку ids"""
+        first, second = self.create_tasks('A', 'B')
+        
+        response = self.client.patch(self.status_url, {'status': 'completed', 'ids': [first.pk]}, format='json')
+        
+        self.assertEqual(response.data['updated'], 1)
+        self.assertCounters(2, 1)
+
+
+class TaskConditionalRequestTest(APITestCase):
+    """Тесты условных запросов (ETag/Last-Modified, If-Match)"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@test.com',
+            password='testpass123'
+        )
+        
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        self.task = Task.objects.create(title='Task', user=self.user)
+        self.list_url = reverse('core:task-list-create')
+        self.detail_url = reverse('core:task-detail', kwargs={'pk': self.task.pk})
+    
+    def test_list_not_modified(self):
+        """Тест: 304 для списка без выборки задач"""
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse([q for q in queries if '"core_task"' in q['sql']])
+    
+    def test_list_etag_changes_after_write(self):
+        """Тест: любое изменение задач меняет ETag списка и статистики"""
+        list_etag = self.client.get(self.list_url)['ETag']
+        stats_etag = self.client.get(reverse('core:task-stats'))['ETag']
+        
+        self.client.patch(self.detail_url, {'title': 'Renamed'})
+        
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], list_etag)
+        response = self.client.get(reverse('core:task-stats'), HTTP_IF_NONE_MATCH=stats_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_list_etag_depends_on_query(self):
+        """Тест: разные параметры запроса - разные ETag"""
+        self.assertNotEqual(
+            self.client.get(self.list_url)['ETag'],
+            self.client.get(self.list_url, {'status': 'completed'})['ETag']
+        )
+    
+    def test_stats_not_modified(self):
+        """Тест: 304 для статистики"""
+        url = reverse('core:task-stats')
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detail_not_modified(self):
+        """Тест: 304 для задачи по ETag и по Last-Modified"""
+        Task.objects.filter(pk=self.task.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(self.detail_url)
+        
+        self.assertEqual(
+            self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(
+            self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+    
+    def test_write_in_same_second_not_hidden_by_if_modified_since(self):
+        """Тест: If-Modified-Since не даёт 304 после изменения в ту же секунду"""
+        urls = (self.list_url, reverse('core:task-stats'))
+        now = timezone.now().replace(microsecond=500000)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            first = [self.client.get(url) for url in urls]
+            self.client.post(self.list_url, {'title': 'New'})
+            
+            for url, response in zip(urls, first):
+                # Секунда изменения не прошла - Last-Modified не отдаётся и не сравнивается
+                self.assertNotIn('Last-Modified', response)
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(now.timestamp()))
+                self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+    
+    def test_last_modified_after_second_passed(self):
+        """Тест: Last-Modified отдаётся и сравнивается, когда секунда изменения прошла"""
+        TaskCounters.objects.filter(user=self.user).update(changed_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(self.list_url)
+        
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_update_with_if_match(self):
+        """Тест: If-Match с актуальным ETag - обновление и новый ETag в ответе"""
+        etag = self.client.get(self.detail_url)['ETag']
+        
+        response = self.client.patch(self.detail_url, {'title': 'New'}, HTTP_IF_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response['ETag'], self.client.get(self.detail_url)['ETag'])
+    
+    def test_update_with_stale_if_match(self):
+        """Тест: If-Match с устаревшим ETag - 412, задача не меняется"""
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.patch(self.detail_url, {'title': 'Concurrent'})
+        
+        response = self.client.patch(self.detail_url, {'title': 'Lost update'}, HTTP_IF_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Concurrent')
+    
+    def test_delete_with_stale_if_match(self):
+        """Тест: удаление с устаревшим If-Match - 412"""
+        response = self.client.delete(self.detail_url, HTTP_IF_MATCH='"stale"')
+        
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+
+
+@override_settings(TASK_SYNC_SAFETY_WINDOW=timedelta(0), DATABASE_REPLICA_LAG=timedelta(0))
+class TaskSyncTest(APITestCase):
+    """Тесты дельта-синхронизации"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncuser', password='testpass123')
+        self.other = User.objects.create_user(username='syncother', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('core:task-sync')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', user=self.user) for i in range(3)
+        ]
+        Task.objects.create(title='Foreign', user=self.other)
+    
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_initial_sync_returns_all_tasks(self):
+        """Тест: первая синхронизация отдаёт все задачи пользователя"""
+        data = self.sync()
+        
+        self.assertEqual([task['id'] for task in data['tasks']], [task.id for task in self.tasks])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+    
+    def test_sync_returns_only_changes(self):
+        """Тест: после курсора - только изменённые задачи и удалённые ID"""
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['tasks'], [])
+        
+        self.client.patch(reverse('core:task-detail', args=[self.tasks[0].id]), {'title': 'Changed'})
+        self.client.delete(reverse('core:task-detail', args=[self.tasks[1].id]))
+        new = Task.objects.create(title='New', user=self.user)
+        
+        data = self.sync(cursor)
+        
+        self.assertEqual([task['id'] for task in data['tasks']], [self.tasks[0].id, new.id])
+        self.assertEqual(data['deleted'], [self.tasks[1].id])
+        self.assertEqual(self.sync(data['cursor'])['deleted'], [])
+    
+    def test_bulk_delete_leaves_tombstones(self):
+        """Тест: групповое удаление тоже попадает в синхронизацию"""
+        cursor = self.sync()['cursor']
+        ids = [self.tasks[0].id, self.tasks[2].id]
+        
+        self.client.delete(reverse('core:task-bulk'), {'ids': ids}, format='json')
+        
+        self.assertEqual(sorted(self.sync(cursor)['deleted']), ids)
+        self.assertEqual(TaskTombstone.objects.filter(user=self.other).count(), 0)
+    
+    def test_sync_paging(self):
+        """Тест: постраничная синхронизация через has_more"""
+        data = self.sync(limit=2)
+        self.assertEqual(len(data['tasks']), 2)
+        self.assertTrue(data['has_more'])
+        
+        data = self.sync(data['cursor'], limit=2)
+        
+        self.assertEqual([task['id'] for task in data['tasks']], [self.tasks[2].id])
+        self.assertFalse(data['has_more'])
+    
+    def test_safety_window_replays_recent_changes(self):
+        """Тест: изменения внутри окна безопасности отдаются повторно"""
+        with self.settings(TASK_SYNC_SAFETY_WINDOW=timedelta(minutes=5)):
+            cursor = self.sync()['cursor']
+            self.assertEqual(len(self.sync(cursor)['tasks']), 3)
+    
+    def test_invalid_cursor(self):
+        """Тест: неверный курсор - 400"""
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_expired_cursor(self):
+        """Тест: курсор старше срока хранения надгробий - 410"""
+        cursor = self.sync()['cursor']
+        
+        with self.settings(TASK_TOMBSTONE_RETENTION=timedelta(0)):
+            response = self.client.get(self.url, {'cursor': cursor})
+        
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+    
+    def test_sync_query_count(self):
+        """Тест: синхронизация - запрос задач и запрос надгробий"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.sync()
+        
+        self.assertEqual(len(ctx.captured_queries), 2)
+    
+    def test_prune_task_tombstones(self):
+        """Тест: команда удаляет только устаревшие надгробия"""
+        Task.objects.filter(user=self.user).delete()
+        TaskTombstone.objects.filter(task_id=self.tasks[0].id).update(
+            deleted_at=timezone.now() - timedelta(days=60)
+        )
+        out = StringIO()
+        
+        call_command('prune_task_tombstones', '--days=30', '--batch-size=1', stdout=out)
+        
+        self.assertIn('Удалено надгробий: 1', out.getvalue())
+        self.assertEqual(
+            sorted(TaskTombstone.objects.values_list('task_id', flat=True)),
+            [self.tasks[1].id, self.tasks[2].id]
+        )
+
+
+class TaskExportTest(APITestCase):
+    """Тесты потоковой выгрузки задач"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exportuser', password='testpass123')
+        other = User.objects.create_user(username='exportother', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('core:task-export')
+        for i in range(5):
+            Task.objects.create(
+                title=f'Задача {i}', description='Отчёт, "кавычки"\nи перенос' if i == 0 else None,
+                status='completed' if i % 2 else 'pending', user=self.user
+            )
+        Task.objects.create(title='Foreign', user=other)
+
+    def export(self, params=None, **extra):
+        response = self.client.get(self.url, params, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_matches_task_list(self):
+        """Тест: NDJSON содержит те же задачи и поля, что и список"""
+        response, content = self.export()
+        listed = self.client.get(reverse('core:task-list-create')).data['results']
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn('tasks.ndjson', response['Content-Disposition'])
+        self.assertEqual([json.loads(line) for line in content.splitlines()], listed)
+
+    def test_export_honours_filters(self):
+        """Тест: фильтры status, search и ordering как у списка"""
+        _, content = self.export({'status': 'completed', 'ordering': 'title'})
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Задача 1', 'Задача 3'])
+
+        _, content = self.export({'search': 'отчёт'})
+        self.assertEqual([json.loads(line)['title'] for line in content.splitlines()], ['Задача 0'])
+
+    def test_csv_export(self):
+        """Тест: CSV по ?format=csv и по заголовку Accept"""
+        response, content = self.export({'format': 'csv', 'ordering': 'title'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertEqual(rows[0], list(TaskSerializer.Meta.fields))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][1:4], ['Задача 0', 'Отчёт, "кавычки"\nи перенос', 'pending'])
+        self.assertEqual(rows[1][6], 'exportuser')
+
+        _, accepted = self.export({'ordering': 'title'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(accepted, content)
+
+    def test_export_streams_in_chunks(self):
+        """Тест: строки читаются и отдаются частями"""
+        with mock.patch('apps.core.views.EXPORT_CHUNK_SIZE', 2), \
+                mock.patch.object(NDJSONRenderer, 'rows_per_chunk', 2):
+            response = self.client.get(self.url)
+            chunks = list(response.streaming_content)
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+
+    def test_gzip_export(self):
+        """Тест: сжатие на лету для клиентов, принимающих gzip"""
+        _, plain = self.export()
+        response, compressed = self.export(HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_export_errors_are_json(self):
+        """Тест: ошибки выгрузки отдаются в JSON"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class TaskImportTest(APITestCase):
+    """Тесты потокового импорта задач"""
+
+    ndjson = (
+        '{"title": "Первая", "description": "Описание"}\n'
+        '{"title": "Вторая", "status": "completed"}\n'
+        '\n'
+        '{"title": "   "}\n'
+        '{"title": "Битая\n'
+        '["не объект"]\n'
+        '{"title": "Третья", "status": "unknown"}\n'
+        '{"title": "Четвёртая", "id": 999, "user": "someone"}\n'
+    ).encode()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('core:task-import')
+
+    def upload(self, content, name='tasks.ndjson', params='', **data):
+        data['file'] = SimpleUploadedFile(name, content)
+        return self.client.post(f'{self.url}{params}', data, format='multipart')
+
+    def test_ndjson_import_reports_row_errors(self):
+        """Тест: валидные строки сохраняются, ошибки - по номерам строк"""
+        response = self.upload(self.ndjson)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['failed'], 4)
+        self.assertEqual(response.data['checkpoint'], 8)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5, 6, 7])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertIn('status', response.data['errors'][3]['errors'])
+        self.assertEqual(
+            sorted(Task.objects.filter(user=self.user).values_list('title', 'status')),
+            [('Вторая', 'completed'), ('Первая', 'pending'), ('Четвёртая', 'pending')]
+        )
+        counters = TaskCounters.objects.get(user=self.user)
+        self.assertEqual((counters.total, counters.completed), (3, 1))
+
+    def test_resume_from_checkpoint(self):
+        """Тест: ?start= пропускает уже обработанные строки"""
+        response = self.upload(self.ndjson, params='?start=4')
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(list(Task.objects.filter(user=self.user).values_list('title', flat=True)), ['Четвёртая'])
+
+        response = self.upload(self.ndjson, params='?start=-1')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csv_import_of_export(self):
+        """Тест: CSV-выгрузка импортируется обратно (крупный файл - через временный файл и COPY)"""
+        other = User.objects.create_user(username='exportsource', password='testpass123')
+        for i in range(5):
+            Task.objects.create(
+                title=f'Задача {i}', description='С запятой, "кавычками"\nи переносом' if i == 0 else '',
+                status='completed' if i % 2 else 'pending', user=other
+            )
+        self.client.force_authenticate(user=other)
+        exported = b''.join(self.client.get(reverse('core:task-export'), {'format': 'csv'}).streaming_content)
+        self.client.force_authenticate(user=self.user)
+
+        for use_copy in (False, True):
+            Task.objects.filter(user=self.user).delete()
+            with self.subTest(use_copy=use_copy), \
+                    self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0), \
+                    mock.patch('apps.core.views.COPY_MIN_SIZE', 0 if use_copy else 10 ** 9), \
+                    mock.patch('apps.core.views.IMPORT_BATCH_SIZE', 2):
+                response = self.upload(exported, name='export.csv')
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual((response.data['created'], response.data['failed']), (5, 0))
+                fields = ('title', 'description', 'status')
+                self.assertEqual(
+                    sorted(Task.objects.filter(user=self.user).values_list(*fields)),
+                    sorted(Task.objects.filter(user=other).values_list(*fields))
+                )
+                counters = TaskCounters.objects.get(user=self.user)
+                self.assertEqual((counters.total, counters.completed), (5, 2))
+
+    def test_unreadable_csv_keeps_saved_rows(self):
+        """Тест: нечитаемый CSV - 400, сохранённое до ошибки остаётся"""
+        rows = ''.join(f'Задача {i},pending\n' for i in range(3000))
+        content = f'title,status\n{rows}'.encode() + b'\xff\xfe,pending\n'
+        with mock.patch('apps.core.views.IMPORT_BATCH_SIZE', 100):
+            response = self.upload(content, name='tasks.csv')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Файл декодируется блоками: строки из блока с ошибкой не читаются
+        self.assertGreater(response.data['created'], 2000)
+        self.assertEqual(response.data['checkpoint'], response.data['created'])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), response.data['created'])
+
+    def test_import_requires_known_format(self):
+        """Тест: без файла или с неизвестным форматом - 400"""
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.upload(b'title\nX\n', name='tasks.txt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.upload(b'title\nX\n', name='tasks.txt', format='csv')
+        self.assertEqual(response.data['created'], 1)
+
+    def test_import_command_resumes_from_checkpoint(self):
+        """Тест: команда пишет ошибки, продолжает с контрольной точки и удаляет её"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.ndjson')
+            with open(path, 'wb') as stream:
+                stream.write(self.ndjson)
+            with open(f'{path}.checkpoint', 'w') as checkpoint:
+                json.dump({'row': 1}, checkpoint)
+            errors_path = os.path.join(directory, 'errors.ndjson')
+
+            call_command(
+                'import_tasks', path, user='importuser', batch_size=1,
+                errors=errors_path, stdout=StringIO()
+            )
+
+            self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+            with open(errors_path) as errors:
+                self.assertEqual([json.loads(line)['row'] for line in errors], [4, 5, 6, 7])
+        self.assertEqual(
+            sorted(Task.objects.filter(user=self.user).values_list('title', flat=True)),
+            ['Вторая', 'Четвёртая']
+        )
+
+
+class DatabaseSettingsTest(SimpleTestCase):
+    """Тесты настроек соединений с БД в config/settings.py"""
+
+    def load_settings(self, **env):
+        """Значения config/settings.py при заданных переменных окружения"""
+        names = ('ASGI', 'ASYNC_VIEWS', 'DB_POOL', 'DB_CONN_MAX_AGE')
+        environ = {key: value for key, value in os.environ.items() if key not in names}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / 'config' / 'settings.py'))
+
+    def conn_max_age(self, **env):
+        return self.load_settings(**env)['DATABASES']['default']['CONN_MAX_AGE']
+
+    def test_persistent_connections_under_wsgi(self):
+        """Тест: под WSGI соединения по умолчанию постоянные"""
+        self.assertEqual(self.conn_max_age(), 60)
+
+    def test_no_persistent_connections_under_asgi(self):
+        """Тест: под ASGI (config/asgi.py или ASYNC_VIEWS) постоянных соединений нет"""
+        self.assertEqual(self.conn_max_age(ASGI='True'), 0)
+        self.assertEqual(self.conn_max_age(ASYNC_VIEWS='True'), 0)
+        self.assertEqual(self.conn_max_age(ASGI='True', DB_CONN_MAX_AGE='30'), 30)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], DATABASE_REPLICA_LAG=timedelta(seconds=5))
+class ReplicaRoutingTest(SimpleTestCase):
+    """Тесты маршрутизации чтения на реплики"""
+    
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+    
+    def routed_view(self, status_code=200, write=False):
+        """Представление, запоминающее, куда ушло бы чтение"""
+        def view(request):
+            if write:
+                self.router.db_for_write(Task)
+            self.read_db = self.router.db_for_read(Task)
+            return HttpResponse(status=status_code)
+        return ReplicaRoutingMiddleware(view)
+    
+    def test_reads_from_replica_until_write(self):
+        """Тест: внутри replica_reads чтение с реплики, после записи - с основной БД"""
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Task), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Task), 'replica_0')
+    
+    def test_get_reads_from_replica(self):
+        """Тест: GET читает с реплики"""
+        self.routed_view()(self.factory.get('/api/v1/tasks/'))
+        
+        self.assertEqual(self.read_db, 'replica_0')
+    
+    def test_get_with_write_reads_from_primary(self):
+        """Тест: GET, который что-то записал, дальше читает с основной БД"""
+        self.routed_view(write=True)(self.factory.get('/api/v1/tasks/stats/'))
+        
+        self.assertEqual(self.read_db, 'default')
+    
+    def test_write_pins_client_to_primary(self):
+        """Тест: успешная запись закрепляет клиента за основной БД на время лага"""
+        response = self.routed_view(status_code=201)(self.factory.post('/api/v1/tasks/'))
+        
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertEqual(self.read_db, 'default')
+        
+        request = self.factory.get('/api/v1/tasks/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.routed_view()(request)
+        self.assertEqual(self.read_db, 'default')
+    
+    def bearer(self, user_id):
+        """Заголовок Authorization с access-токеном пользователя user_id"""
+        access = AccessToken.for_user(User(pk=user_id, username=f'pinned{user_id}'))
+        return {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+
+    def test_write_pins_user_without_cookie(self):
+        """Тест: запись закрепляет за основной БД пользователя из токена, cookie не нужна"""
+        keys = ['pin:901', 'pin:902']
+        cache.delete_many(keys)
+        self.addCleanup(cache.delete_many, keys)
+
+        self.routed_view(status_code=201)(self.factory.post('/api/v1/tasks/', **self.bearer(901)))
+
+        self.routed_view()(self.factory.get('/api/v1/tasks/', **self.bearer(901)))
+        self.assertEqual(self.read_db, 'default')
+        self.routed_view()(self.factory.get('/api/v1/tasks/', **self.bearer(902)))
+        self.assertEqual(self.read_db, 'replica_0')
+
+    async def test_async_write_pins_user_without_cookie(self):
+        """Тест: закрепление пользователя в асинхронной цепочке middleware"""
+        await cache.adelete('pin:903')
+        self.addCleanup(cache.delete, 'pin:903')
+
+        async def view(request):
+            self.read_db = self.router.db_for_read(Task)
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+        middleware = ReplicaRoutingMiddleware(view)
+
+        await middleware(self.factory.post('/api/v1/tasks/', **self.bearer(903)))
+        await middleware(self.factory.get('/api/v1/tasks/', **self.bearer(903)))
+        self.assertEqual(self.read_db, 'default')
+
+    def test_invalid_token_reads_from_replica(self):
+        """Тест: неверный токен не ломает маршрутизацию (ответ 401 даст представление)"""
+        self.routed_view()(self.factory.get('/api/v1/tasks/', HTTP_AUTHORIZATION='Bearer invalid token'))
+
+        self.assertEqual(self.read_db, 'replica_0')
+
+    def test_user_cache_filled_from_primary(self):
+        """Тест: промах user_cache вычисляется по основной БД, а не по отстающей реплике"""
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Task), 'replica_0')
+            value = user_cache.get_or_set('replica-read', 904, lambda: self.router.db_for_read(Task))
+
+        self.assertEqual(value, 'default')
+
+    def test_failed_write_does_not_pin(self):
+        """Тест: запрос с ошибкой не закрепляет клиента"""
+        response = self.routed_view(status_code=400)(self.factory.post('/api/v1/tasks/'))
+        
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+    
+    def test_no_replicas(self):
+        """Тест: без реплик всё читается с основной БД"""
+        with self.settings(DATABASE_REPLICAS=[]):
+            response = self.routed_view()(self.factory.post('/api/v1/tasks/'))
+            self.routed_view()(self.factory.get('/api/v1/tasks/'))
+        
+        self.assertEqual(self.read_db, 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+READ_ONLY_REPLICA = 'replica_read_only'
+
+
+@override_settings(DATABASE_REPLICAS=[READ_ONLY_REPLICA])
+class ReadOnlyReplicaTest(APITransactionTestCase):
+    """
+    Тесты с репликой только для чтения: отдельное соединение с тестовой БД
+    с default_transaction_read_only. Тест без общей транзакции: внутри неё
+    ReplicaRouter читает только с основной БД
+    """
+
+    # Псевдоним реплики появляется только в setUpClass, поэтому не перечислен
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        settings_dict = dict(connections[DEFAULT_DB_ALIAS].settings_dict)
+        settings_dict['OPTIONS'] = {
+            **settings_dict['OPTIONS'], 'options': '-c default_transaction_read_only=on',
+        }
+        # Как у реплик в settings.py: очищается вместе с основной БД
+        settings_dict['TEST'] = {**settings_dict['TEST'], 'MIRROR': DEFAULT_DB_ALIAS}
+        connections.settings[READ_ONLY_REPLICA] = settings_dict
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[READ_ONLY_REPLICA].close()
+        del connections[READ_ONLY_REPLICA]
+        del connections.settings[READ_ONLY_REPLICA]
+
+    def setUp(self):
+        # Пользователь без задач: строки счётчиков нет ни на одной БД
+        self.user = User.objects.create_user(username='replicauser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_replica_is_read_only(self):
+        """Тест: запись на реплику действительно невозможна"""
+        with self.assertRaisesMessage(DatabaseError, 'read-only transaction'):
+            with transaction.atomic(using=READ_ONLY_REPLICA):
+                list(User.objects.using(READ_ONLY_REPLICA).select_for_update().values_list('pk'))
+
+    def test_counters_rebuilt_on_primary(self):
+        """Тест: первый GET пользователя пересчитывает счётчики на основной БД, а не на реплике"""
+        stats = self.client.get(reverse('core:task-stats'))
+        self.assertEqual(stats.status_code, status.HTTP_200_OK)
+        self.assertEqual(stats.data['total_tasks'], 0)
+
+        TaskCounters.objects.all().delete()
+        user_cache.invalidate([self.user.pk])
+        tasks = self.client.get(reverse('core:task-list-create'))
+        self.assertEqual(tasks.status_code, status.HTTP_200_OK)
+        self.assertTrue(TaskCounters.objects.filter(user=self.user).exists())
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='', DEBUG=True)
+class MetricsTest(APITestCase):
+    """Тесты метрик запросов и заголовка Server-Timing"""
+
+    def setUp(self):
+        for histogram in metrics.REGISTRY:
+            histogram.clear()
+        self.user = User.objects.create_user(username='metricsuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', user=self.user)
+
+    def scrape(self, **extra):
+        response = self.client.get('/metrics', **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode()
+
+    def test_server_timing_header(self):
+        """Тест: Server-Timing с временем запроса, БД и сериализации"""
+        response = self.client.get(reverse('core:task-list-create'))
+
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="[1-9]\d* queries", serializer;dur=[\d.]+$')
+
+    def test_metrics_by_view_name(self):
+        """Тест: гистограммы по имени маршрута в формате Prometheus"""
+        self.client.get(reverse('core:task-list-create'))
+        self.client.get(reverse('core:task-list-create'))
+        self.client.get('/api/v1/missing/')
+
+        text = self.scrape()
+        self.assertIn(
+            'http_request_duration_seconds_count{view="core:task-list-create",method="GET",status="2xx"} 2',
+            text
+        )
+        self.assertIn('http_request_duration_seconds_count{view="unresolved",method="GET",status="4xx"} 1', text)
+        self.assertIn('http_request_db_queries_bucket{view="core:task-list-create",le="+Inf"} 2', text)
+        self.assertIn('# TYPE http_response_size_bytes histogram', text)
+        serializer_sum = re.search(
+            r'^http_request_serializer_duration_seconds_sum\{view="core:task-list-create"\} (\S+)$', text, re.M
+        )
+        self.assertGreater(float(serializer_sum.group(1)), 0)
+
+    def test_metrics_token(self):
+        """Тест: с METRICS_TOKEN метрики доступны только с токеном"""
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+            self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_no_token_outside_debug(self):
+        """Тест: без METRICS_TOKEN вне DEBUG эндпоинт не отвечает"""
+        with self.settings(DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+        with self.settings(DEBUG=False, METRICS_TOKEN='secret'):
+            self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_disabled_by_default_in_tests(self):
+        """Тест: без METRICS_ENABLED заголовка и эндпоинта нет"""
+        with self.settings(METRICS_ENABLED=False):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            response = client.get(reverse('core:task-list-create'))
+            self.assertNotIn('Server-Timing', response)
+            self.assertEqual(client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(
+    PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0, PROFILER_SLOW_REQUEST_MS=0,
+    PROFILER_EXPLAIN_THRESHOLD_MS=0, PROFILER_MAX_REPORTS=100,
+)
+class ProfilerTest(APITestCase):
+    """Тесты профилировщика запросов и его отчётов в админке"""
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staffuser', password='testpass123', is_staff=True)
+        self.user = User.objects.create_user(username='profileuser', password='testpass123')
+        for owner in (self.staff, self.user):
+            Task.objects.bulk_create([Task(title=f'Task {i}', user=owner) for i in range(3)])
+        self.url = reverse('core:task-list-create')
+
+    def get_as(self, user, **extra):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.get(self.url, {'search': 'Task'}, **extra)
+
+    def test_staff_header_profiles_request(self):
+        """Тест: заголовок сотрудника - отчёт с SQL, EXPLAIN и сводкой cProfile"""
+        response = self.get_as(self.staff, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        self.assertEqual(report.trigger, 'header')
+        self.assertEqual(report.view_name, 'core:task-list-create')
+        self.assertEqual(report.path, f'{self.url}?search=Task')
+        self.assertEqual(report.user_id, self.staff.pk)
+        self.assertEqual(report.query_count, len(report.queries))
+        select = next(query for query in report.queries if 'FROM "core_task"' in query['sql'])
+        self.assertIn('"user_id" = %s', select['sql'])
+        self.assertIn('Scan', select['explain'])
+        self.assertIn('cumulative', report.profile)
+        self.assertIn('list', report.profile)
+        self.assertTrue(report.stats)
+
+    def test_sql_params_not_stored(self):
+        """Тест: значения параметров SQL не попадают ни в текст запросов, ни в планы"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.staff).access_token}')
+        response = self.client.get(self.url, {'search': 'Sekret'}, HTTP_X_PROFILE='1')
+
+        report = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        self.assertNotIn('sekret', json.dumps(report.queries).lower())
+        self.assertTrue(any(query.get('explain') for query in report.queries))
+
+        with self.settings(PROFILER_SQL_PARAMS=True):
+            response = self.client.get(self.url, {'search': 'Sekret'}, HTTP_X_PROFILE='1')
+
+        report = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        select = next(query for query in report.queries if 'FROM "core_task"' in query['sql'])
+        self.assertIn(f'"user_id" = {self.staff.pk}', select['sql'])
+        self.assertIn('sekret', json.dumps(report.queries).lower())
+
+    def test_header_ignored_for_non_staff(self):
+        """Тест: заголовок от обычного пользователя не включает профиль"""
+        response = self.get_as(self.user, HTTP_X_PROFILE='1')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_sampling(self):
+        """Тест: при PROFILER_SAMPLE_RATE=1 профилируется любой запрос"""
+        with self.settings(PROFILER_SAMPLE_RATE=1):
+            response = self.get_as(self.user)
+
+        report = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        self.assertEqual((report.trigger, report.user_id), ('sample', self.user.pk))
+        self.assertTrue(report.profile)
+
+    def test_slow_request_captured_without_profile(self):
+        """Тест: медленный запрос сохраняется с SQL, но без cProfile"""
+        with self.settings(PROFILER_SLOW_REQUEST_MS=0.001, PROFILER_EXPLAIN_THRESHOLD_MS=10_000):
+            response = self.get_as(self.user)
+
+        report = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        self.assertEqual(report.trigger, 'slow')
+        self.assertGreater(report.query_count, 0)
+        self.assertNotIn('explain', report.queries[0])
+        self.assertEqual(report.profile, '')
+        self.assertIsNone(report.stats)
+
+    def test_old_reports_pruned(self):
+        """Тест: хранятся последние PROFILER_MAX_REPORTS отчётов"""
+        with self.settings(PROFILER_SAMPLE_RATE=1, PROFILER_MAX_REPORTS=2):
+            ids = [self.get_as(self.user)['X-Profile-Id'] for _ in range(3)]
+
+        self.assertEqual(sorted(RequestProfile.objects.values_list('request_id', flat=True)), sorted(ids[1:]))
+
+    async def test_async_middleware_chain(self):
+        """Тест: профиль под ASGI (асинхронная цепочка middleware)"""
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.staff).access_token))()
+        response = await self.async_client.get(
+            self.url, headers={'Authorization': f'Bearer {token}', 'X-Profile': '1'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = await RequestProfile.objects.aget(request_id=response['X-Profile-Id'])
+        self.assertEqual(report.trigger, 'header')
+        self.assertGreater(report.query_count, 0)
+
+    def test_admin_browse_and_download(self):
+        """Тест: отчёт в админке, скачивание JSON и данных pstats"""
+        report = RequestProfile.objects.get(
+            request_id=self.get_as(self.staff, HTTP_X_PROFILE='1')['X-Profile-Id']
+        )
+        admin_user = User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.credentials()
+        self.client.force_login(admin_user)
+
+        changelist = self.client.get(reverse('admin:core_requestprofile_changelist'))
+        self.assertContains(changelist, report.request_id)
+        change = self.client.get(reverse('admin:core_requestprofile_change', args=[report.pk]))
+        self.assertContains(change, 'Scan')
+
+        download = self.client.get(reverse('admin:core_requestprofile_download', args=[report.pk, 'json']))
+        self.assertEqual(
+            download['Content-Disposition'], f'attachment; filename="profile-{report.request_id}.json"'
+        )
+        self.assertEqual(json.loads(download.content)['request_id'], report.request_id)
+
+        download = self.client.get(reverse('admin:core_requestprofile_download', args=[report.pk, 'prof']))
+        with tempfile.NamedTemporaryFile(suffix='.prof') as stats_file:
+            stats_file.write(download.content)
+            stats_file.flush()
+            self.assertGreater(pstats.Stats(stats_file.name).total_calls, 0)
+
+
+class UserCacheTest(APITestCase):
+    """Тесты кэша статистики и профиля пользователя"""
+
+    def setUp(self):
+        user_cache.clear()
+        metrics.CACHE_REQUESTS.clear()
+        self.user = User.objects.create_user(username='cacheuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.bulk_create([Task(title=f'Task {i}', user=self.user) for i in range(3)])
+        self.stats_url = reverse('core:task-stats')
+        self.profile_url = reverse('users:user-profile')
+
+    def test_repeated_stats_without_queries(self):
+        """Тест: повторная статистика берётся из памяти процесса"""
+        self.assertEqual(self.client.get(self.stats_url).data['total_tasks'], 3)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.data['total_tasks'], 3)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('task-stats', 'miss'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('task-stats', 'local_hit'), 1)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_dummy_backend(self):
+        """Тест: с CACHE_BACKEND=dummy кэша нет, статистика и профиль не устаревают"""
+        self.assertEqual(self.client.get(self.stats_url).data['total_tasks'], 3)
+        self.assertEqual(self.client.get(self.profile_url).data['email'], '')
+
+        self.client.post(reverse('core:task-list-create'), {'title': 'Новая'})
+        self.user.email = 'cache@test.com'
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.stats_url).data['total_tasks'], 4)
+        self.assertEqual(self.client.get(self.profile_url).data['email'], 'cache@test.com')
+        self.assertEqual(metrics.CACHE_REQUESTS.value('task-stats', 'miss'), 2)
+
+    def test_shared_tier(self):
+        """Тест: без записи в памяти процесса значение читается из общего бэкенда"""
+        self.client.get(self.stats_url)
+        user_cache.clear()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.stats_url)
+
+        self.assertEqual(response.data['total_tasks'], 3)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('task-stats', 'shared_hit'), 1)
+
+    def test_task_write_invalidates_stats(self):
+        """Тест: любое изменение задач пользователя сбрасывает статистику"""
+        self.client.get(self.stats_url)
+        self.client.post(reverse('core:task-list-create'), {'title': 'New'}, format='json')
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.data['total_tasks'], 4)
+
+        task = Task.objects.filter(user=self.user).first()
+        self.client.patch(reverse('core:toggle-task-status', args=[task.id]))
+        response = self.client.get(self.stats_url)
+        self.assertEqual(response.data['completed_tasks'], 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('task-stats', 'miss'), 3)
+
+    def test_other_user_not_invalidated(self):
+        """Тест: изменения задач другого пользователя не сбрасывают статистику"""
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.get(self.stats_url)
+        Task.objects.create(title='Other', user=other)
+        with self.assertNumQueries(0):
+            self.client.get(self.stats_url)
+
+    def test_profile_cached_and_invalidated(self):
+        """Тест: профиль кэшируется и сбрасывается сохранением пользователя"""
+        self.assertEqual(self.client.get(self.profile_url).data['username'], 'cacheuser')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        etag = response['ETag']
+
+        self.user.first_name = 'Иван'
+        self.user.save()
+        response = self.client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Иван')
+
+    def test_concurrent_misses_computed_once(self):
+        """Тест: одновременные промахи по одному ключу вычисляют значение один раз"""
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            time_module.sleep(0.05)
+            return {'value': 42}
+
+        def worker(results):
+            barrier.wait()
+            results.append(user_cache.get_or_set('slow', self.user.pk, compute))
+
+        results = []
+        threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 42}] * 8)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('slow', 'miss'), 1)
+        self.assertEqual(metrics.CACHE_REQUESTS.value('slow', 'coalesced'), 7)
+
+    def test_waits_for_other_process(self):
+        """Тест: значение, которое вычисляет другой процесс, не вычисляется повторно"""
+        key = user_cache.key('slow', self.user.pk)
+        user_cache.shared.add(f'lock:{key}', 1)
+        timer = threading.Timer(0.05, user_cache.shared.set, args=(key, 'computed elsewhere'))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        value = user_cache.get_or_set('slow', self.user.pk, mock.Mock(side_effect=AssertionError))
+        self.assertEqual(value, 'computed elsewhere')
+        self.assertEqual(metrics.CACHE_REQUESTS.value('slow', 'coalesced'), 1)
+
+    def test_counters_exposed(self):
+        """Тест: счётчики попаданий и промахов в /metrics"""
+        self.client.get(self.stats_url)
+        self.client.get(self.stats_url)
+
+        text = metrics.expose()
+        self.assertIn('# TYPE api_cache_requests_total counter', text)
+        self.assertIn('api_cache_requests_total{cache="task-stats",result="miss"} 1', text)
+        self.assertIn('api_cache_requests_total{cache="task-stats",result="local_hit"} 1', text)
+
+
+class TaskFragmentCacheTest(APITestCase):
+    """Тесты кэша представлений задач для списков"""
+
+    def setUp(self):
+        task_fragments.clear()
+        metrics.CACHE_REQUESTS.clear()
+        self.user = User.objects.create_user(username='fragmentuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.tasks = Task.objects.bulk_create([Task(title=f'Task {i}', user=self.user) for i in range(5)])
+        self.url = reverse('core:task-list-create')
+
+    def list_tasks(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {task['id']: task for task in response.data['results']}
+
+    def fragment_requests(self):
+        return (
+            metrics.CACHE_REQUESTS.value('task-fragment', 'local_hit'),
+            metrics.CACHE_REQUESTS.value('task-fragment', 'miss'),
+        )
+
+    def test_unchanged_tasks_not_serialized(self):
+        """Тест: повторный список собирается из кэша с тем же содержимым"""
+        first = self.list_tasks()
+        with mock.patch.object(TaskSerializer, 'to_representation') as to_representation:
+            second = self.list_tasks()
+
+        to_representation.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(self.fragment_requests(), (5, 5))
+
+    def test_only_changed_task_serialized(self):
+        """Тест: после изменения задачи сериализуется только она"""
+        self.list_tasks()
+        task = self.tasks[0]
+        response = self.client.patch(
+            reverse('core:task-detail', args=[task.id]), {'title': 'Changed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(task_fragments.entries.get(task.id))
+
+        tasks = self.list_tasks()
+        self.assertEqual(tasks[task.id]['title'], 'Changed')
+        self.assertEqual(self.fragment_requests(), (4, 6))
+
+    def test_toggle_invalidates(self):
+        """Тест: переключение статуса сбрасывает представление задачи"""
+        self.list_tasks()
+        task = self.tasks[1]
+        self.client.patch(reverse('core:toggle-task-status', args=[task.id]))
+        self.assertIsNone(task_fragments.entries.get(task.id))
+
+        tasks = self.list_tasks()
+        self.assertEqual(tasks[task.id]['status'], 'completed')
+        self.assertTrue(tasks[task.id]['is_completed'])
+
+    def test_changed_updated_at_not_served(self):
+        """Тест: запись с другим updated_at не отдаётся, даже если её не сбросили"""
+        self.list_tasks()
+        task = self.tasks[2]
+        Task.objects.filter(pk=task.pk).update(title='Elsewhere', updated_at=timezone.now())
+
+        self.assertEqual(self.list_tasks()[task.id]['title'], 'Elsewhere')
+
+    def test_admin_edit_invalidates(self):
+        """Тест: изменение задачи в админке сбрасывает её представление"""
+        self.list_tasks()
+        task = self.tasks[3]
+        admin_user = User.objects.create_superuser(username='fragmentadmin', password='testpass123')
+        admin_client = APIClient()
+        admin_client.force_login(admin_user)
+        response = admin_client.post(reverse('admin:core_task_change', args=[task.id]), {
+            'title': 'From admin', 'description': '', 'status': 'completed', 'user': self.user.pk,
+        })
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertIsNone(task_fragments.entries.get(task.id))
+        self.assertEqual(self.list_tasks()[task.id]['title'], 'From admin')
+
+        admin_client.post(reverse('admin:core_task_delete', args=[task.id]), {'post': 'yes'})
+        self.assertIsNone(task_fragments.entries.get(task.id))
+
+    def test_renamed_owner(self):
+        """Тест: после переименования владельца представления пересобираются"""
+        self.list_tasks()
+        self.user.username = 'renameduser'
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        tasks = self.list_tasks()
+        self.assertEqual({task['user'] for task in tasks.values()}, {'renameduser'})
+
+    def test_bounded_lru(self):
+        """Тест: кэш хранит не больше maxsize задач, вытесняя давно не читанные"""
+        fragments = TaskFragmentCache(maxsize=2, ttl=60)
+        for task in self.tasks[:2]:
+            fragments.set(task, {'id': task.id})
+        fragments.get(self.tasks[0])
+        fragments.set(self.tasks[2], {'id': self.tasks[2].id})
+
+        self.assertIsNotNone(fragments.get(self.tasks[0]))
+        self.assertIsNone(fragments.get(self.tasks[1]))
+        self.assertIsNotNone(fragments.get(self.tasks[2]))
+
+
+class TaskSparseFieldsTest(APITestCase):
+    """Тесты ?fields=, ?omit= и ?preview= списка задач"""
+
+    def setUp(self):
+        task_fragments.clear()
+        self.user = User.objects.create_user(username='sparseuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.long_task = Task.objects.create(title='Long', description='ж' * 500, user=self.user)
+        self.short_task = Task.objects.create(title='Short', description='Коротко', user=self.user)
+        self.empty_task = Task.objects.create(title='Empty', user=self.user)
+        self.url = reverse('core:task-list-create')
+
+    def list_tasks(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, getattr(response, 'data', None))
+        select = next(query['sql'] for query in queries.captured_queries if 'SELECT "core_task"."id"' in query['sql'])
+        return {task['id']: task for task in response.data['results']}, select
+
+    def loaded_tasks(self, **params):
+        """Задачи из queryset списка (после фильтров) для проверки отложенных полей"""
+        request = APIRequestFactory().get(self.url, params)
+        force_authenticate(request, user=self.user)
+        view = TaskListCreateView()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        return list(view.filter_queryset(view.get_queryset()))
+
+    def test_fields(self):
+        """Тест: ?fields= сужает ответ и выборку"""
+        tasks, select = self.list_tasks(fields='id,title,is_completed')
+
+        self.assertEqual(list(tasks[self.short_task.id]), ['id', 'title', 'is_completed'])
+        self.assertNotIn('"core_task"."description"', select)
+        self.assertIn('"core_task"."status"', select)
+        self.assertEqual(
+            self.loaded_tasks(fields='id,title')[0].get_deferred_fields(),
+            {'description', 'status', 'search_vector'}
+        )
+
+    def test_omit(self):
+        """Тест: ?omit= исключает поля из ответа и выборки"""
+        tasks, select = self.list_tasks(omit='description,user')
+
+        self.assertEqual(
+            list(tasks[self.short_task.id]),
+            ['id', 'title', 'status', 'created_at', 'updated_at', 'is_completed']
+        )
+        self.assertNotIn('"core_task"."description"', select)
+
+    def test_unknown_field(self):
+        """Тест: неизвестное поле - 400"""
+        response = self.client.get(self.url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', response.data['fields'][0])
+
+        response = self.client.get(self.url, {'omit': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('omit', response.data)
+
+    def test_preview(self):
+        """Тест: ?preview=1 отдаёт описание, сокращённое в БД"""
+        tasks, select = self.list_tasks(preview='1', fields='id,title,description')
+
+        self.assertEqual(tasks[self.long_task.id]['description'], 'ж' * DESCRIPTION_PREVIEW_LENGTH + '…')
+        self.assertEqual(tasks[self.short_task.id]['description'], 'Коротко')
+        self.assertIsNone(tasks[self.empty_task.id]['description'])
+        self.assertIn('"description_preview"', select)
+        for task in self.loaded_tasks(preview='1'):
+            self.assertIn('description', task.get_deferred_fields())
+
+    def test_sorting_and_pagination(self):
+        """Тест: следующая страница при сортировке по неотображаемому столбцу"""
+        response = self.client.get(self.url, {'fields': 'id', 'ordering': 'title', 'page_size': 2})
+        self.assertEqual([task['id'] for task in response.data['results']], [self.empty_task.id, self.long_task.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(response.data['next'])
+        self.assertEqual([task['id'] for task in response.data['results']], [self.short_task.id])
+        # Отложенные столбцы не догружаются по одной строке
+        self.assertEqual(sum('"core_task"' in query['sql'] for query in queries.captured_queries), 2)
+
+    def test_fragments_reused_for_fields(self):
+        """Тест: сокращённый список берёт поля из кэша полных представлений"""
+        self.list_tasks()
+        with mock.patch.object(TaskSerializer, 'to_representation') as to_representation:
+            response = self.client.get(self.url, {'fields': 'title,user'})
+
+        to_representation.assert_not_called()
+        self.assertEqual(response.data['results'][0], {'title': 'Empty', 'user': 'sparseuser'})
+
+    def test_create_ignores_fields(self):
+        """Тест: ?fields= не влияет на создание задачи"""
+        response = self.client.post(f'{self.url}?fields=id', {'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('description', response.data['task'])
+
+
+class BenchmarkReportTest(SimpleTestCase):
+    """Тесты сводки и сравнения отчётов benchmark_api"""
+
+    def test_summarize(self):
+        """Тест сводки: перцентили по успешным ответам, ошибки по кодам"""
+        result = LoadResult(timings=[i / 1000 for i in range(1, 101)], errors={500: 2, 0: 1}, elapsed=2)
+        summary = summarize(result)
+
+        self.assertEqual(summary['requests'], 103)
+        self.assertEqual(summary['errors'], 3)
+        self.assertEqual(summary['error_statuses'], {'0': 1, '500': 2})
+        self.assertEqual(summary['rps'], 50.0)
+        self.assertEqual((summary['p50_ms'], summary['p95_ms'], summary['p99_ms']), (51.0, 96.0, 100.0))
+        self.assertEqual(summarize(LoadResult())['p99_ms'], 0.0)
+
+    def test_compare(self):
+        """Тест сравнения: регрессией считается ухудшение больше порога"""
+        def report(p95, rps, errors=0):
+            return {'results': {'list': {'p95_ms': p95, 'rps': rps, 'errors': errors, 'requests': 100}}}
+
+        self.assertEqual(compare(report(10, 100), report(11.5, 85), 0.2), [])
+        self.assertEqual(compare(report(10, 100), {'results': {'new': report(50, 1)['results']['list']}}, 0.2), [])
+        regressions = compare(report(10, 100), report(13, 70, errors=30), 0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(all(line.startswith('list: ') for line in regressions))
+
+
+class JSONRendererParserTest(SimpleTestCase):
+    """Тесты для JSON-рендерера и парсера на orjson"""
+
+    data = {
+        'results': [{
+            'id': 1,
+            'title': 'Задача \u2028 с разделителем \u2029',
+            'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'due': date(2024, 5, 2),
+            'at': time(9, 15, 30, 500000),
+            'spent': timedelta(hours=1, seconds=5),
+            'price': Decimal('12.50'),
+            'tags': ('a', 'b'),
+            'flags': {True, False} - {True},
+            'ratio': 0.25,
+            'empty': None,
+        }],
+        'huge': 2 ** 70,
+    }
+
+    def test_renderer_matches_stock_output(self):
+        """Тест совпадения вывода со стандартным JSONRenderer"""
+        self.assertEqual(
+            JSONRenderer().render(self.data),
+            renderers.JSONRenderer().render(self.data)
+        )
+        self.assertEqual(
+            JSONRenderer().render(self.data['results']),
+            renderers.JSONRenderer().render(self.data['results'])
+        )
+
+    def test_renderer_non_finite_floats(self):
+        """Тест: NaN и бесконечность - ValueError, как у стандартного рендерера, а не null"""
+        for value in (float('nan'), float('inf'), -float('inf')):
+            data = {'results': [{'ratio': value, 'empty': None}]}
+            with self.assertRaises(ValueError):
+                renderers.JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+
+        # Без STRICT_JSON - NaN, как у стандартного рендерера
+        renderer, stock = JSONRenderer(), renderers.JSONRenderer()
+        renderer.strict = stock.strict = False
+        self.assertEqual(renderer.render({'ratio': float('nan')}), b'{"ratio":NaN}')
+        self.assertEqual(renderer.render({'ratio': float('nan')}), stock.render({'ratio': float('nan')}))
+
+    def test_renderer_indent_and_none(self):
+        """Тест отступов и пустого ответа"""
+        self.assertEqual(
+            JSONRenderer().render(self.data, 'application/json; indent=2'),
+            renderers.JSONRenderer().render(self.data, 'application/json; indent=2')
+        )
+        self.assertEqual(JSONRenderer().render(None), b'')
+
+    def test_renderer_without_orjson(self):
+        """Тест рендеринга стандартным json без orjson"""
+        with mock.patch('apps.core.renderers.orjson', None):
+            self.assertEqual(
+                JSONRenderer().render(self.data),
+                renderers.JSONRenderer().render(self.data)
+            )
+
+    def test_parser_matches_stock_parser(self):
+        """Тест совпадения разбора со стандартным JSONParser"""
+        raw = '{"title": "Задача", "items": [1, 2.5, null, true], "nested": {"a": "\\u2028"}}'.encode()
+        self.assertEqual(
+            JSONParser().parse(BytesIO(raw)),
+            parsers.JSONParser().parse(BytesIO(raw))
+        )
+
+    def test_parser_errors_match_stock_parser(self):
+        """Тест ошибок разбора: сообщения как у стандартного JSONParser"""
+        for raw in (b'{"title": ', b'{"value": NaN}', b'\xef\xbb\xbf{}'):
+            with self.subTest(raw=raw):
+                with self.assertRaises(ParseError) as stock:
+                    parsers.JSONParser().parse(BytesIO(raw))
+                with self.assertRaises(ParseError) as fast:
+                    JSONParser().parse(BytesIO(raw))
+                self.assertEqual(str(fast.exception.detail), str(stock.exception.detail))
+
+    def test_api_parses_json_body(self):
+        """Тест разбора JSON-тела запроса API"""
+        request = APIRequestFactory().post(
+            '/', '{"title": "Задача"}', content_type='application/json; charset=utf-8'
+        )
+        request = Request(request, parsers=[JSONParser()])
+        self.assertEqual(request.data, {'title': 'Задача'})
+
+
+class DenyThrottle(BaseThrottle):
+    """Троттлинг, отклоняющий любой запрос"""
+
+    def allow_request(self, request, view):
+        return False
+
+    def wait(self):
+        return 30
+
+
+class ViewInitialTest(APITestCase):
+    """Тесты троттлинга и версии API в представлениях задач"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='initialuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('core:task-list-create')
+
+    def test_throttled(self):
+        """Тест: троттлинг представления отклоняет запрос с 429 и Retry-After"""
+        with mock.patch('apps.core.views.TaskListCreateView.throttle_classes', [DenyThrottle]):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_invalid_version(self):
+        """Тест: версия API проверяется до обработчика"""
+        versioning = type('Versioning', (QueryParameterVersioning,), {'allowed_versions': ['1.0']})
+        with mock.patch('apps.core.views.TaskListCreateView.versioning_class', versioning):
+            self.assertEqual(self.client.get(self.url, {'version': '1.0'}).status_code, status.HTTP_200_OK)
+            response = self.client.get(self.url, {'version': '2.0'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskAPITest(TaskAPITest):
+    """Тесты API задач через асинхронные представления (ASYNC_VIEWS=True)"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskKeysetPaginationTest(TaskKeysetPaginationTest):
+    """Keyset-пагинация через асинхронное представление списка"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskQueryCountTest(TaskQueryCountTest):
+    """Асинхронные представления выполняют те же запросы, что и синхронные"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskConditionalRequestTest(TaskConditionalRequestTest):
+    """ETag и Last-Modified асинхронных представлений"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskToggleTest(TaskToggleTest):
+    """Переключение статуса через асинхронное представление"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncMetricsTest(MetricsTest):
+    """Метрики асинхронных представлений"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncEndpointBudgetTest(EndpointBudgetTest):
+    """Тесты бюджетов маршрутов с асинхронными представлениями (ASYNC_VIEWS=True)"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncUserCacheTest(UserCacheTest):
+    """Тесты кэша пользователя для асинхронных представлений"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskFragmentCacheTest(TaskFragmentCacheTest):
+    """Тесты кэша представлений задач для асинхронных представлений"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncTaskSparseFieldsTest(TaskSparseFieldsTest):
+    """Тесты ?fields=, ?omit= и ?preview= асинхронного списка задач"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncViewInitialTest(ViewInitialTest):
+    """Тесты троттлинга и версии API в асинхронных представлениях"""
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncReadOnlyReplicaTest(ReadOnlyReplicaTest):
+    """Тесты реплики только для чтения с асинхронными представлениями"""
@@ -1,14 +1,30 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'core'
 
 urlpatterns = [
     # Статистика (должна быть перед tasks/<int:pk>/ для правильного роутинга)
     path('tasks/stats/', views.task_stats_view, name='task-stats'),
+    path('tasks/sync/', views.task_sync_view, name='task-sync'),
+    path('tasks/export/', views.TaskExportView.as_view(), name='task-export'),
+    path('tasks/import/', views.TaskImportView.as_view(), name='task-import'),
     
     # Задачи CRUD
     path('tasks/', views.TaskListCreateView.as_view(), name='task-list-create'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
     path('tasks/<int:task_id>/toggle/', views.toggle_task_status_view, name='toggle-task-status'),
-] 
\ No newline at end of file
+    path('tasks/toggle/', views.toggle_tasks_status_view, name='toggle-tasks-status'),
+    
+    # Групповые операции
+    path('tasks/bulk/', views.TaskBulkView.as_view(), name='task-bulk'),
+    path('tasks/bulk/status/', views.TaskBulkStatusView.as_view(), name='task-bulk-status'),
+]
+
+# Те же маршруты с асинхронными представлениями для ASGI (config/urls_async.py)
+async_urlpatterns = async_views.with_async_views(urlpatterns, {
+    'task-list-create': async_views.TaskListCreateView.as_view(),
+    'task-detail': async_views.TaskDetailView.as_view(),
+    'task-stats': async_views.TaskStatsView.as_view(),
+    'toggle-task-status': async_views.ToggleTaskStatusView.as_view(),
+})
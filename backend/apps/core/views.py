@@ -1,25 +1,93 @@
+import re
+
 from django.shortcuts import render
+from django.db import transaction
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.utils import timezone
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Case, F, Q, TextField, Value, When
+from django.db.models.functions import Concat, Left, Length
+from django.db.models.lookups import GreaterThan
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Task
+from apps.users.authentication import StatelessJWTAuthentication
+from .conditional import (
+    check_preconditions,
+    set_validators,
+    task_validators,
+    user_tasks_validators
+)
+from . import metrics
+from .cache import task_fragments, user_cache
+from .filters import TaskSearchFilter
+from .imports import (
+    COPY_MIN_SIZE,
+    FORMATS,
+    ImportFormatError,
+    detect_format,
+    import_tasks,
+    iter_rows
+)
+from .models import Task, TaskCounters
+from .pagination import TaskPagination
+from .renderers import CSVRenderer, JSONRenderer, NDJSONRenderer
+from .sync import ExpiredCursor, InvalidCursor, get_changes
 from .serializers import (
     TaskSerializer, 
     TaskCreateSerializer,
-    TaskUpdateSerializer
+    TaskUpdateSerializer,
+    TaskIdsSerializer,
+    TaskBulkStatusSerializer
 )
 
+# Задачам достаточно ID и username владельца: пользователь не загружается из БД
+TASK_AUTHENTICATION_CLASSES = [StatelessJWTAuthentication]
+# Максимальное число задач в одном групповом запросе
+BULK_MAX_ITEMS = 1000
+# Размер страницы дельта-синхронизации по умолчанию и максимальный
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 1000
+# Сколько строк выгрузки читать из серверного курсора за раз
+EXPORT_CHUNK_SIZE = 2000
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+# Размер пакета импорта и сколько ошибок строк возвращать (остальные только считаются)
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+# Длина описания в списке задач с ?preview=1 (обрезается в БД)
+DESCRIPTION_PREVIEW_LENGTH = 200
+PREVIEW_ELLIPSIS = '…'
+
+
+
+def description_preview(length=DESCRIPTION_PREVIEW_LENGTH):
+    """Первые length символов описания (с многоточием, если оно длиннее) - выражение для БД"""
+    return Case(
+        When(
+            GreaterThan(Length('description'), length),
+            then=Concat(Left('description', length), Value(PREVIEW_ELLIPSIS)),
+        ),
+        default=F('description'),
+        output_field=TextField(),
+    )
 
 
 class TaskListCreateView(generics.ListCreateAPIView):
     """API для получения списка задач и создания новых задач"""
     
+    authentication_classes = TASK_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = TaskPagination
+    # TaskSearchFilter после OrderingFilter: без ?ordering= сортирует по релевантности
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, TaskSearchFilter]
     filterset_fields = ['status']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'status', 'title']
@@ -35,6 +103,73 @@ class TaskListCreateView(generics.ListCreateAPIView):
             return TaskCreateSerializer
         return TaskSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        """Список выводит только поля из ?fields= / ?omit=, описание - сокращённым при ?preview=1"""
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_field_names())
+            kwargs.setdefault('preview', self.is_preview())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        """
+        Из БД читаются только столбцы выводимых полей, столбцы сортировки
+        (нужны курсору пагинации), updated_at (ключ кэша представлений) и
+        владелец. Сокращённое описание вычисляется в БД, полное не читается
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+
+        names = self.get_field_names()
+        preview = self.is_preview() and 'description' in names
+        columns = {'id', 'user', 'created_at', 'updated_at'}
+        for name in names:
+            if not (preview and name == 'description'):
+                columns.update(TaskSerializer.field_columns.get(name, (name,)))
+        concrete = {field.name for field in Task._meta.concrete_fields}
+        columns.update(
+            name for name in (key.lstrip('-') for key in queryset.query.order_by if isinstance(key, str))
+            if name in concrete
+        )
+        queryset = queryset.only(*columns)
+        if preview:
+            queryset = queryset.annotate(description_preview=description_preview())
+        return queryset
+
+    def get_field_names(self):
+        """Поля TaskSerializer из ?fields= за вычетом ?omit=; неизвестное поле - 400"""
+        if not hasattr(self, '_field_names'):
+            available = TaskSerializer.Meta.fields
+            params = self.request.query_params
+            selected = {
+                param: [name.strip() for name in params[param].split(',') if name.strip()]
+                for param in ('fields', 'omit') if param in params
+            }
+            for param, names in selected.items():
+                unknown = [name for name in names if name not in available]
+                if unknown:
+                    raise ValidationError({param: [
+                        f'Неизвестные поля: {", ".join(unknown)}. Доступны: {", ".join(available)}'
+                    ]})
+            names = selected.get('fields') or available
+            omit = set(selected.get('omit', ()))
+            self._field_names = [name for name in available if name in names and name not in omit]
+        return self._field_names
+
+    def is_preview(self):
+        return self.request.query_params.get('preview', '').lower() in ('1', 'true')
+
+    def list(self, request, *args, **kwargs):
+        """Список задач с ETag по версии данных пользователя: 304 без выборки и сериализации"""
+        counters = TaskCounters.objects.for_user(request.user)
+        etag, last_modified = user_tasks_validators(request, counters, 'tasks')
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
     def perform_create(self, serializer):
         """Автоматическое назначение текущего пользователя при создании задачи"""
         serializer.save(user=self.request.user)
@@ -47,19 +182,150 @@ class TaskListCreateView(generics.ListCreateAPIView):
         task = serializer.instance
         
         return Response({
-            'task': TaskSerializer(task).data,
+            'task': TaskSerializer(task, context=self.get_serializer_context()).data,
             'message': 'Задача успешно создана'
         }, status=status.HTTP_201_CREATED)
 
 
+class TaskExportView(generics.GenericAPIView):
+    """
+    Выгрузка всех задач пользователя потоком: NDJSON по умолчанию, CSV по
+    ?format=csv или Accept: text/csv. Фильтры status/search/ordering - как у
+    списка задач. Строки читаются серверным курсором по EXPORT_CHUNK_SIZE,
+    поэтому память не зависит от числа задач. Если клиент принимает gzip,
+    ответ сжимается на лету
+    """
+
+    authentication_classes = TASK_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    serializer_class = TaskSerializer
+    filter_backends = TaskListCreateView.filter_backends
+    filterset_fields = TaskListCreateView.filterset_fields
+    search_fields = TaskListCreateView.search_fields
+    ordering_fields = TaskListCreateView.ordering_fields
+    ordering = TaskListCreateView.ordering
+
+    def get_queryset(self):
+        """Возвращает только задачи текущего пользователя"""
+        return Task.objects.filter(user=self.request.user)
+
+    def handle_exception(self, exc):
+        """Ошибки отдаются в JSON, как в остальном API"""
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get_rows(self, queryset):
+        """
+        Строки в порядке полей TaskSerializer. Значения берутся через
+        values_list без создания моделей, даты форматируются полями сериализатора
+        """
+        fields = self.get_serializer().fields
+        created_at, updated_at = fields['created_at'], fields['updated_at']
+        owner = str(self.request.user)
+        rows = queryset.values_list('id', 'title', 'description', 'status', 'created_at', 'updated_at')
+        for pk, title, description, task_status, created, updated in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield (
+                pk, title, description, task_status,
+                created_at.to_representation(created), updated_at.to_representation(updated),
+                owner, task_status == 'completed',
+            )
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        content = renderer.render_rows(self.get_rows(queryset), self.get_serializer().Meta.fields)
+
+        if ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = StreamingHttpResponse(compress_sequence(content))
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = StreamingHttpResponse(content)
+        response['Content-Type'] = f'{renderer.media_type}; charset={renderer.charset}'
+        response['Content-Disposition'] = f'attachment; filename="tasks.{renderer.format}"'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
+
+
+class TaskImportView(generics.GenericAPIView):
+    """
+    Импорт задач из файла NDJSON или CSV (multipart, поле file; формат - по
+    полю format, расширению или типу файла). Файл читается построчно, строки
+    проверяются TaskCreateSerializer и сохраняются пакетами по
+    IMPORT_BATCH_SIZE, большие файлы - через COPY. Ответ содержит ошибки по
+    строкам и checkpoint - номер последней сохранённой строки: прерванный
+    импорт продолжается повторной загрузкой с ?start=checkpoint
+    """
+
+    authentication_classes = TASK_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'Передайте файл в поле file'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format') or detect_format(upload.name, upload.content_type or '')
+        if file_format not in FORMATS:
+            return Response({
+                'error': f'Формат файла должен быть одним из: {", ".join(FORMATS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        start = request.query_params.get('start', '0')
+        if not start.isdigit():
+            return Response({
+                'error': 'start должен быть неотрицательным целым числом'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = []
+
+        def on_error(row, row_errors):
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({'row': row, 'errors': row_errors})
+
+        try:
+            result = import_tasks(
+                request.user, iter_rows(upload.file, file_format),
+                batch_size=IMPORT_BATCH_SIZE, use_copy=upload.size >= COPY_MIN_SIZE,
+                start=int(start), on_error=on_error,
+            )
+        except ImportFormatError as exc:
+            return Response({
+                'created': exc.result.created,
+                'failed': exc.result.failed,
+                'checkpoint': exc.result.checkpoint,
+                'errors': errors,
+                'error': f'Строка {exc.row}: {exc}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'created': result.created,
+            'failed': result.failed,
+            'checkpoint': result.checkpoint,
+            'errors': errors,
+            'message': f'Создано задач: {result.created}, строк с ошибками: {result.failed}'
+        }, status=status.HTTP_200_OK)
+
+
 class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     """API для получения, обновления и удаления конкретной задачи"""
     
+    authentication_classes = TASK_AUTHENTICATION_CLASSES
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        """Возвращает только задачи текущего пользователя"""
-        return Task.objects.filter(user=self.request.user)
+        """
+        Возвращает только задачи текущего пользователя. При изменении строка
+        блокируется, чтобы проверка If-Match и запись были атомарными
+        """
+        queryset = Task.objects.filter(user=self.request.user)
+        if self.request.method in ('PUT', 'PATCH', 'DELETE'):
+            queryset = queryset.select_for_update()
+        return queryset
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от действия"""
@@ -67,22 +333,45 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
             return TaskUpdateSerializer
         return TaskSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """Получение задачи; при совпадении ETag - 304 без сериализации"""
+        instance = self.get_object()
+        etag, last_modified = task_validators(instance)
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+    @transaction.atomic
     def update(self, request, *args, **kwargs):
-        """Обновление задачи с дополнительными сообщениями"""
+        """Обновление задачи с дополнительными сообщениями; If-Match - оптимистичная блокировка"""
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
+        precondition_failed = check_preconditions(request, *task_validators(instance))
+        if precondition_failed is not None:
+            return precondition_failed
+        
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         task = serializer.save()
+        task_fragments.invalidate([task.pk])
 
-        return Response({
-            'task': TaskSerializer(task).data,
+        response = Response({
+            'task': TaskSerializer(task, context=self.get_serializer_context()).data,
             'message': 'Задача успешно обновлена'
         }, status=status.HTTP_200_OK)
+        return set_validators(response, *task_validators(task))
 
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
-        """Удаление задачи с подтверждающим сообщением"""
+        """Удаление задачи с подтверждающим сообщением; If-Match - оптимистичная блокировка"""
         instance = self.get_object()
+        precondition_failed = check_preconditions(request, *task_validators(instance))
+        if precondition_failed is not None:
+            return precondition_failed
+        
         instance.delete()
         return Response({
             'message': 'Задача успешно удалена'
@@ -90,16 +379,25 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 @api_view(['GET'])
+@authentication_classes(TASK_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 def task_stats_view(request):
-    """API для получения статистики задач пользователя"""
+    """
+    API для получения статистики задач пользователя. Счётчики берутся из
+    user_cache: повторный запрос до изменения задач не обращается к БД
+    """
     
-    user_tasks = Task.objects.filter(user=request.user)
+    user = request.user
+    counters = user_cache.get_or_set('task-stats', user.pk, lambda: TaskCounters.objects.for_user(user))
+    etag, last_modified = user_tasks_validators(request, counters, 'stats')
+    not_modified = check_preconditions(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
     
     stats = {
-        'total_tasks': user_tasks.count(),
-        'completed_tasks': user_tasks.filter(status='completed').count(),
-        'pending_tasks': user_tasks.filter(status='pending').count(),
+        'total_tasks': counters.total,
+        'completed_tasks': counters.completed,
+        'pending_tasks': counters.pending,
     }
     
     stats['completion_rate'] = (
@@ -107,26 +405,258 @@ def task_stats_view(request):
         if stats['total_tasks'] > 0 else 0
     )
     
-    return Response(stats, status=status.HTTP_200_OK)
+    return set_validators(Response(stats, status=status.HTTP_200_OK), etag, last_modified)
 
 
 @api_view(['PATCH'])
+@authentication_classes(TASK_AUTHENTICATION_CLASSES)
 @permission_classes([IsAuthenticated])
 def toggle_task_status_view(request, task_id):
     """API для быстрого переключения статуса задачи"""
     
-    try:
-        task = Task.objects.get(id=task_id, user=request.user)
-    except Task.DoesNotExist:
+    tasks = Task.objects.filter(id=task_id, user=request.user).toggle_status()
+    if not tasks:
         return Response({
             'error': 'Задача не найдена'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Переключение статуса
-    task.status = 'completed' if task.status == 'pending' else 'pending'
-    task.save()
-    
+    task = tasks[0]
+    task_fragments.invalidate([task.pk])
     return Response({
-        'task': TaskSerializer(task).data,
+        'task': TaskSerializer(task, context={'request': request}).data,
         'message': f'Статус задачи изменен на "{task.get_status_display()}"'
     }, status=status.HTTP_200_OK)
+
+
+@api_view(['PATCH'])
+@authentication_classes(TASK_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def toggle_tasks_status_view(request):
+    """API для переключения статуса нескольких задач одним запросом"""
+    
+    serializer = TaskIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    
+    tasks = Task.objects.filter(id__in=ids, user=request.user).toggle_status()
+    by_id = {task.id: task for task in tasks}
+    ordered = [by_id[task_id] for task_id in dict.fromkeys(ids) if task_id in by_id]
+    
+    return Response({
+        'tasks': TaskSerializer(ordered, many=True, context={'request': request}).data,
+        'not_found': [task_id for task_id in dict.fromkeys(ids) if task_id not in by_id],
+        'message': f'Статус изменен у задач: {len(ordered)}'
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@authentication_classes(TASK_AUTHENTICATION_CLASSES)
+@permission_classes([IsAuthenticated])
+def task_sync_view(request):
+    """
+    API дельта-синхронизации: задачи, изменённые после ?cursor=, и ID
+    удалённых задач. Без курсора отдаются все задачи пользователя.
+    Клиент повторяет запрос с новым курсором, пока has_more истинно
+    """
+    
+    try:
+        limit = min(int(request.query_params.get('limit', SYNC_PAGE_SIZE)), SYNC_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = SYNC_PAGE_SIZE
+    if limit < 1:
+        limit = SYNC_PAGE_SIZE
+    
+    try:
+        changes = get_changes(request.user, request.query_params.get('cursor'), limit)
+    except InvalidCursor:
+        return Response({
+            'error': 'Неверный курсор'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except ExpiredCursor:
+        return Response({
+            'error': 'Курсор устарел, выполните полную синхронизацию'
+        }, status=status.HTTP_410_GONE)
+    
+    changes['tasks'] = TaskSerializer(
+        changes['tasks'], many=True, context={'request': request}
+    ).data
+    return Response(changes, status=status.HTTP_200_OK)
+
+
+class TaskBulkMixin:
+    """Общие настройки групповых операций: задачи текущего пользователя и фильтры списка"""
+    
+    authentication_classes = TASK_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter]
+    filterset_fields = ['status']
+    search_fields = ['title', 'description']
+
+    def get_queryset(self):
+        """Возвращает только задачи текущего пользователя"""
+        return Task.objects.filter(user=self.request.user)
+
+    def get_target_queryset(self, ids):
+        """
+        Задачи по списку ids, а без него - по фильтрам ?status= и ?search=.
+        Без ids и без фильтров возвращает None, чтобы запрос не затронул все задачи случайно
+        """
+        if ids:
+            return self.get_queryset().filter(id__in=ids)
+        # Фильтр считается заданным, только если он действительно сужает выборку:
+        # ?search=%20 фильтр поиска пропускает, и запрос затронул бы все задачи
+        status_filter = self.request.query_params.get('status')
+        has_status = status_filter in dict(Task.STATUS_CHOICES)
+        if not has_status and not TaskSearchFilter().get_search_terms(self.request):
+            return None
+        return self.filter_queryset(self.get_queryset())
+
+    def target_required_response(self):
+        return Response({
+            'error': 'Укажите ids или фильтр (?status=, ?search=)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskBulkView(TaskBulkMixin, generics.GenericAPIView):
+    """
+    API для групповых операций с задачами в одной транзакции:
+    POST - создание, PATCH - обновление, DELETE - удаление.
+    При ошибке валидации ничего не сохраняется, ошибки возвращаются по каждому элементу
+    """
+
+    def get_items(self, request):
+        items = request.data.get('tasks') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return None, Response({
+                'error': 'Передайте непустой список tasks'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return None, Response({
+                'error': f'Не больше {BULK_MAX_ITEMS} задач за запрос'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return items, None
+
+    def post(self, request, *args, **kwargs):
+        """Создание задач одним bulk_create"""
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        serializer = TaskCreateSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = Task.objects.bulk_create([
+            Task(user=request.user, **data) for data in serializer.validated_data
+        ])
+        return Response({
+            'tasks': TaskSerializer(tasks, many=True, context=self.get_serializer_context()).data,
+            'message': f'Создано задач: {len(tasks)}'
+        }, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def get_item_id(item):
+        """id элемента обновления или None; true/false - не id, хотя bool - подкласс int"""
+        task_id = item.get('id') if isinstance(item, dict) else None
+        return task_id if type(task_id) is int else None
+
+    def patch(self, request, *args, **kwargs):
+        """Частичное обновление задач одним bulk_update"""
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        with transaction.atomic():
+            ids = [self.get_item_id(item) for item in items]
+            instances = {
+                task.id: task
+                for task in self.get_queryset().filter(
+                    id__in=[i for i in ids if i is not None]
+                ).select_for_update()
+            }
+
+            errors, validated, seen = [], [], set()
+            for item, task_id in zip(items, ids):
+                if task_id not in instances or task_id in seen:
+                    message = 'Повторяющийся id' if task_id in seen else 'Задача не найдена'
+                    errors.append({'id': [message]})
+                    continue
+                seen.add(task_id)
+                serializer = TaskUpdateSerializer(instances[task_id], data=item, partial=True)
+                if serializer.is_valid():
+                    errors.append({})
+                    validated.append((instances[task_id], serializer.validated_data))
+                else:
+                    errors.append(serializer.errors)
+
+            if any(errors):
+                return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = {'updated_at'}
+            now = timezone.now()
+            for task, data in validated:
+                for field, value in data.items():
+                    setattr(task, field, value)
+                task.updated_at = now
+                fields |= data.keys()
+            tasks = [task for task, _ in validated]
+            Task.objects.bulk_update(tasks, sorted(fields))
+
+        return Response({
+            'tasks': TaskSerializer(tasks, many=True, context=self.get_serializer_context()).data,
+            'message': f'Обновлено задач: {len(tasks)}'
+        }, status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        """Удаление задач по ids или по фильтрам одним DELETE"""
+        ids = None
+        if request.data:
+            serializer = TaskIdsSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            ids = serializer.validated_data['ids']
+
+        queryset = self.get_target_queryset(ids)
+        if queryset is None:
+            return self.target_required_response()
+
+        deleted, _ = queryset.delete()
+        return Response({
+            'deleted': deleted,
+            'message': f'Удалено задач: {deleted}'
+        }, status=status.HTTP_200_OK)
+
+
+class TaskBulkStatusView(TaskBulkMixin, generics.GenericAPIView):
+    """
+    API для смены статуса многих задач одним UPDATE: по списку ids или по
+    фильтрам списка, например «отметить выполненными все невыполненные
+    задачи по ?search=»: PATCH /tasks/bulk/status/?status=pending&search=... {"status": "completed"}
+    """
+
+    def patch(self, request, *args, **kwargs):
+        serializer = TaskBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        queryset = self.get_target_queryset(serializer.validated_data.get('ids'))
+        if queryset is None:
+            return self.target_required_response()
+
+        updated = queryset.set_status(serializer.validated_data['status'])
+        return Response({
+            'updated': updated,
+            'message': f'Статус изменен у задач: {updated}'
+        }, status=status.HTTP_200_OK)
+
+
+def metrics_view(request):
+    """
+    Метрики запросов в текстовом формате Prometheus. 404, если метрики
+    выключены или METRICS_TOKEN не задан вне DEBUG: без токена эндпоинт
+    открыт всем, поэтому так его можно опрашивать только при разработке
+    """
+    token = settings.METRICS_TOKEN
+    if not settings.METRICS_ENABLED or not (token or settings.DEBUG):
+        raise Http404
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
-    verbose_name = 'Пользователи' 
\ No newline at end of file
+    verbose_name = 'Пользователи'
+
+    def ready(self):
+        # Сброс кэша аутентификации при изменении пользователей
+        from . import authentication  # noqa: F401
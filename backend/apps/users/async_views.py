@@ -0,0 +1,33 @@
+"""
+Асинхронная версия профиля для ASGI (см. apps/core/async_views.py)
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core.async_views import AsyncAPIView
+from apps.core.cache import user_cache
+from apps.core.conditional import check_preconditions, make_etag, set_validators
+from . import views
+
+
+class UserProfileView(AsyncAPIView):
+    """Профиль текущего пользователя из user_cache"""
+
+    sync_view = views.user_profile_view.cls
+
+    async def get(self, view, request, *args, **kwargs):
+        user_id = request.user.pk
+        data = user_cache.peek('user-profile', user_id)
+        if data is None:
+            data = await sync_to_async(user_cache.get_or_set)(
+                'user-profile', user_id, partial(views.load_profile, user_id),
+            )
+        etag = make_etag('profile', *data.values())
+        not_modified = check_preconditions(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        return set_validators(Response(data, status=status.HTTP_200_OK), etag)
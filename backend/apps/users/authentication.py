@@ -0,0 +1,197 @@
+"""
+JWT-аутентификация без загрузки пользователя из БД на каждый запрос
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с ограниченным временем жизни записей"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, deadline = entry
+            if deadline <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires=None):
+        """Сохраняет значение на ttl секунд, но не дольше expires (unix time)"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires is not None:
+            deadline = min(deadline, expires)
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Проверенные access-токены (по сырому значению) и (версия, (username, is_active)) по ID пользователя
+token_cache = TTLCache(settings.JWT_AUTH_CACHE_SIZE, settings.JWT_AUTH_CACHE_TTL)
+user_state_cache = TTLCache(settings.JWT_AUTH_CACHE_SIZE, settings.JWT_AUTH_CACHE_TTL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    """Деактивация, переименование или удаление пользователя сбрасывает его состояние в кэше"""
+    user_state_cache.pop(instance.pk)
+
+
+def make_token_user(user_id, username):
+    """
+    Экземпляр User только с id и username, помеченный как загруженный из БД:
+    подходит для фильтров и внешних ключей, но не для save()
+    """
+    user = User(id=user_id, username=username, is_active=True)
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """JWTAuthentication simplejwt с асинхронным вариантом для async-представлений"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """get_user через асинхронный ORM"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация эндпоинтов задач: пользователь строится из проверенного
+    claim user_id без загрузки строки auth_user. Проверенные токены и
+    признак активности пользователя кэшируются в процессе на
+    JWT_AUTH_CACHE_TTL секунд (токен - не дольше его exp). Состояние
+    пользователя записано под его версией из user_states: сохранение
+    пользователя через ORM заменяет версию в общем бэкенде, и все процессы
+    перечитывают состояние не позже чем через API_CACHE_LOCAL_TTL секунд.
+    После QuerySet.update(is_active=False) нужен user_states.invalidate().
+    Полей профиля у такого пользователя нет, профиль читается из user_cache
+    """
+
+    def get_validated_token(self, raw_token):
+        token = token_cache.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, token, expires=token['exp'])
+        return token
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        version, state = self.get_cached_state(user_id)
+        if state is None:
+            state = self.remember_state(user_id, version, self.get_state_queryset(user_id).first())
+        return self.make_user(user_id, state)
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        version, state = self.get_cached_state(user_id)
+        if state is None:
+            state = self.remember_state(user_id, version, await self.get_state_queryset(user_id).afirst())
+        return self.make_user(user_id, state)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def get_state_queryset(self, user_id):
+        return (
+            User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list('username', 'is_active')
+        )
+
+    def get_cached_state(self, user_id):
+        """
+        Текущая версия пользователя и состояние из кэша, если оно записано
+        под этой версией (иначе None; без версии в общем бэкенде - всегда None). Версия читается до загрузки из БД:
+        изменение между чтениями заменит её, и запись не будет использована
+        """
+        from apps.core.cache import user_states  # cache импортирует TTLCache отсюда
+
+        version = user_states.version(user_id)
+        entry = user_state_cache.get(user_id)
+        if version is None or entry is None or entry[0] != version:
+            return version, None
+        return version, entry[1]
+
+    def remember_state(self, user_id, version, state):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user_state_cache.set(user_id, (version, state))
+        return state
+
+    def make_user(self, user_id, state):
+        username, is_active = state
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return make_token_user(user_id, username)
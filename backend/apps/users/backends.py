@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import check_user_password, hash_password
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend, хеширующий пароли в пуле (apps.users.hashing) и
+    пересчитывающий устаревшие хеши при входе
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Хеш считается и для несуществующего пользователя, чтобы время
+            # ответа не выдавало, есть ли такой логин
+            hash_password(password)
+        else:
+            if check_user_password(user, password) and self.user_can_authenticate(user):
+                return user
+        return None
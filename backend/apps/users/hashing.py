@@ -0,0 +1,93 @@
+"""
+Хеширование паролей в отдельном ограниченном пуле потоков
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    """Очередь хеширования заполнена: запрос сразу получает 503 с Retry-After"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Сервер перегружен, повторите попытку позже'
+    default_code = 'password_hashing_busy'
+    # DRF добавляет Retry-After для исключений с атрибутом wait
+    wait = 1
+
+
+class HashingPool:
+    """
+    Пул потоков для хеширования паролей. PBKDF2, scrypt и argon2 отпускают
+    GIL, поэтому хеши считаются параллельно, но не больше workers
+    одновременно: всплеск входов не отнимает процессор у остальных
+    эндпоинтов. Сверх workers + queue_size ожидающих задач запрос не
+    встаёт в очередь, а сразу получает PasswordHashingBusy
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Потоки создаются при первом использовании, а не при импорте:
+        # сервер с preload может форкнуть процесс после загрузки модуля
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hashing'
+                )
+            return self._executor
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy()
+
+
+hashing_pool = HashingPool(
+    settings.PASSWORD_HASHING_WORKERS,
+    settings.PASSWORD_HASHING_QUEUE_SIZE,
+    settings.PASSWORD_HASHING_TIMEOUT,
+)
+
+
+def hash_password(raw_password):
+    """make_password в пуле хеширования"""
+    return hashing_pool.run(make_password, raw_password)
+
+
+def check_user_password(user, raw_password):
+    """
+    user.check_password в пуле хеширования. Хеш устаревшего алгоритма или
+    с другими параметрами после успешной проверки пересчитывается
+    основным алгоритмом (PASSWORD_HASHERS[0]) и сохраняется
+    """
+    outdated = False
+
+    def setter(raw_password):
+        nonlocal outdated
+        outdated = True
+
+    valid = hashing_pool.run(check_password, raw_password, user.password, setter)
+    if valid and outdated:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return valid
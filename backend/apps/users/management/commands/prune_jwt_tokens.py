@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    """
+    Удаляет истёкшие выданные refresh-токены вместе с их записями в
+    чёрном списке. В отличие от flushexpiredtokens работает короткими
+    пакетами по индексу expires_at, каждый пакет - отдельная транзакция,
+    поэтому команду можно запускать по расписанию на живой базе.
+    Истёкший токен отклоняется по exp, запись о его отзыве больше не нужна
+    """
+
+    help = 'Удаляет истёкшие refresh-токены и их записи в чёрном списке'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Сколько токенов удалять за один запрос')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Пауза между пакетами в секундах')
+
+    def handle(self, *args, **options):
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('expires_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            # BlacklistedToken удаляется каскадом одним DELETE ... WHERE token_id IN (...)
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Удалено токенов: {deleted}'))
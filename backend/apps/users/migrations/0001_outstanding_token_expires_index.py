@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Индекс по сроку действия выданных refresh-токенов: по нему
+    prune_jwt_tokens выбирает истёкшие токены пакетами.
+    Таблица принадлежит token_blacklist, поэтому индекс создаётся SQL;
+    CONCURRENTLY требует неатомарной миграции.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS users_outstandingtoken_expires_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX CONCURRENTLY IF EXISTS users_outstandingtoken_expires_idx",
+        ),
+    ]
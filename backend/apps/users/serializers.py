@@ -1,6 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .hashing import hash_password
+from .tokens import FilteredRefreshToken, rotation_blacklists
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -37,11 +44,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        """Создание пользователя с зашифрованным паролем"""
+        """Создание пользователя с зашифрованным паролем (хеш считается один раз, в пуле)"""
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = hash_password(password)
         user.save()
         return user
 
@@ -52,4 +61,41 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'date_joined')
-        read_only_fields = ('id', 'date_joined') 
\ No newline at end of file
+        read_only_fields = ('id', 'date_joined')
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Обновление токенов с проверкой отзыва по фильтру в памяти вместо
+    запроса к token_blacklist. Повторное использование уже отозванного
+    токена обнаруживает get_or_create при его отзыве в ходе ротации
+    """
+    
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        if not rotation_blacklists():
+            return super().validate(attrs)
+        
+        refresh = self.token_class(attrs['refresh'])
+        
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id:
+            user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            if not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(
+                    self.error_messages['no_active_account'],
+                    'no_active_account',
+                )
+        
+        _token, created = refresh.blacklist()
+        if not created:
+            raise TokenError(_("Token is blacklisted"))
+        
+        data = {'access': str(refresh.access_token)}
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh.outstand()
+        data['refresh'] = str(refresh)
+        return data
@@ -1,10 +1,26 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth.hashers import get_hasher, make_password
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from apps.core.cache import user_cache, user_states
+from .authentication import token_cache, user_state_cache
+from .hashing import HashingPool
+from .tokens import revocation_filter
+
 # Тесты для приложения users будут здесь
 # Например, тесты для регистрации, авторизации и профилей пользователей 
 
@@ -13,7 +29,7 @@ class UserRegistrationTest(APITestCase):
     
     def test_user_registration_success(self):
         """Тест успешной регистрации пользователя"""
-        url = reverse('user-register')
+        url = reverse('users:user-register')
         data = {
             'username': 'newuser',
             'email': 'newuser@test.com',
@@ -32,7 +48,7 @@ class UserRegistrationTest(APITestCase):
     
     def test_user_registration_password_mismatch(self):
         """Тест регистрации с несовпадающими паролями"""
-        url = reverse('user-register')
+        url = reverse('users:user-register')
         data = {
             'username': 'newuser',
             'email': 'newuser@test.com',
@@ -53,7 +69,7 @@ class UserRegistrationTest(APITestCase):
             password='password123'
         )
         
-        url = reverse('user-register')
+        url = reverse('users:user-register')
         data = {
             'username': 'existinguser',
             'email': 'new@test.com',
@@ -67,7 +83,7 @@ class UserRegistrationTest(APITestCase):
     
     def test_user_registration_invalid_email(self):
         """Тест регистрации с неверным форматом email"""
-        url = reverse('user-register')
+        url = reverse('users:user-register')
         data = {
             'username': 'newuser',
             'email': 'invalid-email',
@@ -92,7 +108,7 @@ class UserLoginTest(APITestCase):
     
     def test_user_login_success(self):
         """Тест успешной авторизации"""
-        url = reverse('user-login')
+        url = reverse('users:user-login')
         data = {
             'username': 'testuser',
             'password': 'testpass123'
@@ -106,7 +122,7 @@ class UserLoginTest(APITestCase):
     
     def test_user_login_wrong_password(self):
         """Тест авторизации с неверным паролем"""
-        url = reverse('user-login')
+        url = reverse('users:user-login')
         data = {
             'username': 'testuser',
             'password': 'wrongpassword'
@@ -118,7 +134,7 @@ class UserLoginTest(APITestCase):
     
     def test_user_login_nonexistent_user(self):
         """Тест авторизации несуществующего пользователя"""
-        url = reverse('user-login')
+        url = reverse('users:user-login')
         data = {
             'username': 'nonexistent',
             'password': 'testpass123'
@@ -130,7 +146,7 @@ class UserLoginTest(APITestCase):
     
     def test_user_login_missing_credentials(self):
         """Тест авторизации без указания учетных данных"""
-        url = reverse('user-login')
+        url = reverse('users:user-login')
         data = {
             'username': 'testuser'
         }
@@ -140,6 +156,66 @@ class UserLoginTest(APITestCase):
         self.assertIn('error', response.data)
 
 
+class PasswordHashingTest(APITestCase):
+    """Тесты для хеширования паролей в пуле"""
+
+    def test_registration_hashes_password_once(self):
+        """Тест однократного хеширования пароля при регистрации"""
+        url = reverse('users:user-register')
+        data = {
+            'username': 'hashonce',
+            'email': 'hashonce@test.com',
+            'password': 'testpass123',
+            'password_confirm': 'testpass123'
+        }
+        with mock.patch('apps.users.hashing.make_password', wraps=make_password) as hasher:
+            response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(hasher.call_count, 1)
+        user = User.objects.get(username='hashonce')
+        self.assertTrue(user.password.startswith(f'{get_hasher().algorithm}$'))
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_legacy_hash_rehashed_on_login(self):
+        """Тест пересчёта устаревшего хеша при входе"""
+        user = User.objects.create_user(username='legacy', password='testpass123')
+        user.password = make_password('testpass123', hasher='pbkdf2_sha256')
+        user.save()
+
+        url = reverse('users:user-login')
+        response = self.client.post(url, {'username': 'legacy', 'password': 'testpass123'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(f'{get_hasher().algorithm}$'))
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_login_rejected_when_pool_is_full(self):
+        """Тест быстрого отказа 503, когда очередь хеширования заполнена"""
+        User.objects.create_user(username='busy', password='testpass123')
+        pool = HashingPool(workers=1, queue_size=0, timeout=5)
+        started, release = threading.Event(), threading.Event()
+
+        def occupy():
+            started.set()
+            release.wait()
+
+        blocker = threading.Thread(target=pool.run, args=(occupy,))
+        blocker.start()
+        try:
+            started.wait()
+            with mock.patch('apps.users.hashing.hashing_pool', pool):
+                url = reverse('users:user-login')
+                response = self.client.post(url, {'username': 'busy', 'password': 'testpass123'})
+        finally:
+            release.set()
+            blocker.join()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+
 class UserProfileTest(APITestCase):
     """Тесты для профиля пользователя"""
     
@@ -160,7 +236,7 @@ class UserProfileTest(APITestCase):
     
     def test_get_user_profile(self):
         """Тест получения профиля пользователя"""
-        url = reverse('user-profile')
+        url = reverse('users:user-profile')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -169,16 +245,36 @@ class UserProfileTest(APITestCase):
         self.assertEqual(response.data['first_name'], 'Test')
         self.assertEqual(response.data['last_name'], 'User')
     
+    def test_get_user_profile_not_modified(self):
+        """Тест: 304 для профиля по ETag"""
+        url = reverse('users:user-profile')
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        # update() сигналов не шлёт - кэш профиля сбрасывается явно
+        User.objects.filter(pk=self.user.pk).update(first_name='Changed')
+        user_cache.invalidate([self.user.pk])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
     def test_get_user_profile_unauthorized(self):
         """Тест получения профиля без авторизации"""
         self.client.credentials()  # Убираем токен
         
-        url = reverse('user-profile')
+        url = reverse('users:user-profile')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncUserProfileTest(UserProfileTest):
+    """Тесты профиля через асинхронное представление (ASYNC_VIEWS=True)"""
+
+
 class UserLogoutTest(APITestCase):
     """Тесты для выхода пользователя"""
     
@@ -197,7 +293,7 @@ class UserLogoutTest(APITestCase):
     
     def test_user_logout_success(self):
         """Тест успешного выхода"""
-        url = reverse('user-logout')
+        url = reverse('users:user-logout')
         data = {
             'refresh': str(self.refresh)
         }
@@ -208,7 +304,7 @@ class UserLogoutTest(APITestCase):
     
     def test_user_logout_without_token(self):
         """Тест выхода без токена"""
-        url = reverse('user-logout')
+        url = reverse('users:user-logout')
         data = {}
         response = self.client.post(url, data)
         
@@ -218,7 +314,7 @@ class UserLogoutTest(APITestCase):
         """Тест выхода без авторизации"""
         self.client.credentials()  # Убираем токен
         
-        url = reverse('user-logout')
+        url = reverse('users:user-logout')
         data = {
             'refresh': str(self.refresh)
         }
@@ -241,7 +337,7 @@ class TokenRefreshTest(APITestCase):
     
     def test_token_refresh_success(self):
         """Тест успешного обновления токена"""
-        url = reverse('token_refresh')
+        url = reverse('users:token_refresh')
         data = {
             'refresh': str(self.refresh)
         }
@@ -252,7 +348,7 @@ class TokenRefreshTest(APITestCase):
     
     def test_token_refresh_invalid_token(self):
         """Тест обновления с неверным токеном"""
-        url = reverse('token_refresh')
+        url = reverse('users:token_refresh')
         data = {
             'refresh': 'invalid_token'
         }
@@ -261,6 +357,155 @@ class TokenRefreshTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TokenRevocationTest(APITestCase):
+    """Тесты отзыва refresh-токенов и очистки чёрного списка"""
+    
+    def setUp(self):
+        revocation_filter.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.url = reverse('users:token_refresh')
+    
+    def test_rotated_token_cannot_be_reused(self):
+        """Тест: старый refresh-токен после ротации отклоняется"""
+        response = self.client.post(self.url, {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+        
+        response = self.client.post(self.url, {'refresh': str(self.refresh)})
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_reuse_detected_without_filter(self):
+        """Тест: отзыв из другого процесса (фильтр ещё не обновлён) обнаруживается при ротации"""
+        revocation_filter.refresh()
+        self.refresh.blacklist()
+        self.assertNotIn(self.refresh['jti'], revocation_filter)
+        
+        response = self.client.post(self.url, {'refresh': str(self.refresh)})
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_without_blacklist_lookup(self):
+        """Тест: обновление не ищет jti в чёрном списке"""
+        revocation_filter.refresh()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'refresh': str(self.refresh)})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lookups = [q['sql'] for q in queries if 'INNER JOIN "token_blacklist_outstandingtoken"' in q['sql']]
+        self.assertEqual(lookups, [])
+    
+    def test_logged_out_token_rejected_from_filter(self):
+        """Тест: токен после выхода отклоняется фильтром без запросов"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        self.client.post(reverse('users:user-logout'), {'refresh': str(self.refresh)})
+        self.client.credentials()
+        revocation_filter.refresh()
+        
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {'refresh': str(self.refresh)})
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_filter_loads_blacklist(self):
+        """Тест: фильтр догружает отозванные токены из БД"""
+        jti = self.refresh['jti']
+        self.assertNotIn(jti, revocation_filter)
+        
+        self.refresh.blacklist()
+        revocation_filter.refresh()
+        
+        self.assertIn(jti, revocation_filter)
+    
+    def test_prune_jwt_tokens(self):
+        """Тест: команда удаляет только истёкшие токены вместе с записями в чёрном списке"""
+        self.refresh.blacklist()
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired['jti']).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        out = StringIO()
+        
+        call_command('prune_jwt_tokens', '--batch-size=1', stdout=out)
+        
+        self.assertIn('Удалено токенов: 1', out.getvalue())
+        self.assertEqual(
+            list(OutstandingToken.objects.filter(user=self.user).values_list('jti', flat=True)),
+            [self.refresh['jti']]
+        )
+        self.assertEqual(BlacklistedToken.objects.filter(token__user=self.user).count(), 1)
+
+
+class StatelessJWTAuthenticationTest(APITestCase):
+    """Тесты аутентификации эндпоинтов задач без загрузки пользователя"""
+    
+    def setUp(self):
+        token_cache.clear()
+        user_state_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = reverse('core:task-stats')
+    
+    def test_user_loaded_once(self):
+        """Тест: состояние пользователя загружается один раз, дальше - из кэша"""
+        url = reverse('core:task-detail', kwargs={'pk': 0})
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_owner_username_from_cache(self):
+        """Тест: владелец задачи в ответе - username из кэша состояния"""
+        response = self.client.post(reverse('core:task-list-create'), {'title': 'Task'})
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['task']['user'], 'testuser')
+    
+    def test_deactivation_invalidates_cache(self):
+        """Тест: деактивированный пользователь сразу получает 401"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_deactivation_in_other_process(self):
+        """Тест: деактивация в другом процессе видна по версии пользователя в общем кэше"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        
+        # Другой процесс сохраняет пользователя: его post_save заменяет версию
+        # только в общем бэкенде, локальная копия версии здесь истекает через
+        # API_CACHE_LOCAL_TTL секунд, а не JWT_AUTH_CACHE_TTL
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user_states.shared.set(f'user-state:{self.user.pk}', 'other-process', timeout=None)
+        user_states.versions.clear()
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_invalid_token_not_cached(self):
+        """Тест: неверный токен отклоняется"""
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_profile_uses_full_user(self):
+        """Тест: профиль по-прежнему загружает пользователя целиком"""
+        self.client.get(self.url)
+        self.user.email = 'test@test.com'
+        self.user.save()
+        
+        response = self.client.get(reverse('users:user-profile'))
+        
+        self.assertEqual(response.data['email'], 'test@test.com')
+
+
 class UserModelTest(TestCase):
     """Тесты для расширенной функциональности пользователей"""
     
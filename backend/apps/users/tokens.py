@@ -0,0 +1,93 @@
+"""
+Быстрая проверка отозванных refresh-токенов без запроса к
+token_blacklist на каждый /auth/refresh/
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RevocationFilter:
+    """
+    Множество jti отозванных и ещё не истёкших токенов в памяти процесса.
+    Раз в refresh_interval секунд догружает из БД записи BlacklistedToken
+    с id больше последнего прочитанного и выбрасывает истёкшие jti.
+    Отзывы из других процессов видны с задержкой до refresh_interval -
+    фильтр лишь ускоряет отказ, окончательную проверку при ротации делает БД
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._expires = {}
+        self._last_id = 0
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            now = timezone.now()
+            rows = (
+                BlacklistedToken.objects
+                .filter(id__gt=self._last_id, token__expires_at__gt=now)
+                .order_by('id')
+                .values_list('id', 'token__jti', 'token__expires_at')
+            )
+            for token_id, jti, expires_at in rows.iterator():
+                self._expires[jti] = expires_at
+                self._last_id = token_id
+            self._expires = {
+                jti: expires_at for jti, expires_at in self._expires.items() if expires_at > now
+            }
+            self._refreshed_at = time.monotonic()
+
+    def add(self, jti, expires_at):
+        """
+        Отзыв в этом процессе виден сразу, не дожидаясь обновления. Под
+        блокировкой: refresh() в другом потоке обходит и пересобирает _expires
+        """
+        with self._lock:
+            self._expires[jti] = expires_at
+
+    def __contains__(self, jti):
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+        return jti in self._expires
+
+    def clear(self):
+        with self._lock:
+            self._expires = {}
+            self._last_id = 0
+            self._refreshed_at = None
+
+
+revocation_filter = RevocationFilter(settings.JWT_REVOCATION_REFRESH_INTERVAL)
+
+
+def rotation_blacklists():
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh-токен, проверяемый по revocation_filter. Если при ротации старый
+    токен отзывается, запрос к БД не нужен: повторное использование
+    обнаружит get_or_create в BlacklistedToken (см. TokenRefreshSerializer)
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in revocation_filter:
+            raise TokenError(_("Token is blacklisted"))
+        if not rotation_blacklists():
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revocation_filter.add(self.payload[api_settings.JTI_CLAIM], blacklisted[0].token.expires_at)
+        return blacklisted
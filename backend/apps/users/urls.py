@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from apps.core.async_views import with_async_views
+from . import async_views, views
 
 app_name = 'users'
 
@@ -11,4 +12,9 @@ urlpatterns = [
     path('auth/logout/', views.logout_view, name='user-logout'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/profile/', views.user_profile_view, name='user-profile'),
-] 
\ No newline at end of file
+]
+
+# Те же маршруты с асинхронным профилем для ASGI (config/urls_async.py)
+async_urlpatterns = with_async_views(urlpatterns, {
+    'user-profile': async_views.UserProfileView.as_view(),
+})
@@ -1,12 +1,18 @@
+from functools import partial
+
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 
+from apps.core.cache import user_cache
+from apps.core.conditional import check_preconditions, make_etag, set_validators
+from .authentication import StatelessJWTAuthentication
 from .serializers import UserRegistrationSerializer, UserSerializer
+from .tokens import FilteredRefreshToken
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -75,7 +81,7 @@ def logout_view(request):
         refresh_token = request.data.get('refresh')
         if refresh_token:
             try:
-                token = RefreshToken(refresh_token)
+                token = FilteredRefreshToken(refresh_token)
                 token.blacklist()
             except Exception as token_error:
                 # Токен может быть уже недействительным, но это не критично
@@ -91,10 +97,26 @@ def logout_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def load_profile(user_id):
+    """Данные профиля для user_cache"""
+    return dict(UserSerializer(User.objects.get(pk=user_id)).data)
+
+
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def user_profile_view(request):
-    """API для получения профиля текущего пользователя"""
+    """
+    API для получения профиля текущего пользователя. Аутентификация не
+    загружает пользователя, профиль берётся из user_cache: сохранение
+    пользователя сбрасывает запись
+    """
+    
+    user_id = request.user.pk
+    data = user_cache.get_or_set('user-profile', user_id, partial(load_profile, user_id))
+    etag = make_etag('profile', *data.values())
+    not_modified = check_preconditions(request, etag)
+    if not_modified is not None:
+        return not_modified
     
-    serializer = UserSerializer(request.user)
-    return Response(serializer.data, status=status.HTTP_200_OK) 
\ No newline at end of file
+    return set_validators(Response(data, status=status.HTTP_200_OK), etag)
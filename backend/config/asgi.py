@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Настройки по умолчанию для ASGI (постоянные соединения с БД выключены)
+os.environ.setdefault("ASGI", "True")
 
 application = get_asgi_application()
@@ -43,6 +43,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -61,17 +62,53 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "apps.core.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.core.middleware.ProfilerMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# Метрики запросов (apps/core/metrics.py): заголовок Server-Timing и /metrics
+# в формате Prometheus. При запуске тестов по умолчанию выключены. /metrics
+# требует заголовок Authorization: Bearer <METRICS_TOKEN>; без токена эндпоинт
+# отвечает только при DEBUG, иначе 404
+TESTING = sys.argv[1:2] == ["test"]
+METRICS_ENABLED = config("METRICS_ENABLED", default=not TESTING, cast=bool)
+METRICS_SERVER_TIMING = config("METRICS_SERVER_TIMING", default=True, cast=bool)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Множитель бюджетов времени ответа в тестах (apps/core/testing.py) для
+# медленных машин CI
+RESPONSE_TIME_BUDGET_FACTOR = config("RESPONSE_TIME_BUDGET_FACTOR", default=1.0, cast=float)
+
+# Профилирование запросов (apps/core/profiling.py), отчёты - в админке
+# "Профили запросов". Сотрудник включает профиль заголовком PROFILER_HEADER,
+# PROFILER_SAMPLE_RATE - доля профилируемых запросов остальных (0..1).
+# Запросы дольше PROFILER_SLOW_REQUEST_MS (0 - не сохранять) сохраняются
+# без cProfile, для SQL дольше PROFILER_EXPLAIN_THRESHOLD_MS строится EXPLAIN.
+# PROFILER_SQL_PARAMS подставляет в отчёт значения параметров SQL (по умолчанию
+# нет: отчёты скачиваются из админки, а в параметрах бывают пароли и токены)
+PROFILER_ENABLED = config("PROFILER_ENABLED", default=False, cast=bool)
+PROFILER_HEADER = config("PROFILER_HEADER", default="X-Profile")
+PROFILER_SAMPLE_RATE = config("PROFILER_SAMPLE_RATE", default=0.0, cast=float)
+PROFILER_SLOW_REQUEST_MS = config("PROFILER_SLOW_REQUEST_MS", default=1000, cast=float)
+PROFILER_EXPLAIN_THRESHOLD_MS = config("PROFILER_EXPLAIN_THRESHOLD_MS", default=50, cast=float)
+PROFILER_MAX_REPORTS = config("PROFILER_MAX_REPORTS", default=500, cast=int)
+PROFILER_SQL_PARAMS = config("PROFILER_SQL_PARAMS", default=False, cast=bool)
+
+# Под ASGI (uvicorn) ASYNC_VIEWS=True подключает асинхронные версии
+# эндпоинтов задач и профиля с теми же URL (config/urls_async.py)
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+# Процесс обслуживает ASGI: config/asgi.py выставляет ASGI=True до загрузки настроек
+ASGI = config("ASGI", default=ASYNC_VIEWS, cast=bool)
+ROOT_URLCONF = "config.urls_async" if ASYNC_VIEWS else "config.urls"
 
 TEMPLATES = [
     {
@@ -94,6 +131,27 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Соединения с БД: по умолчанию постоянные (CONN_MAX_AGE) с проверкой перед
+# повторным использованием (CONN_HEALTH_CHECKS, для пула - проверка при выдаче).
+# Под ASGI соединения открываются в разных потоках пула sync_to_async и
+# постоянные соединения копятся до max_connections, поэтому там по умолчанию
+# CONN_MAX_AGE=0; для повторного использования соединений под ASGI - DB_POOL.
+# DB_POOL=True включает пул psycopg 3 (пакет psycopg_pool); Django требует
+# CONN_MAX_AGE=0 вместе с пулом
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+
+DATABASE_OPTIONS = {}
+if DB_POOL:
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        'max_size': config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        # Сколько секунд запрос ждёт свободное соединение, прежде чем упасть с ошибкой
+        'timeout': config("DB_POOL_TIMEOUT", default=10, cast=float),
+        # Простаивающие соединения сверх min_size закрываются через max_idle секунд
+        'max_idle': config("DB_POOL_MAX_IDLE", default=300, cast=float),
+        'max_lifetime': config("DB_POOL_MAX_LIFETIME", default=3600, cast=float),
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -102,10 +160,94 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
         'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
         'PORT': os.environ.get('POSTGRES_PORT', 5432),
+        'CONN_MAX_AGE': 0 if DB_POOL else config("DB_CONN_MAX_AGE", default=0 if ASGI else 60, cast=int),
+        'CONN_HEALTH_CHECKS': config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        'OPTIONS': DATABASE_OPTIONS,
+    }
+}
+
+# Реплики для чтения: DB_REPLICA_HOSTS=host1,host2:5433. GET-запросы (API и
+# админка) читают с реплик, запись и всё после неё в том же запросе - с
+# основной БД. После записи клиент на DB_REPLICA_LAG секунд закрепляется за
+# основной БД (по пользователю из токена в общем кэше, для сессий - cookie),
+# чтобы видеть собственные изменения
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, config("DB_REPLICA_HOSTS", default="").split(","))):
+    host, _, port = address.strip().partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        # В тестах реплика - то же соединение, что и основная БД
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_REPLICA_LAG = timedelta(seconds=config("DB_REPLICA_LAG", default=5, cast=int))
+DATABASE_ROUTERS = ['apps.core.routers.ReplicaRouter']
+
+# Кэш. CACHE_BACKEND - общий для процессов бэкенд: file (по умолчанию, каталог
+# CACHE_LOCATION), db (таблица CACHE_LOCATION, создаётся командой
+# createcachetable), redis (CACHE_LOCATION=redis://..., нужен пакет redis),
+# locmem (в пределах процесса, по умолчанию в тестах) или dummy (без кэша,
+# в том числе без LRU в памяти процесса).
+# Перед ним - LRU в памяти процесса на API_CACHE_LOCAL_SIZE записей
+# (apps/core/cache.py); версии данных пользователей живут в нём не дольше
+# API_CACHE_LOCAL_TTL секунд - столько другой процесс может не видеть изменение
+CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'default'),
+    'dummy': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem" if TESTING else "file")
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config("CACHE_LOCATION", default=CACHE_BACKENDS[CACHE_BACKEND][1]),
     }
 }
+if CACHE_BACKEND != 'redis':
+    # Остальные бэкенды при переполнении удаляют часть записей; у Redis - своя политика
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config("CACHE_MAX_ENTRIES", default=100_000, cast=int)}
+API_CACHE_TIMEOUT = config("API_CACHE_TIMEOUT", default=300, cast=int)
+API_CACHE_LOCAL_SIZE = config("API_CACHE_LOCAL_SIZE", default=10_000, cast=int)
+API_CACHE_LOCAL_TTL = config("API_CACHE_LOCAL_TTL", default=2, cast=float)
+# Сколько секунд промах ждёт значение, которое уже вычисляет другой процесс
+API_CACHE_COALESCE_TIMEOUT = config("API_CACHE_COALESCE_TIMEOUT", default=2, cast=float)
+# Представления задач в памяти процесса для списков (apps/core/cache.py, task_fragments):
+# не больше TASK_FRAGMENT_CACHE_SIZE задач, каждая - не дольше TASK_FRAGMENT_CACHE_TTL секунд
+TASK_FRAGMENT_CACHE_SIZE = config("TASK_FRAGMENT_CACHE_SIZE", default=50_000, cast=int)
+TASK_FRAGMENT_CACHE_TTL = config("TASK_FRAGMENT_CACHE_TTL", default=3600, cast=int)
+
+
+
+# Хеширование паролей. PASSWORD_HASHER выбирает основной алгоритм: scrypt
+# (стандартная библиотека) в несколько раз быстрее PBKDF2 с миллионом итераций,
+# а стойкость к перебору обеспечивает затратами памяти; argon2 требует argon2-cffi.
+# Остальные алгоритмы нужны для проверки старых хешей - при входе такой хеш
+# пересчитывается основным алгоритмом (apps.users.backends.PooledModelBackend)
+PASSWORD_HASHER_CHOICES = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="scrypt")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+]
 
+AUTHENTICATION_BACKENDS = ['apps.users.backends.PooledModelBackend']
 
+# Пул хеширования паролей (apps.users.hashing): одновременно считается не больше
+# PASSWORD_HASHING_WORKERS хешей, ещё PASSWORD_HASHING_QUEUE_SIZE ждут в очереди,
+# остальные запросы сразу получают 503
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=2, cast=int)
+PASSWORD_HASHING_QUEUE_SIZE = config("PASSWORD_HASHING_QUEUE_SIZE", default=8, cast=int)
+PASSWORD_HASHING_TIMEOUT = config("PASSWORD_HASHING_TIMEOUT", default=5, cast=float)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,13 +297,19 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON через orjson, если он установлен (apps/core/renderers.py, apps/core/parsers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -190,6 +338,7 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.TokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -198,6 +347,24 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Кэш проверенных access-токенов и активности пользователей для эндпоинтов задач
+# (apps.users.authentication.StatelessJWTAuthentication); 0 отключает кэш.
+# Состояние пользователя сверяется с его версией в user_states, поэтому
+# изменения пользователя видны через API_CACHE_LOCAL_TTL, а не через TTL
+JWT_AUTH_CACHE_SIZE = config("JWT_AUTH_CACHE_SIZE", default=1024, cast=int)
+JWT_AUTH_CACHE_TTL = config("JWT_AUTH_CACHE_TTL", default=60, cast=int)
+
+# Как часто (в секундах) фильтр отозванных refresh-токенов догружает новые записи
+# из token_blacklist (apps.users.tokens.RevocationFilter)
+JWT_REVOCATION_REFRESH_INTERVAL = config("JWT_REVOCATION_REFRESH_INTERVAL", default=30, cast=int)
+
+# Дельта-синхронизация задач (/api/v1/tasks/sync/)
+# Изменения моложе окна безопасности отдаются повторно при следующей синхронизации:
+# транзакция, начатая раньше, может зафиксироваться позже выданного курсора
+TASK_SYNC_SAFETY_WINDOW = timedelta(seconds=config("TASK_SYNC_SAFETY_WINDOW", default=5, cast=int))
+# Сколько хранятся надгробия удалённых задач; более старый курсор требует полной синхронизации
+TASK_TOMBSTONE_RETENTION = timedelta(days=config("TASK_TOMBSTONE_RETENTION_DAYS", default=30, cast=int))
+
 # CORS settings for React frontend
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -20,8 +20,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.core.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),  # Метрики Prometheus
     path("api/v1/", include("apps.users.urls")),  # Пользователи (авторизация)
     path("api/v1/", include("apps.core.urls")),   # Задачи
 ]
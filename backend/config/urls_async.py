@@ -0,0 +1,25 @@
+"""
+URL-конфигурация для ASGI с асинхронными представлениями задач и профиля.
+Включается ASYNC_VIEWS=True; URL и имена маршрутов те же, что в config/urls.py
+"""
+
+from django.contrib import admin
+from django.urls import path, include
+from django.conf import settings
+from django.conf.urls.static import static
+
+from apps.core import urls as core_urls
+from apps.core.views import metrics_view
+from apps.users import urls as users_urls
+
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),  # Метрики Prometheus
+    path("api/v1/", include((users_urls.async_urlpatterns, users_urls.app_name))),
+    path("api/v1/", include((core_urls.async_urlpatterns, core_urls.app_name))),
+]
+
+# Serve media files during development
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)